@@ -0,0 +1,231 @@
+"""
+界面响应速度基准测试：用 offscreen 平台运行 PyQt5 界面，回放脚本化的操作，
+逐步报告耗时和内存。
+
+每一步在调用后都会执行 processEvents，使布局和绘制的开销也计入耗时。
+每轮使用新的 AppController / MainWindow，重复多轮后取中位数。
+
+    python benchmarks/gui_benchmark.py --components 200 --results 5000
+    python benchmarks/gui_benchmark.py --json base.json            # 保存结果
+    python benchmarks/gui_benchmark.py --compare base.json         # 与保存的结果比较，变慢超过阈值时返回非零
+
+输出列：
+    time(ms)     该步的耗时（各轮中位数）
+    py peak(KiB) 该步中 Python 分配的峰值增量 (tracemalloc)
+    rss(KiB)     该步前后进程常驻内存的变化
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from gui.app_controller import AppController
+from gui.main_window import MainWindow
+from gui.dialogs.add_component_dialog import AddComponentDialog
+from gui.dialogs.add_fraction_dialog import AddFractionDialog
+
+# 组分表中使用的单质，前几个同时给出质量分数
+ELEMENT_SYMBOLS = ['C', 'H', 'O', 'N', 'S', 'P', 'Cl', 'Br', 'F', 'Si', 'B', 'I', 'Na', 'K', 'Fe', 'Cu']
+
+
+def _rss_kib() -> int:
+    """当前进程的常驻内存 (KiB)；没有 /proc 时退回到历史峰值。"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _group_formula(k: int) -> str:
+    return f"C{k % 20 + 1}H{2 * (k % 20) + 3}O{k % 3 + 1}"
+
+
+def _general_results(n: int, symbols: list[str]) -> list[dict]:
+    return [{symbol: (k + i) % 9 + 1 for i, symbol in enumerate(symbols)} for k in range(n)]
+
+
+def _unknown_results(n: int, symbols: list[str]) -> list[tuple]:
+    return [({'?': k % 3 + 1, **{s: (k + i) % 9 + 1 for i, s in enumerate(symbols)}},
+             55.845 + k * 1e-4, 'Fe') for k in range(n)]
+
+
+class _Session:
+    """一轮脚本化的操作，每个方法是一个被计时的步骤。"""
+
+    def __init__(self, app: QApplication, n_components: int, n_fractions: int, n_results: int):
+        self.app = app
+        self.n_components = n_components
+        self.n_fractions = n_fractions
+        self.n_results = n_results
+        self.controller = None
+        self.window = None
+        self.group_symbols = []
+
+    def steps(self):
+        return [
+            ('startup', self.startup),
+            ('add_components', self.add_components),
+            ('add_fractions', self.add_fractions),
+            ('edit_components', self.edit_components),
+            ('edit_fractions', self.edit_fractions),
+            ('open_dialogs', self.open_dialogs),
+            ('display_general', self.display_general),
+            ('display_unknown', self.display_unknown),
+            ('load_state', self.load_state),
+            ('delete_components', self.delete_components),
+        ]
+
+    def startup(self):
+        self.controller = AppController()
+        self.window = MainWindow(self.controller)
+        self.window.show()
+
+    def add_components(self):
+        data_manager = self.controller.data_manager
+        elements = ELEMENT_SYMBOLS[:min(len(ELEMENT_SYMBOLS), self.n_components)]
+        for symbol in elements:
+            data_manager.add_component(symbol, symbol)
+        self.group_symbols = [f"R{k}" for k in range(self.n_components - len(elements))]
+        for k, symbol in enumerate(self.group_symbols):
+            data_manager.add_component(symbol, _group_formula(k))
+
+    def add_fractions(self):
+        data_manager = self.controller.data_manager
+        for k, symbol in enumerate(ELEMENT_SYMBOLS[:min(self.n_fractions, self.n_components)]):
+            data_manager.add_fraction(symbol, 5.0 + k)
+
+    def edit_components(self):
+        data_manager = self.controller.data_manager
+        for symbol in self.group_symbols:
+            index = data_manager.index_of(symbol)
+            data_manager.update_component_formula(index, _group_formula(index + 1))
+            data_manager.update_component_charge(index, index % 3 - 1)
+
+    def edit_fractions(self):
+        data_manager = self.controller.data_manager
+        for symbol, fraction in data_manager.get_fraction_rows():
+            data_manager.update_fraction_value(symbol, fraction + 0.5)
+
+    def open_dialogs(self):
+        for dialog_class in (AddComponentDialog, AddFractionDialog):
+            dialog = dialog_class(self.controller.data_manager, self.window)
+            dialog.show()
+            self.app.processEvents()
+            dialog.close()
+            dialog.deleteLater()
+
+    def display_general(self):
+        symbols = ELEMENT_SYMBOLS[:4]
+        self.window.results_viewer.display_results(_general_results(self.n_results, symbols), 'general')
+
+    def display_unknown(self):
+        symbols = ELEMENT_SYMBOLS[:3]
+        self.window.results_viewer.display_results(_unknown_results(self.n_results, symbols),
+                                                   'unknown_element')
+
+    def load_state(self):
+        data_manager = self.controller.data_manager
+        data_manager.load_state(data_manager.get_all_components(), data_manager.get_all_fractions())
+
+    def delete_components(self):
+        data_manager = self.controller.data_manager
+        # 从中间开始删除，每次都会使其后的行上移
+        while data_manager.components:
+            data_manager.delete_component(len(data_manager.components) // 2)
+
+    def close(self):
+        if self.window is not None:
+            self.window.close()
+            self.window.deleteLater()
+            self.app.processEvents()
+
+
+def run_benchmark(n_components: int, n_fractions: int, n_results: int, repeat: int) -> dict:
+    """运行 repeat 轮，返回 {步骤名: {'ms', 'py_peak_kib', 'rss_kib'}}（各轮中位数）。"""
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    samples: dict[str, list[tuple[float, float, float]]] = {}
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            session = _Session(app, n_components, n_fractions, n_results)
+            for name, step in session.steps():
+                app.processEvents()
+                rss_before = _rss_kib()
+                py_before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                start = time.perf_counter()
+                step()
+                app.processEvents()
+                elapsed = time.perf_counter() - start
+                _, py_peak = tracemalloc.get_traced_memory()
+                samples.setdefault(name, []).append(
+                    (elapsed * 1000.0, (py_peak - py_before) / 1024.0, float(_rss_kib() - rss_before)))
+            session.close()
+    finally:
+        tracemalloc.stop()
+    return {
+        name: {
+            'ms': statistics.median(s[0] for s in values),
+            'py_peak_kib': statistics.median(s[1] for s in values),
+            'rss_kib': statistics.median(s[2] for s in values),
+        }
+        for name, values in samples.items()
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """返回耗时比基准慢 threshold 以上的步骤说明。"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None or base['ms'] <= 0:
+            continue
+        ratio = stats['ms'] / base['ms']
+        if ratio > 1.0 + threshold:
+            regressions.append(f"{name}: {base['ms']:.1f} ms -> {stats['ms']:.1f} ms (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="元素分析计算器界面基准测试 (offscreen Qt)")
+    parser.add_argument('--components', type=int, default=200, help="组分数量")
+    parser.add_argument('--fractions', type=int, default=8, help="质量分数数量")
+    parser.add_argument('--results', type=int, default=5000, help="结果表格行数")
+    parser.add_argument('--repeat', type=int, default=3, help="重复轮数，报告中位数")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    parser.add_argument('--compare', help="与之前保存的JSON结果比较")
+    parser.add_argument('--threshold', type=float, default=0.25, help="判定为变慢的相对阈值")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.components, args.fractions, args.results, args.repeat)
+    print(f"components={args.components} fractions={args.fractions} "
+          f"results={args.results} repeat={args.repeat}")
+    print(f"{'step':<20}{'time(ms)':>12}{'py peak(KiB)':>16}{'rss(KiB)':>12}")
+    for name, stats in results.items():
+        print(f"{name:<20}{stats['ms']:>12.1f}{stats['py_peak_kib']:>16.1f}{stats['rss_kib']:>12.0f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'steps': results}, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['steps']
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("变慢:", line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
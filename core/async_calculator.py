@@ -0,0 +1,202 @@
+"""
+ChemicalCalculator 的 asyncio 接口，供 aiohttp/FastAPI 等异步服务和 Jupyter 中使用。
+
+- 计算在线程池中执行，不阻塞事件循环；
+- solve_* 返回与同步方法完全相同的排序结果；
+- iter_* 以异步迭代器的形式在找到解时立即逐个产出（按搜索顺序，未排序）；
+- 协程被取消或迭代器被提前关闭时，通过 stop_check 通知底层搜索在下一个检查点停止，
+  而不是让它在后台继续跑完；
+- 同时运行的计算数量由 max_concurrency 限制，其余的在信号量上等待；
+- iter_* 最多缓存 stream_buffer 个尚未被取走的解，缓存满时计算线程等待（背压），
+  消费得慢的调用方不会让整个搜索结果堆积在内存中；
+- governor (core.governor.ResourceGovernor) 给出时，达到上限后正常结束并返回部分结果，
+  iter_* 在产出已找到的解后结束，原因见 governor.stop_reason；
+- ordered=True 或给出 limit 时，iter_* 按最终的排序顺序产出解（先产出最简单的化学式）。
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import AsyncIterator, Callable, Optional
+
+from core import data_modules
+from core.calculator import ChemicalCalculator
+from core.governor import ResourceGovernor
+from core.solver_context import CalculationCancelled
+
+DEFAULT_STREAM_BUFFER = 256
+
+# 计算线程等待缓存空位时，每隔这么久检查一次是否已被要求停止
+_PUT_POLL_SECONDS = 0.05
+
+
+class AsyncChemicalCalculator:
+    """在执行器中运行 ChemicalCalculator 的异步封装。"""
+
+    def __init__(self, max_concurrency: int = 4, executor: Optional[Executor] = None,
+                 stream_buffer: int = DEFAULT_STREAM_BUFFER):
+        if max_concurrency < 1:
+            raise ValueError("最大并发数必须为正整数")
+        if stream_buffer < 1:
+            raise ValueError("流式输出的缓存大小必须为正整数")
+        self._stream_buffer = stream_buffer
+        self._calculator = ChemicalCalculator()
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_concurrency)
+        self._own_executor = executor is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def solve_for_single_unknown(self,
+                                       known_components_data: list[dict],
+                                       mass_fractions: dict[str, float],
+                                       n_max: int,
+                                       tolerance: float,
+                                       unknown_filter: str,
+                                       constraints: Optional[data_modules.Constraints] = None,
+                                       reduce_components: bool = False,
+                                       element_tolerances: Optional[dict[str, float]] = None,
+                                       remainder_element: Optional[str] = None,
+                                       governor: Optional[ResourceGovernor] = None,
+                                       ordered: bool = False,
+                                       limit: Optional[int] = None,
+                                       engine: str = 'recursive',
+                                       include_synthetic: bool = False
+                                       ) -> list[data_modules.SolutionUnknown]:
+        """ChemicalCalculator.solve_for_single_unknown 的异步版本。"""
+        return await self._run(self._calculator.solve_for_single_unknown, dict(
+            known_components_data=known_components_data, mass_fractions=mass_fractions,
+            n_max=n_max, tolerance=tolerance, unknown_filter=unknown_filter, constraints=constraints,
+            reduce_components=reduce_components, element_tolerances=element_tolerances,
+            remainder_element=remainder_element, governor=governor,
+            ordered=ordered, limit=limit, engine=engine, include_synthetic=include_synthetic))
+
+    async def solve_by_brute_force(self,
+                                   components_data: list[dict],
+                                   mass_fractions: dict[str, float],
+                                   n_max: int,
+                                   tolerance: float,
+                                   constraints: Optional[data_modules.Constraints] = None,
+                                   engine: str = 'product',
+                                   reduce_components: bool = False,
+                                   element_tolerances: Optional[dict[str, float]] = None,
+                                   remainder_element: Optional[str] = None,
+                                   governor: Optional[ResourceGovernor] = None,
+                                   ordered: bool = False,
+                                   limit: Optional[int] = None) -> list[data_modules.Formula]:
+        """ChemicalCalculator.solve_by_brute_force 的异步版本。"""
+        return await self._run(self._calculator.solve_by_brute_force, dict(
+            components_data=components_data, mass_fractions=mass_fractions,
+            n_max=n_max, tolerance=tolerance, constraints=constraints, engine=engine,
+            reduce_components=reduce_components, element_tolerances=element_tolerances,
+            remainder_element=remainder_element, governor=governor,
+            ordered=ordered, limit=limit))
+
+    def iter_single_unknown(self,
+                            known_components_data: list[dict],
+                            mass_fractions: dict[str, float],
+                            n_max: int,
+                            tolerance: float,
+                            unknown_filter: str,
+                            constraints: Optional[data_modules.Constraints] = None,
+                            reduce_components: bool = False,
+                            element_tolerances: Optional[dict[str, float]] = None,
+                            remainder_element: Optional[str] = None,
+                            governor: Optional[ResourceGovernor] = None,
+                            ordered: bool = False,
+                            limit: Optional[int] = None,
+                            engine: str = 'recursive',
+                            include_synthetic: bool = False
+                            ) -> AsyncIterator[data_modules.SolutionUnknown]:
+        """逐个产出单一未知元素模式的解 (化学式, 计算质量, 匹配元素)。"""
+        return self._stream(self._calculator.solve_for_single_unknown, dict(
+            known_components_data=known_components_data, mass_fractions=mass_fractions,
+            n_max=n_max, tolerance=tolerance, unknown_filter=unknown_filter, constraints=constraints,
+            reduce_components=reduce_components, element_tolerances=element_tolerances,
+            remainder_element=remainder_element, governor=governor,
+            ordered=ordered, limit=limit, engine=engine, include_synthetic=include_synthetic))
+
+    def iter_brute_force(self,
+                         components_data: list[dict],
+                         mass_fractions: dict[str, float],
+                         n_max: int,
+                         tolerance: float,
+                         constraints: Optional[data_modules.Constraints] = None,
+                         engine: str = 'product',
+                         reduce_components: bool = False,
+                         element_tolerances: Optional[dict[str, float]] = None,
+                         remainder_element: Optional[str] = None,
+                         governor: Optional[ResourceGovernor] = None,
+                         ordered: bool = False,
+                         limit: Optional[int] = None) -> AsyncIterator[data_modules.Formula]:
+        """逐个产出通用模式的解。"""
+        return self._stream(self._calculator.solve_by_brute_force, dict(
+            components_data=components_data, mass_fractions=mass_fractions,
+            n_max=n_max, tolerance=tolerance, constraints=constraints, engine=engine,
+            reduce_components=reduce_components, element_tolerances=element_tolerances,
+            remainder_element=remainder_element, governor=governor,
+            ordered=ordered, limit=limit))
+
+    async def _run(self, method: Callable, kwargs: dict):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            stop = threading.Event()
+            future = loop.run_in_executor(
+                self._executor, lambda: method(**kwargs, stop_check=stop.is_set))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 等底层搜索真正停下后再释放并发名额
+                stop.set()
+                await asyncio.wait([future])
+                if not future.cancelled():
+                    future.exception()
+                raise
+
+    async def _stream(self, method: Callable, kwargs: dict):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self._stream_buffer)
+            stop = threading.Event()
+
+            def on_solution(solution):
+                # 在计算线程中执行：缓存满时等待空位；被要求停止后不再等待
+                put = asyncio.run_coroutine_threadsafe(queue.put(solution), loop)
+                while True:
+                    try:
+                        put.result(timeout=_PUT_POLL_SECONDS)
+                        return
+                    except FutureTimeoutError:
+                        if stop.is_set():
+                            put.cancel()
+                            raise CalculationCancelled("计算已被取消。")
+
+            future = loop.run_in_executor(
+                self._executor, lambda: method(**kwargs, stop_check=stop.is_set, on_solution=on_solution))
+            getter = None
+            try:
+                # 计算线程的每次 put 都在返回前完成，因此 future 完成时全部解都已在队列中
+                while not (future.done() and queue.empty()):
+                    if not queue.empty():
+                        yield queue.get_nowait()
+                        continue
+                    getter = asyncio.ensure_future(queue.get())
+                    await asyncio.wait([getter, future], return_when=asyncio.FIRST_COMPLETED)
+                    if getter.done():
+                        solution, getter = getter.result(), None
+                        yield solution
+                    else:
+                        getter.cancel()
+                        getter = None
+                future.result()
+            finally:
+                if getter is not None:
+                    getter.cancel()
+                # 被取消或提前关闭时通知搜索停止，并等它结束
+                if not future.done():
+                    stop.set()
+                    await asyncio.wait([future])
+                if not future.cancelled():
+                    future.exception()   # 因取消而抛出的 CalculationCancelled 不再向外传播
+
+    def close(self):
+        """关闭内部创建的线程池；外部传入的执行器由调用方负责关闭。"""
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
@@ -1,5 +1,15 @@
-from typing import Dict, List, Tuple, TypedDict, Optional, Set
+from typing import Callable, Dict, List, Tuple, TypedDict, Optional, Set
 from core import data_modules, utils
+from core.solver_context import SolverContext, CalculationCancelled
+from core.governor import ResourceGovernor, ResourceLimitReached
+from core import constraints as chem_rules
+from core.mitm import solve_meet_in_the_middle
+from core import ratio_solver
+from core.odometer import iter_odometer
+from core.vectorized import solve_unknown_vectorized
+from core import reduction
+from core import peak_assignment
+from core import robustness
 from itertools import product
 
 class ChemicalCalculator:
@@ -10,10 +20,41 @@ class ChemicalCalculator:
                                  mass_fractions: dict[str, float], 
                                  n_max: int,
                                  tolerance: float,
-                                 unknown_filter: str) -> list[data_modules.SolutionUnknown]:  
+                                 unknown_filter: str,
+                                 constraints: Optional[data_modules.Constraints] = None,
+                                 stop_check: Optional[Callable[[], bool]] = None,
+                                 on_solution: Optional[Callable[[data_modules.SolutionUnknown], None]] = None,
+                                 reduce_components: bool = False,
+                                 element_tolerances: Optional[dict[str, float]] = None,
+                                 remainder_element: Optional[str] = None,
+                                 governor: Optional[ResourceGovernor] = None,
+                                 ordered: bool = False,
+                                 limit: Optional[int] = None,
+                                 engine: str = 'recursive',
+                                 include_synthetic: bool = False
+                                 ) -> list[data_modules.SolutionUnknown]:
         """
         实现“单一未知元素”模式的计算（新版）。
         利用已知元素的质量分数来反推未知元素的原子质量。
+        constraints 为可选的化学规则约束，在递归过程中剪枝。
+        stop_check 返回True时，计算在下一个检查点抛出 CalculationCancelled。
+        on_solution 给出时，每找到一个解就立即回调（按搜索顺序，返回值仍是排序后的完整列表）。
+        reduce_components=True 时先合并重复和线性相关的组分 (core.reduction)，
+        只在基组分上搜索，组成相同的化学式只返回一个。
+        element_tolerances 为个别元素的质量分数公差；remainder_element 为按差减法计算分数的元素
+        （可以是'?'）。给出二者之一时，各元素的分数窗口也作为剪枝约束。
+        governor 给出时按其上限限制解的数量、内存和CPU时间，达到上限后返回已找到的部分解，
+        停止原因见 governor.stop_reason。
+        ordered=True 时按 (物种数, 总原子数) 的顺序枚举，解按最终的排序顺序产生（on_solution 也是），
+        不再需要最后的排序；此时达到结果数量上限时保留的是最简单的那些解。
+        （每个复杂度各做一趟搜索，完整搜索时比默认的顺序慢，适合只需要前面部分结果的情况。）
+        limit 为只需要的前N个解，给出时按复杂度顺序枚举并在找到第N个解后停止。
+        约简组分 (reduce_components) 时展开后的化学式与基组分计数的复杂度不对应，
+        仍是全部搜索后排序，limit 只截取排序后的前N个。
+        engine='vectorized' 时用 numpy 整批计算 (core.vectorized)，结果及顺序与逐个递归完全相同；
+        按复杂度顺序枚举时不使用 engine。
+        include_synthetic=True 时未知元素也可以匹配非天然元素 (Tc、Pm、Po 及更重的放射性元素，
+        Th 和 U 除外)，默认不匹配。
         """
         # 1. 移除 self.__init__()，避免在每次调用时重置整个对象
         # 2. 将状态作为局部变量管理，使方法可重入
@@ -22,49 +63,143 @@ class ChemicalCalculator:
 
         if not mass_fractions:
              raise ValueError("至少提供一个其他元素的质量分数。")
+        if engine not in ('recursive', 'vectorized'):
+            raise ValueError(f"未知的搜索引擎 '{engine}'")
+
+        # 组分和质量分数在整个计算过程中不变，预先编译为求解上下文
+        count_ranges = [(0, n_max)] * len(known_components)
+        basis = reduction.reduce_components(known_components, count_ranges) if reduce_components else None
+        if basis is not None:
+            known_components, count_ranges = basis.basis_components, basis.basis_ranges
+        fractions, tolerances, unknown_remainder = chem_rules.resolve_fractions(
+            mass_fractions, tolerance, element_tolerances, remainder_element, known_components)
+        context = SolverContext(known_components, fractions,
+                                count_ranges=count_ranges,
+                                stop_check=stop_check, on_solution=on_solution)
+        context.reduction = basis
+        context.tolerances = tolerances
+        context.governor = governor
+        if governor is not None:
+            governor.start()
+        ordered = (ordered or limit is not None) and basis is None
+        if limit is not None:
+            if limit < 1:
+                raise ValueError("结果数量必须为正整数")
+            if ordered:
+                context.limit = limit
+        counts = [0] * context.n_components
+        rules = chem_rules.build_constraints(known_components, constraints)
+        if element_tolerances or remainder_element:
+            rules += chem_rules.fraction_constraints(context)
+            if unknown_remainder is not None:
+                rules += chem_rules.unknown_remainder_constraints(context, unknown_remainder)
+        unknown_charge = next((item.get('charge', 0) for item in known_components_data
+                               if item['symbol'] == '?'), 0)
 
         # 3. 循环和递归调用
-        for n_unknown in range(1, n_max + 1):
-            # 将所有需要的参数传递给递归函数
-            self._find_combinations_recursive(
-                # --- 递归函数的参数 ---
-                comp_index=0,
-                formula={'?': n_unknown},
-                known_mass_sum=0.0,
-                # --- 不变的上下文参数 ---
-                known_components=known_components,
-                mass_fractions=mass_fractions,
-                n_max=n_max,
-                tolerance=tolerance,
-                element_type=unknown_filter,
-                solutions_list=solutions # 将解决方案列表作为引用传递
-            )
-        
-        # 4. 排序和返回
-        solutions.sort(key=lambda x: (len(x[0]), sum(x[0].values())))
+        if engine == 'vectorized' and not ordered:
+            try:
+                solve_unknown_vectorized(context, rules, n_max, tolerance, unknown_filter, unknown_charge,
+                                         constraints, unknown_remainder, solutions, include_synthetic)
+            except ResourceLimitReached:
+                pass
+            passes = ()
+        elif ordered:
+            passes = self._complexity_passes_unknown(context.n_components, n_max)
+        else:
+            passes = ((n_unknown, None, None) for n_unknown in range(1, n_max + 1))
+        current_n_unknown = None
+        try:
+            for n_unknown, known_atoms, species_left in passes:
+                # 扣除未知原子对约束的贡献后，约束只作用于已知组分
+                if n_unknown != current_n_unknown:
+                    context.set_constraints(chem_rules.constraints_for_unknown(
+                        rules, n_unknown, unknown_charge, unknown_filter))
+                    current_n_unknown = n_unknown
+                constraint_sums = [0.0] * len(context.constraints)
+                if not context.is_feasible(0, constraint_sums):
+                    continue
+                # 将所有需要的参数传递给递归函数
+                self._find_combinations_recursive(
+                    # --- 递归函数的参数 ---
+                    comp_index=0,
+                    counts=counts,
+                    known_mass_sum=0.0,
+                    element_masses=[0.0] * context.n_elements,
+                    constraint_sums=constraint_sums,
+                    # --- 不变的上下文参数 ---
+                    n_unknown=n_unknown,
+                    context=context,
+                    n_max=n_max,
+                    tolerance=tolerance,
+                    element_type=unknown_filter,
+                    solutions_list=solutions, # 将解决方案列表作为引用传递
+                    constraints=constraints,
+                    unknown_remainder=unknown_remainder,
+                    atoms_left=known_atoms,
+                    species_left=species_left,
+                    include_synthetic=include_synthetic
+                )
+        except ResourceLimitReached:
+            pass    # 达到资源上限或limit：保留已找到的解，原因记录在 governor 中
+
+        # 4. 排序和返回（按复杂度顺序枚举时已经有序）
+        if not ordered:
+            # n_? 作为次要键：向量化引擎不是按 n_? 逐个搜索的，排序后与递归方法的顺序相同
+            solutions.sort(key=lambda x: (len(x[0]), sum(x[0].values()), x[0]['?']))
+            if limit is not None:
+                del solutions[limit:]
         return solutions
+
+    @staticmethod
+    def _complexity_passes_unknown(n_components: int, n_max: int):
+        """
+        单一未知元素模式按复杂度枚举的各趟：(n_unknown, 已知组分总原子数, 已知组分的物种数)。
+        按 (物种数, 总原子数) 递增，同一复杂度内按 n_unknown 递增，
+        每趟内部的递归顺序与原来相同，因此与排序后的结果（稳定排序）顺序一致。
+        """
+        for species in range(n_components + 1):
+            for total in range(1 + species, n_max * (species + 1) + 1):
+                for n_unknown in range(1, n_max + 1):
+                    known_atoms = total - n_unknown
+                    if species <= known_atoms <= species * n_max:
+                        yield n_unknown, known_atoms, species
     
     def _find_combinations_recursive(self, comp_index: int,
-                                     formula: data_modules.Formula, 
+                                     counts: list[int],
                                      known_mass_sum: float,
-                                     known_components: list,
-                                     mass_fractions : dict[str, float],
+                                     element_masses: list[float],
+                                     constraint_sums: list[float],
+                                     n_unknown: int,
+                                     context: SolverContext,
                                      n_max: int,
                                      tolerance: float,
                                      element_type: str,
-                                     solutions_list: list):
-        """递归辅助函数，实现了基于已知元素质量分数的求解和验证逻辑。"""
-
-        # print('IN RECURSIVE',formula, solutions_list)
-        if comp_index == len(known_components):        # 当所有已知组分的数量都已确定 
+                                     solutions_list: list,
+                                     constraints: Optional[data_modules.Constraints] = None,
+                                     unknown_remainder: Optional[tuple[float, float]] = None,
+                                     atoms_left: Optional[int] = None,
+                                     species_left: Optional[int] = None,
+                                     include_synthetic: bool = False):
+        """
+        递归辅助函数，实现了基于已知元素质量分数的求解和验证逻辑。
+        counts为各已知组分的当前计数（原地修改，回溯时复位），
+        element_masses为当前各给定元素的累计质量，
+        constraint_sums为各线性约束的部分和，
+        unknown_remainder为按差减法给出的未知元素 (分数, 公差)，
+        atoms_left和species_left用于按复杂度枚举（此时各组分的计数范围都是[0, n_max]）：
+        剩余组分的计数之和恰为atoms_left，且恰有species_left个非零。
+        """
+        if comp_index == context.n_components:        # 当所有已知组分的数量都已确定 
             if known_mass_sum > 1e-6:
+                if context.constraints and not context.satisfies(constraint_sums):
+                    return
                 
-                base_element = list(mass_fractions.keys())[0]  # a. 选择一个基准元素来计算 A_?
-                w_base = mass_fractions[base_element] / 100.0 # 转换为小数
+                w_base = context.targets[context.base_index] / 100.0 # a. 基准元素的质量分数，转换为小数
                 
-                m_base_calculated = self._calculate_elemental_mass_in_formula(formula, known_components, base_element) # b. 计算分子中基准元素的总质量
+                m_base_calculated = element_masses[context.base_index] # b. 分子中基准元素的总质量
 
-                n_unknown = formula['?']   # c. 使用新公式求解 A_?
+                # c. 使用新公式求解 A_?
                 if w_base < 1e-9 or n_unknown == 0: return  # 防止除零错误
                 denominator = w_base * n_unknown
                 if abs(denominator) < 1e-9: return
@@ -76,90 +211,317 @@ class ChemicalCalculator:
                 total_mass_hypothetical = known_mass_sum + n_unknown * unknown_atomic_mass    # e. 验证：用算出的 A_? 检验所有给定的质量分数是否吻合
                 if total_mass_hypothetical < 1e-6: return
 
-                for element, target_fraction in mass_fractions.items():
-                    m_element_calc = self._calculate_elemental_mass_in_formula(formula, known_components, element)
-                    actual_fraction = (m_element_calc / total_mass_hypothetical) * 100.0
+                for j, target_fraction in enumerate(context.targets):
+                    actual_fraction = (element_masses[j] / total_mass_hypothetical) * 100.0
                     
-                    if abs(actual_fraction - target_fraction) > tolerance:
+                    if abs(actual_fraction - target_fraction) > context.tolerances[j]:
                         return  # 不吻合，此解无效
 
+                if unknown_remainder is not None:
+                    unknown_fraction = (n_unknown * unknown_atomic_mass / total_mass_hypothetical) * 100.0
+                    if abs(unknown_fraction - unknown_remainder[0]) > unknown_remainder[1]:
+                        return
+
                 matched_element = utils.find_matching_element(    # f. 最终化学合理性检验：匹配真实元素
-                    unknown_atomic_mass, tolerance, element_type
+                    unknown_atomic_mass, tolerance, element_type, include_synthetic
                 )
-                if matched_element in mass_fractions.keys():
+                if matched_element in context.elements:
+                    return
+                if matched_element and not chem_rules.accepts_unknown_element(
+                        context, constraint_sums, constraints, n_unknown, matched_element, known_mass_sum):
                     return
                 if matched_element:
-                    solutions_list.append((formula.copy(), unknown_atomic_mass, matched_element))
+                    if context.reduction is not None:
+                        # 约简搜索：展开回用户定义的组分，无法由原组分得到的组合跳过
+                        formula = context.reduction.formula(counts, prefix={'?': n_unknown})
+                        if formula is None:
+                            return
+                    else:
+                        formula = context.build_formula(counts, prefix={'?': n_unknown})
+                    context.emit(solutions_list, (formula, unknown_atomic_mass, matched_element))
             return
 
-        comp = known_components[comp_index]   # f. 最终化学合理性检验：匹配真实元素
-        # 允许组分数量为0，以处理并非所有组分都存在的情况
-        for n in range(0, n_max + 1):
-            new_formula = formula.copy()
-            if n > 0:
-                new_formula[comp['symbol']] = n
+        context.checkpoint()
+        comp_mass = context.masses[comp_index]
+        # 允许组分数量为0，以处理并非所有组分都存在的情况（约简后的基组分有各自的范围）
+        n_lo, n_hi = context.count_ranges[comp_index]
+        if context.constraints:
+            # 只枚举剩余组分仍有可能满足全部约束的计数，其余分支直接剪去
+            n_lo, n_hi = context.count_interval(comp_index, constraint_sums)
+        values = range(n_lo, n_hi + 1)
+        if species_left is not None:
+            # 之后的组分中还需 s 个非零计数时，它们的原子数之和在 [s, s*n_max] 内：
+            # 当前组分取0时 s = species_left，取n>0时 s = species_left-1
+            after = context.n_components - comp_index - 1
+            rest = species_left - 1
+            positive = range(0)
+            if 0 <= rest <= after:
+                positive = range(max(n_lo, 1, atoms_left - rest * n_max), min(n_hi, atoms_left - rest) + 1)
+            if n_lo <= 0 <= n_hi and species_left <= after and \
+                    species_left <= atoms_left <= species_left * n_max:
+                values = [0, *positive]
+            else:
+                values = positive
+        for n in values:
+            new_sums = constraint_sums
+            if context.constraints:
+                new_sums = context.add_constraint_counts(constraint_sums, comp_index, n)
+            counts[comp_index] = n
             self._find_combinations_recursive(
                 comp_index + 1,
-                new_formula,
-                known_mass_sum + n * comp['mass'],
-                known_components, mass_fractions, n_max, tolerance, element_type, solutions_list
+                counts,
+                known_mass_sum + n * comp_mass,
+                context.add_counts(element_masses, comp_index, n),
+                new_sums,
+                n_unknown, context, n_max, tolerance, element_type, solutions_list,
+                constraints, unknown_remainder,
+                None if atoms_left is None else atoms_left - n,
+                None if species_left is None else species_left - (n > 0),
+                include_synthetic
             )
+        counts[comp_index] = 0
 
 
     def solve_by_brute_force(self,
                              components_data: list[dict],
                              mass_fractions: dict[str, float],
                              n_max: int,
-                             tolerance: float) -> list[data_modules.Formula]:
+                             tolerance: float,
+                             constraints: Optional[data_modules.Constraints] = None,
+                             engine: str = 'product',
+                             stop_check: Optional[Callable[[], bool]] = None,
+                             on_solution: Optional[Callable[[data_modules.Formula], None]] = None,
+                             reduce_components: bool = False,
+                             element_tolerances: Optional[dict[str, float]] = None,
+                             remainder_element: Optional[str] = None,
+                             governor: Optional[ResourceGovernor] = None,
+                             ordered: bool = False,
+                             limit: Optional[int] = None
+                             ) -> list[data_modules.Formula]:
         """
-        实现“通用推断”模式的计算。
+        实现“通用推断”模式的计算，返回按 (元素种类数, 总原子数) 排序的 Formula 列表。
         这是通用模式下对外的唯一接口。
 
-        内部逻辑:
-        1. 调用私有方法 _prepare_components 将输入的原始数据转换为 List[Component]。
-        2. 执行基于 itertools.product 的暴力枚举算法。
-        3. 对每一种组合，计算其总质量和各元素的质量分数。
-        4. 将计算出的质量分数与用户输入的所有质量分数进行比较（在tolerance范围内）。
-        5. 收集所有完全匹配的解。
-        6. 返回一个包含多个Formula字典的列表。
+        engine 为搜索引擎：'product' 逐一枚举（给出约束时为带剪枝的深度优先搜索），
+        'odometer'、'mitm'、'ratio' 见同名模块 (core.odometer, core.mitm, core.ratio_solver)，
+        结果都与 'product' 相同。
+        constraints / element_tolerances / remainder_element 见 core.constraints；
+        reduce_components 见 core.reduction；governor 见 core.governor。
+        stop_check 返回True时，计算在下一个检查点抛出 CalculationCancelled；
+        on_solution 给出时，每找到一个解就回调一次（返回值仍是排序后的完整列表）。
+        ordered=True 或给出 limit 时按复杂度顺序枚举，limit 为只需要的前N个解。
         """
-        # WARNING ========================== ERROR OCCURED WHEN MASS FRACTION HAS NO ?
         components = self._prepare_components(components_data)
-        # print(components, mass_fractions)
-        comp_map = {c['symbol']: c for c in components}
-        symbols = list(comp_map.keys())
-        p = len(symbols)
+        count_ranges = [(1, n_max)] * len(components)
+        basis = reduction.reduce_components(components, count_ranges) if reduce_components else None
+        if basis is not None:
+            components, count_ranges = basis.basis_components, basis.basis_ranges
+        if remainder_element == '?':
+            raise ValueError("通用模式下没有未知元素'?'，不能按差减法计算它的质量分数")
+        fractions, tolerances, _ = chem_rules.resolve_fractions(
+            mass_fractions, tolerance, element_tolerances, remainder_element, components)
+        context = SolverContext(components, fractions,
+                                count_ranges=count_ranges,
+                                constraints=chem_rules.build_constraints(components, constraints),
+                                stop_check=stop_check, on_solution=on_solution)
+        context.reduction = basis
+        context.tolerances = tolerances
+        if element_tolerances or remainder_element:
+            context.set_constraints(context.constraints + chem_rules.fraction_constraints(context))
+        if engine not in ('product', 'odometer', 'mitm', 'ratio'):
+            raise ValueError(f"未知的搜索引擎 '{engine}'")
+        context.governor = governor
+        if governor is not None:
+            governor.start()
+        ordered = (ordered or limit is not None) and basis is None
+        if limit is not None:
+            if limit < 1:
+                raise ValueError("结果数量必须为正整数")
+            if ordered:
+                context.limit = limit
+        # 约简后的基组分计数范围各不相同，由深度优先搜索处理
+        search_engine = engine if basis is None else 'product'
         solutions = []
+        try:
+            if ordered:
+                self._search_general_ordered(context, n_max, tolerance, solutions)
+            else:
+                self._solve_general(context, search_engine, n_max, tolerance, solutions)
+        except ResourceLimitReached:
+            pass    # 达到资源上限或limit：保留已找到的解，原因记录在 governor 中
+        if not ordered:
+            # 按元素种类数量和总原子数排序
+            solutions.sort(key=lambda f: (len(f), sum(f.values())))
+            if limit is not None:
+                del solutions[limit:]
+        return solutions
+
+    def _search_general_ordered(self, context: SolverContext, n_max: int, tolerance: float, solutions: list):
+        """
+        按复杂度顺序搜索通用模式：所有组分计数都在[1, n_max]内，物种数固定，
+        因此只需按总原子数T递增，每个T做一次计数之和恰为T的深度优先搜索。
+        同一T内的顺序与 itertools.product 相同，与排序后的结果（稳定排序）顺序一致。
+        完整搜索时比默认的顺序慢；约简组分时不使用，仍是全部搜索后排序，再截取前N个。
+        """
+        p = context.n_components
+        constraint_sums = [0.0] * len(context.constraints)
+        if not context.is_feasible(0, constraint_sums):
+            return
+        for total in range(p, p * n_max + 1):
+            self._search_general(0, [0] * p, 0.0, [0] * context.n_elements,
+                                 constraint_sums, context, n_max, tolerance, solutions, atoms_left=total)
+
+    def _solve_general(self, context: SolverContext, search_engine: str, n_max: int, tolerance: float,
+                       solutions: list):
+        """按 search_engine 执行通用模式的搜索，把解按枚举顺序加入solutions（未排序）。"""
+        found = None
+        if search_engine == 'mitm':
+            found = solve_meet_in_the_middle(context, n_max, tolerance)
+        elif search_engine == 'ratio':
+            columns = ratio_solver.element_columns(context)
+            if columns is not None:
+                found = ratio_solver.solve_by_ratios(context, columns, n_max, tolerance)
+        if found is not None:
+            for counts in found:
+                context.emit(solutions, context.build_formula(list(counts)))
+            return
+        if context.constraints or context.reduction is not None:
+            # 深度优先搜索本身就是增量的，'odometer' 在这里与 'product' 相同
+            if context.is_feasible(0, [0.0] * len(context.constraints)):
+                self._search_general(0, [0] * context.n_components, 0.0, [0] * context.n_elements,
+                                     [0.0] * len(context.constraints), context, n_max, tolerance, solutions)
+            return
+        if search_engine == 'odometer':
+            for counts in iter_odometer(context, n_max):
+                context.emit(solutions, context.build_formula(list(counts)))
+            return
+
+        symbols = context.symbols
+        masses = context.masses
+        element_atoms = context.element_atoms
+        atomic_masses = context.atomic_masses
+        targets = context.targets
+        tolerances = context.tolerances
+        n_elements = context.n_elements
+        p = context.n_components
 
         for counts in product(range(1, n_max + 1), repeat=p):
+            context.checkpoint()
             total_mass = 0.0
-            element_counts: Dict[str, int] = {}
+            element_counts = [0] * n_elements
 
             for i, n in enumerate(counts):
-                symbol = symbols[i]
-                comp = comp_map[symbol]
-                total_mass += n * comp['mass']
-                for element, count in comp['composition'].items():
-                    element_counts[element] = element_counts.get(element, 0) + n * count
+                total_mass += n * masses[i]
+                for j, count in element_atoms[i]:
+                    element_counts[j] += n * count
         
             if total_mass < 1e-6: continue
 
             is_match = True
-            for element, target_fraction in mass_fractions.items():
-                elem_mass = element_counts.get(element, 0) * data_modules.ATOMIC_MASSES[element]
+            for j, target_fraction in enumerate(targets):
+                elem_mass = element_counts[j] * atomic_masses[j]
                 actual_fraction = (elem_mass / total_mass) * 100.0
-                # print(actual_fraction, target_fraction)
-                if abs(actual_fraction - target_fraction) > tolerance:
+                if abs(actual_fraction - target_fraction) > tolerances[j]:
                     is_match = False
                     break
         
             if is_match:
                 formula = {symbols[i]: n for i, n in enumerate(counts)}
-                solutions.append(formula)
+                context.emit(solutions, formula)
 
-        # 按元素种类数量和总原子数排序
-        solutions.sort(key=lambda f: (len(f), sum(f.values())))
-        return solutions
+    def assign_peaks(self,
+                     components_data: list[dict],
+                     target_masses: list[float],
+                     ppm: float,
+                     n_max: int,
+                     max_per_peak: Optional[int] = None,
+                     stop_check: Optional[Callable[[], bool]] = None,
+                     governor: Optional[ResourceGovernor] = None) -> list[list[peak_assignment.PeakAssignment]]:
+        """
+        为一组质谱峰批量归属化学式。
+        组分组合空间按质量升序只枚举一次，并与排序后的峰列表归并，
+        返回与target_masses一一对应的候选列表，每项为 (化学式, 计算质量, ppm误差)。
+        stop_check 和 governor 的含义与 solve_by_brute_force 相同。
+        """
+        components = self._prepare_components(components_data)
+        context = SolverContext(components, {}, stop_check=stop_check)
+        context.governor = governor
+        if governor is not None:
+            governor.start()
+        return peak_assignment.assign_peaks(context, target_masses, ppm, n_max, max_per_peak)
+
+    def analyze_robustness(self,
+                           components_data: list[dict],
+                           mass_fractions: dict[str, float],
+                           candidates: list,
+                           mode: str,
+                           std_devs: dict[str, float],
+                           tolerance: float,
+                           n_samples: int = 2000,
+                           seed: Optional[int] = None) -> list[robustness.RobustnessResult]:
+        """
+        对已得到的候选解做 Monte Carlo 稳健性分析。
+        candidates 为任一求解模式的返回值，mode 为 'general' 或 'unknown_element'；
+        std_devs 给出各元素质量分数的标准差(%)。返回 [(候选, 稳定率)]。
+        候选矩阵只计算一次，不会为每次采样重新求解。
+        """
+        components = self._prepare_components(components_data)
+        return robustness.analyze_robustness(components, mass_fractions, candidates, mode,
+                                             std_devs, tolerance, n_samples, seed)
+
+    def _search_general(self, comp_index: int,
+                        counts: list[int],
+                        total_mass: float,
+                        element_counts: list[int],
+                        constraint_sums: list[float],
+                        context: SolverContext,
+                        n_max: int,
+                        tolerance: float,
+                        solutions_list: list,
+                        atoms_left: Optional[int] = None):
+        """
+        通用模式的深度优先搜索，枚举顺序与 itertools.product 相同，
+        每一层只枚举 SolverContext.count_interval 给出的可行计数区间。
+        atoms_left不为None时（按复杂度枚举，各组分计数范围为[1, n_max]），剩余组分的计数之和恰为atoms_left。
+        """
+        if comp_index == context.n_components:
+            if total_mass < 1e-6 or not context.satisfies(constraint_sums):
+                return
+            for j, target_fraction in enumerate(context.targets):
+                elem_mass = element_counts[j] * context.atomic_masses[j]
+                actual_fraction = (elem_mass / total_mass) * 100.0
+                if abs(actual_fraction - target_fraction) > context.tolerances[j]:
+                    return
+            if context.reduction is not None:
+                # 约简搜索：展开回用户定义的组分，无法由原组分得到的组合跳过
+                formula = context.reduction.formula(counts)
+                if formula is None:
+                    return
+            else:
+                formula = {context.symbols[i]: n for i, n in enumerate(counts)}
+            context.emit(solutions_list, formula)
+            return
+
+        context.checkpoint()
+        comp_mass = context.masses[comp_index]
+        atoms = context.element_atoms[comp_index]
+        n_lo, n_hi = context.count_interval(comp_index, constraint_sums)
+        if atoms_left is not None:
+            after = context.n_components - comp_index - 1
+            n_lo = max(n_lo, atoms_left - after * n_max)
+            n_hi = min(n_hi, atoms_left - after)
+        for n in range(n_lo, n_hi + 1):
+            new_sums = context.add_constraint_counts(constraint_sums, comp_index, n)
+            new_counts = element_counts
+            if atoms:
+                new_counts = element_counts.copy()
+                for j, count in atoms:
+                    new_counts[j] += n * count
+            counts[comp_index] = n
+            self._search_general(comp_index + 1, counts, total_mass + n * comp_mass,
+                                 new_counts, new_sums, context, n_max, tolerance, solutions_list,
+                                 None if atoms_left is None else atoms_left - n)
+        counts[comp_index] = 0
 
     def _prepare_components(self, components_data: list[dict]) -> list[data_modules.Component]:
         """
@@ -173,27 +535,6 @@ class ChemicalCalculator:
             if item['symbol'] == '?':
                 continue
             mass_ , formula_ = utils.parse_formula(item['formula'])
-            ret.append(data_modules.Component(symbol=item['symbol'],mass= mass_, composition=formula_))
+            ret.append(data_modules.Component(symbol=item['symbol'],mass= mass_, composition=formula_,
+                                              charge=item.get('charge', 0)))
         return ret
-
-    def _calculate_elemental_mass_in_formula(self, formula: dict, known_components: list, target_element: str) -> float:
-        """
-        (新增的私有辅助函数)
-        计算一个假设的化学式中，某个指定元素的总质量。
-        """
-        total_element_mass = 0.0
-        
-        # 将 known_components 转换为字典以便快速查找
-        comp_map = {comp['symbol']: comp for comp in known_components}
-
-        for symbol, count in formula.items():
-            if symbol == '?': continue
-            
-            component = comp_map[symbol]
-            # 获取该组分的元素构成，并查找目标元素的数量
-            num_atoms_in_comp = component['composition'].get(target_element, 0)
-            
-            if num_atoms_in_comp > 0:
-                total_element_mass += count * num_atoms_in_comp * data_modules.ATOMIC_MASSES[target_element]
-        
-        return total_element_mass
\ No newline at end of file
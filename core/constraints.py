@@ -0,0 +1,254 @@
+"""
+化学规则约束：不饱和度(RDBE)范围、氮规则、电荷平衡以及分子量(质谱)约束。
+
+这些规则对组分计数都是线性的（氮规则为奇偶性），因此被编译为
+solver_context.LinearConstraint，在搜索过程中用部分和的上下界剪枝，
+而不是在得到全部结果之后再过滤。
+
+    RDBE = 1 + Σ n_a * (v_a - 2) / 2      (a 为原子，v_a 为其价态)
+    氮规则：偶电子分子的奇数价原子总数为偶数，等价于 RDBE 为整数
+    电荷平衡：Σ n_c * q_c = 0              (c 为组分，q_c 为其电荷)
+    分子量：  |Σ n_c * m_c - M| <= tol       (m_c 为组分式量)
+
+分子量约束的各项系数都为正，逐层求出的可行计数区间很窄，
+搜索只需遍历质量落在 M ± tol 附近的一层“薄壳”组合。
+
+质量分数本身也可以写成线性约束。元素 j 的分数窗口为 [L, U] 时，
+L <= 100 * A_j * E_j / M <= U 两边乘以总质量 M = Σ n_c * m_c 得到
+
+    Σ n_c * (100 * A_j * a_cj - L * m_c) >= 0
+    Σ n_c * (U * m_c - 100 * A_j * a_cj) >= 0
+
+给出各元素单独的公差或“差减法”元素时，这些窗口作为额外的剪枝约束，
+公差越小的元素剪去的分支越多。差减法元素的分数为 100 减去其余各元素，
+公差为其余各元素公差之和。
+"""
+from typing import Optional
+
+from core import data_modules
+from core.solver_context import LinearConstraint, SolverContext
+
+
+DEFAULT_MOLAR_MASS_TOLERANCE = 0.5
+
+# 与计算器中对未知元素原子质量的合理性检验范围一致
+UNKNOWN_MASS_RANGE = (1.0, 300.0)
+
+# 质量分数窗口约束只用于剪枝，两端各放宽一点，避免浮点误差剪掉恰在边界上的解
+FRACTION_WINDOW_SLACK = 1e-6
+
+
+def _valence(element: str) -> int:
+    if element not in data_modules.VALENCES:
+        raise ValueError(f"元素 '{element}' 没有价态数据，无法应用不饱和度或氮规则约束。")
+    return data_modules.VALENCES[element]
+
+
+def rdbe_contribution(composition: data_modules.Formula) -> float:
+    """一个组分对 RDBE 的贡献 Σ count * (v - 2) / 2。"""
+    return sum(count * (_valence(e) - 2) / 2 for e, count in composition.items())
+
+
+def odd_valence_atoms(composition: data_modules.Formula) -> int:
+    """一个组分中奇数价原子的个数。"""
+    return sum(count for e, count in composition.items() if _valence(e) % 2 == 1)
+
+
+def has_constraints(options: Optional[data_modules.Constraints]) -> bool:
+    if not options:
+        return False
+    return (options.get('rdbe_min') is not None or options.get('rdbe_max') is not None
+            or bool(options.get('nitrogen_rule')) or bool(options.get('charge_neutral'))
+            or options.get('molar_mass') is not None)
+
+
+def _uses_rdbe(options: data_modules.Constraints) -> bool:
+    return options.get('rdbe_min') is not None or options.get('rdbe_max') is not None
+
+
+def build_constraints(components: list[data_modules.Component],
+                      options: Optional[data_modules.Constraints]) -> list[LinearConstraint]:
+    """将约束选项编译为针对全部组分的线性约束（不含未知元素）。"""
+    constraints: list[LinearConstraint] = []
+    if not has_constraints(options):
+        return constraints
+    if _uses_rdbe(options):
+        rdbe_min = options.get('rdbe_min')
+        rdbe_max = options.get('rdbe_max')
+        constraints.append(LinearConstraint(
+            'rdbe',
+            [rdbe_contribution(comp['composition']) for comp in components],
+            lo=float('-inf') if rdbe_min is None else rdbe_min - 1,
+            hi=float('inf') if rdbe_max is None else rdbe_max - 1,
+        ))
+    if options.get('nitrogen_rule'):
+        constraints.append(LinearConstraint(
+            'parity', [odd_valence_atoms(comp['composition']) for comp in components], even=True
+        ))
+    if options.get('charge_neutral'):
+        constraints.append(LinearConstraint(
+            'charge', [comp.get('charge', 0) for comp in components], lo=0, hi=0
+        ))
+    if options.get('molar_mass') is not None:
+        target = options['molar_mass']
+        mass_tolerance = options.get('molar_mass_tolerance', DEFAULT_MOLAR_MASS_TOLERANCE)
+        constraints.append(LinearConstraint(
+            'mass', [comp['mass'] for comp in components], lo=target - mass_tolerance, hi=target + mass_tolerance,
+            unknown_coef=1.0
+        ))
+    return constraints
+
+
+def resolve_fractions(mass_fractions: dict[str, float], tolerance: float,
+                      element_tolerances: Optional[dict[str, float]] = None,
+                      remainder_element: Optional[str] = None,
+                      components: Optional[list[data_modules.Component]] = None
+                      ) -> tuple[dict[str, float], list[float], Optional[tuple[float, float]]]:
+    """
+    返回 (质量分数, 各列公差, 未知元素的差减分数)。
+    element_tolerances 覆盖个别元素的公差，其余元素使用tolerance。
+    remainder_element 为按差减法计算的元素：它的分数为100减去其余给定分数，
+    公差为其余各元素公差之和，作为新的一列加在最后；
+    为'?'时不加列，而是返回 (分数, 公差) 由单一未知元素模式单独检查。
+    给出 components 时，remainder_element 必须出现在某个组分中，否则它的分数恒为0，不可能有解。
+    """
+    element_tolerances = element_tolerances or {}
+    for element, tol in element_tolerances.items():
+        if element not in mass_fractions:
+            raise ValueError(f"元素 '{element}' 没有给出质量分数，不能单独设置公差")
+        if tol < 0:
+            raise ValueError(f"元素 '{element}' 的公差不能为负数")
+    fractions = dict(mass_fractions)
+    tolerances = [element_tolerances.get(element, tolerance) for element in fractions]
+    if not remainder_element:
+        return fractions, tolerances, None
+
+    if remainder_element in mass_fractions:
+        raise ValueError(f"元素 '{remainder_element}' 已给出质量分数，不能再按差减法计算")
+    if remainder_element != '?' and remainder_element not in data_modules.ELEMENTS:
+        raise ValueError(f"'{remainder_element}' 不是元素, 请输入正确的元素符号")
+    if (remainder_element != '?' and components is not None
+            and not any(remainder_element in comp['composition'] for comp in components)):
+        raise ValueError(f"元素 '{remainder_element}' 不在任何组分中，不能按差减法计算它的质量分数")
+    target = 100.0 - sum(mass_fractions.values())
+    if target <= 0:
+        raise ValueError("其余元素的质量分数之和已达到100%，无法按差减法计算")
+    remainder = (target, sum(tolerances))
+    if remainder_element == '?':
+        return fractions, tolerances, remainder
+    fractions[remainder_element] = target
+    tolerances.append(remainder[1])
+    return fractions, tolerances, None
+
+
+def fraction_constraints(context: SolverContext) -> list[LinearConstraint]:
+    """
+    把 context 中各元素的质量分数窗口 [t - tol, t + tol] 编译为线性约束 (用于剪枝)。
+    '?'列没有原子质量，跳过。unknown_coef 为未知原子质量在总质量中的系数。
+    """
+    constraints = []
+    for j, (target, tol) in enumerate(zip(context.targets, context.tolerances)):
+        if context.element_indices[j] < 0:
+            continue
+        element_mass = [0.0] * context.n_components
+        for i, atoms in enumerate(context.element_atoms):
+            for k, count in atoms:
+                if k == j:
+                    element_mass[i] = 100.0 * context.atomic_masses[j] * count
+        lower = target - tol - FRACTION_WINDOW_SLACK
+        upper = target + tol + FRACTION_WINDOW_SLACK
+        if lower > 0:
+            constraints.append(LinearConstraint(
+                'fraction_min', [e - lower * m for e, m in zip(element_mass, context.masses)],
+                lo=0.0, unknown_coef=-lower))
+        if upper < 100:
+            constraints.append(LinearConstraint(
+                'fraction_max', [upper * m - e for e, m in zip(element_mass, context.masses)],
+                lo=0.0, unknown_coef=upper))
+    return constraints
+
+
+def unknown_remainder_constraints(context: SolverContext, remainder: tuple[float, float]) -> list[LinearConstraint]:
+    """
+    未知元素按差减法给出分数 [L, U] 时的剪枝约束：
+    L <= 100 * n_? * A_? / (K + n_? * A_?) <= U，K 为已知组分总质量，整理得
+    -L * K + (100 - L) * n_? * A_? >= 0 和 U * K + (U - 100) * n_? * A_? >= 0。
+    """
+    target, tol = remainder
+    lower = target - tol - FRACTION_WINDOW_SLACK
+    upper = target + tol + FRACTION_WINDOW_SLACK
+    constraints = []
+    if lower > 0:
+        constraints.append(LinearConstraint(
+            'fraction_min', [-lower * m for m in context.masses], lo=0.0, unknown_coef=100.0 - lower))
+    if upper < 100:
+        constraints.append(LinearConstraint(
+            'fraction_max', [upper * m for m in context.masses], lo=0.0, unknown_coef=upper - 100.0))
+    return constraints
+
+
+def _candidate_valences(unknown_filter: Optional[str]) -> list[int]:
+    """未知元素可能取到的价态（仅限有价态数据、且符合金属/非金属过滤的元素）。"""
+    valences = []
+    for element, valence in data_modules.VALENCES.items():
+        if unknown_filter == 'metal' and element not in data_modules.METALS:
+            continue
+        if unknown_filter == 'nonmetal' and element not in data_modules.NONMETALS:
+            continue
+        valences.append(valence)
+    return valences
+
+
+def constraints_for_unknown(constraints: list[LinearConstraint], n_unknown: int,
+                            unknown_charge: int, unknown_filter: Optional[str]) -> list[LinearConstraint]:
+    """
+    单一未知元素模式下，把n_unknown个未知原子的贡献从约束中扣除，得到只针对已知组分的约束。
+    未知元素的价态在匹配前未知，RDBE按其可能的取值范围放宽，奇偶性留到匹配后再检查。
+    """
+    valences = _candidate_valences(unknown_filter) or [1]
+    ret = []
+    for constraint in constraints:
+        if constraint.name == 'rdbe':
+            ret.append(constraint.relaxed(n_unknown * (min(valences) - 2) / 2,
+                                          n_unknown * (max(valences) - 2) / 2))
+        elif constraint.name == 'parity':
+            ret.append(constraint.relaxed(0, 0))
+        elif constraint.unknown_coef:
+            # 分子量和质量分数约束：未知原子的总质量在 n_? * [1, 300] 内
+            a = n_unknown * constraint.unknown_coef * UNKNOWN_MASS_RANGE[0]
+            b = n_unknown * constraint.unknown_coef * UNKNOWN_MASS_RANGE[1]
+            ret.append(constraint.relaxed(min(a, b), max(a, b)))
+        else:
+            ret.append(constraint.shifted(n_unknown * unknown_charge))
+    return ret
+
+
+def accepts_unknown_element(context: SolverContext, sums: list[float],
+                            options: Optional[data_modules.Constraints],
+                            n_unknown: int, element: str, known_mass: float = 0.0) -> bool:
+    """
+    未知元素匹配到具体元素后，用其价态检查RDBE和氮规则，
+    并用其真实原子质量检查分子量。known_mass为已知组分的总质量。
+    """
+    if not has_constraints(options):
+        return True
+    if options.get('molar_mass') is not None:
+        mass_tolerance = options.get('molar_mass_tolerance', DEFAULT_MOLAR_MASS_TOLERANCE)
+        total_mass = known_mass + n_unknown * data_modules.ATOMIC_MASSES[element]
+        if abs(total_mass - options['molar_mass']) > mass_tolerance:
+            return False
+    needs_valence = _uses_rdbe(options) or options.get('nitrogen_rule')
+    if needs_valence and element not in data_modules.VALENCES:
+        return False
+    for s, constraint in zip(sums, context.constraints):
+        if constraint.name == 'rdbe':
+            rdbe = 1 + s + n_unknown * (data_modules.VALENCES[element] - 2) / 2
+            rdbe_min, rdbe_max = options.get('rdbe_min'), options.get('rdbe_max')
+            if rdbe_min is not None and rdbe < rdbe_min - 1e-9:
+                return False
+            if rdbe_max is not None and rdbe > rdbe_max + 1e-9:
+                return False
+        elif constraint.name == 'parity':
+            if (round(s) + n_unknown * (data_modules.VALENCES[element] % 2)) % 2 != 0:
+                return False
+    return True
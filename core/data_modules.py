@@ -1,30 +1,95 @@
-from typing import Dict, List, Tuple, TypedDict, Optional, Set
+import csv
+import os
+from types import MappingProxyType
+from typing import Dict, List, Tuple, TypedDict, Optional, Sequence, Set
 
-# 周期表数据
-METALS: Set[str] = {
-    'Li', 'Be', 'Na', 'Mg', 'Al', 'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn',
-    'Ga', 'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Ru', 'Rh', 'Pd', 'Ag', 'Cd', 'In', 'Sn', 'Sb', 'Cs', 'Ba',
-    'La', 'Ce', 'W', 'Pt', 'Au', 'Hg', 'Pb', 'Bi'
-}
+# 周期表数据：从随包附带的 elements.csv 读取，导入时构建一次
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'elements.csv')
 
-NONMETALS: Set[str] = {
-    'H', 'He', 'B', 'C', 'N', 'O', 'F', 'Ne', 'Si', 'P', 'S', 'Cl', 'Ar', 'As', 'Se', 'Br', 'Kr', 'Te', 'I', 'Xe'
-}
+# 元素类别位掩码
+CLASS_METAL = 1
+CLASS_NONMETAL = 2
+CLASS_ALL = CLASS_METAL | CLASS_NONMETAL
+# 没有稳定同位素、也没有原生天然丰度的元素 (Tc, Pm, Po 及更重的元素，Th 和 U 除外)，
+# 单一未知元素模式默认不匹配这些元素
+CLASS_SYNTHETIC = 4
+_CLASS_BITS = {'metal': CLASS_METAL, 'nonmetal': CLASS_NONMETAL}
+
+
+class ElementTable:
+    """
+    不可变的元素表，元素按原子序数排列，下标即为元素在表中的整数编号。
+
+    - symbols[k]         第k个元素的符号
+    - masses[k]          第k个元素的原子质量
+    - classes[k]         第k个元素的类别位掩码 (CLASS_METAL / CLASS_NONMETAL，非天然元素另加 CLASS_SYNTHETIC)
+    - index              符号 -> 下标 的只读映射
+    - sorted_masses      按原子质量升序排列的质量，与 sorted_indices 一一对应，供二分查找
+    """
+    __slots__ = ('symbols', 'masses', 'classes', 'index', 'sorted_masses', 'sorted_indices')
+
+    def __init__(self, symbols: Sequence[str], masses: Sequence[float], classes: Sequence[int]):
+        if not (len(symbols) == len(masses) == len(classes)):
+            raise ValueError("元素表各列长度不一致")
+        order = sorted(range(len(masses)), key=lambda k: (masses[k], k))
+        values = {
+            'symbols': tuple(symbols),
+            'masses': tuple(masses),
+            'classes': tuple(classes),
+            'index': MappingProxyType({symbol: k for k, symbol in enumerate(symbols)}),
+            'sorted_masses': tuple(masses[k] for k in order),
+            'sorted_indices': tuple(order),
+        }
+        if len(values['index']) != len(symbols):
+            raise ValueError("元素表中有重复的元素符号")
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ElementTable 是只读的")
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
 
-ATOMIC_MASSES: Dict[str, float] = {
-    'H': 1.008, 'He': 4.003, 'Li': 6.94, 'Be': 9.012, 'B': 10.81, 'C': 12.011,
-    'N': 14.007, 'O': 15.999, 'F': 18.998, 'Ne': 20.180, 'Na': 22.990,
-    'Mg': 24.305, 'Al': 26.982, 'Si': 28.085, 'P': 30.974, 'S': 32.06,
-    'Cl': 35.45, 'Ar': 39.948, 'K': 39.098, 'Ca': 40.078, 'Sc': 44.956,
-    'Ti': 47.867, 'V': 50.942, 'Cr': 51.996, 'Mn': 54.938, 'Fe': 55.845,
-    'Co': 58.933, 'Ni': 58.693, 'Cu': 63.546, 'Zn': 65.38, 'Ga': 69.723,
-    'Ge': 72.63, 'As': 74.922, 'Se': 78.971, 'Br': 79.904, 'Kr': 83.798,
-    'Rb': 85.468, 'Sr': 87.62, 'Y': 88.906, 'Zr': 91.224, 'Nb': 92.906,
-    'Mo': 95.96, 'Ru': 101.07, 'Rh': 102.906, 'Pd': 106.42, 'Ag': 107.868,
-    'Cd': 112.41, 'In': 114.818, 'Sn': 118.71, 'Sb': 121.760, 'Te': 127.60,
-    'I': 126.904, 'Xe': 131.29, 'Cs': 132.905, 'Ba': 137.327, 'La': 138.905,
-    'Ce': 140.116, 'W': 183.84, 'Pt': 195.084, 'Au': 196.967, 'Hg': 200.59,
-    'Pb': 207.2, 'Bi': 208.980
+    def symbols_with(self, class_mask: int) -> Set[str]:
+        """类别与class_mask有交集的全部元素符号。"""
+        return {s for s, c in zip(self.symbols, self.classes) if c & class_mask}
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'ElementTable':
+        """
+        读取 number,symbol,mass,class,natural 格式的CSV，行按原子序数排序。
+        natural 为0的元素（非天然元素）在类别上加 CLASS_SYNTHETIC。
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = sorted(csv.DictReader(f), key=lambda row: int(row['number']))
+        try:
+            classes = [_CLASS_BITS[row['class']] | (0 if int(row['natural']) else CLASS_SYNTHETIC)
+                       for row in rows]
+        except KeyError as e:
+            raise ValueError(f"元素表中有未知的元素类别 {e}")
+        return cls([row['symbol'] for row in rows], [float(row['mass']) for row in rows], classes)
+
+
+ELEMENTS: ElementTable = ElementTable.from_csv(ELEMENTS_FILE)
+
+# 以下为兼容原有代码的派生视图
+METALS: Set[str] = ELEMENTS.symbols_with(CLASS_METAL)
+
+NONMETALS: Set[str] = ELEMENTS.symbols_with(CLASS_NONMETAL)
+
+ATOMIC_MASSES: Dict[str, float] = dict(zip(ELEMENTS.symbols, ELEMENTS.masses))
+
+# 计算不饱和度(RDBE)时使用的常见价态
+VALENCES: Dict[str, int] = {
+    'H': 1, 'Li': 1, 'Na': 1, 'K': 1, 'Rb': 1, 'Cs': 1,
+    'F': 1, 'Cl': 1, 'Br': 1, 'I': 1,
+    'O': 2, 'S': 2, 'Se': 2, 'Te': 2,
+    'B': 3, 'Al': 3, 'N': 3, 'P': 3, 'As': 3, 'Sb': 3,
+    'C': 4, 'Si': 4, 'Ge': 4, 'Sn': 4,
 }
 
 Formula = Dict[str, int]   #封装化学式的构成
@@ -34,9 +99,27 @@ class Component(TypedDict):
     symbol: str
     mass: float
     composition: Formula
+    charge: int   # 组分电荷，如 SO4 为 -2
 
 class SolutionUnknown(TypedDict):
     """封装推测位置元素模式解的结构"""
     ans : Formula
     unknow_mass : float   #'?'元素的相对质量
-    unknow_element :str   #'?'元素的符号
\ No newline at end of file
+    unknow_element :str   #'?'元素的符号
+
+class ReferenceHit(TypedDict):
+    """参考化合物库中与实测质量分数吻合的化合物"""
+    name: str
+    formula: str
+    mass: float                    # 摩尔质量
+    fractions: Dict[str, float]    # 各实测元素在该化合物中的质量分数(%)
+    deviation: float               # 各实测元素偏差绝对值的最大值(%)
+
+class Constraints(TypedDict, total=False):
+    """可选的化学规则约束，在搜索中用于剪枝"""
+    rdbe_min: float          # 不饱和度(环+双键数)下限
+    rdbe_max: float          # 不饱和度上限
+    nitrogen_rule: bool      # 氮规则：要求为偶电子分子，即不饱和度为整数
+    charge_neutral: bool     # 要求各组分电荷之和为0
+    molar_mass: float        # 已知的分子量(如质谱给出)，作为枚举时的硬性上下界
+    molar_mass_tolerance: float   # 分子量公差(g/mol)
@@ -0,0 +1,118 @@
+"""
+计算资源限制：在搜索过程中跟踪已找到的解的数量、进程常驻内存 (RSS) 和计算线程的 CPU 时间。
+
+任一项超过上限时，在下一个检查点抛出 ResourceLimitReached，求解方法捕获它后
+停止搜索，返回到此为止找到的解（同样排序），停止原因记录在 stop_reason / stop_message 中。
+与 stop_check 的取消不同，达到资源上限不是错误，调用方拿到的是部分结果。
+
+    governor = ResourceGovernor(max_results=10000, max_memory_mb=2048, max_cpu_seconds=60)
+    results = calculator.solve_by_brute_force(..., governor=governor)
+    if governor.stop_reason:
+        print(governor.stop_message)
+
+一个 ResourceGovernor 对象同一时间只用于一次计算；每次求解开始时会被重置。
+"""
+import os
+import sys
+import time
+from typing import Optional
+
+# stop_reason 的取值
+LIMIT_RESULTS = 'max_results'
+LIMIT_MEMORY = 'max_memory'
+LIMIT_CPU = 'max_cpu_time'
+LIMIT_REQUESTED = 'limit'      # 求解方法的 limit 参数：只需要前N个结果，不是资源问题
+
+
+class ResourceLimitReached(Exception):
+    """计算达到了 ResourceGovernor 的某项上限。"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def current_rss_mb() -> float:
+    """
+    当前进程的常驻内存 (MB)；没有 /proc 时退回到历史峰值，
+    两者都无法取得时（如 Windows）返回0.0，即内存上限不起作用。
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss 在 macOS 上以字节为单位，在 Linux 上以KiB为单位
+    scale = 1.0 if sys.platform == 'darwin' else 1024.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024.0 * 1024.0)
+
+
+class ResourceGovernor:
+    """
+    计算资源上限，各项为None时不限制：
+
+    - max_results       最多保留的解的数量
+    - max_memory_mb     进程常驻内存上限 (MB)
+    - max_cpu_seconds   计算线程的CPU时间上限 (秒)
+    """
+
+    def __init__(self, max_results: Optional[int] = None,
+                 max_memory_mb: Optional[float] = None,
+                 max_cpu_seconds: Optional[float] = None):
+        if max_results is not None and max_results < 1:
+            raise ValueError("结果数量上限必须为正整数")
+        if max_memory_mb is not None and max_memory_mb <= 0:
+            raise ValueError("内存上限必须为正数")
+        if max_cpu_seconds is not None and max_cpu_seconds <= 0:
+            raise ValueError("CPU时间上限必须为正数")
+        self.max_results = max_results
+        self.max_memory_mb = max_memory_mb
+        self.max_cpu_seconds = max_cpu_seconds
+        self.stop_reason: Optional[str] = None
+        self.stop_message: Optional[str] = None
+        self._cpu_start = 0.0
+
+    @classmethod
+    def from_params(cls, params: dict) -> Optional['ResourceGovernor']:
+        """由计算参数中的 max_results / max_memory_mb / max_cpu_seconds 创建，都未给出时返回None。"""
+        limits = {key: params.get(key) for key in ('max_results', 'max_memory_mb', 'max_cpu_seconds')}
+        if all(value is None for value in limits.values()):
+            return None
+        return cls(**limits)
+
+    def start(self):
+        """在计算线程中、搜索开始前调用：清除上次的停止原因并开始计时。"""
+        self.stop_reason = None
+        self.stop_message = None
+        self._cpu_start = time.thread_time()
+
+    def _stop(self, reason: str, message: str):
+        self.stop_reason = reason
+        self.stop_message = message
+        raise ResourceLimitReached(reason, message)
+
+    def check_results(self, n_found: int):
+        """
+        在记录一个新的解之前调用，n_found为已保留的解的数量；
+        已保留的解达到上限（再记录一个就会超过）时抛出 ResourceLimitReached。
+        因此恰好有 max_results 个解的搜索能完整结束，不会被报告为截断。
+        """
+        if self.max_results is not None and n_found >= self.max_results:
+            self._stop(LIMIT_RESULTS, f"已找到 {n_found} 个解，达到结果数量上限，只显示这部分结果。")
+
+    def check_resources(self):
+        """检查CPU时间和内存，超过上限时抛出 ResourceLimitReached。"""
+        if self.max_cpu_seconds is not None:
+            elapsed = time.thread_time() - self._cpu_start
+            if elapsed > self.max_cpu_seconds:
+                self._stop(LIMIT_CPU, f"计算已用CPU时间 {elapsed:.1f} 秒，超过上限 "
+                                      f"{self.max_cpu_seconds:g} 秒，只显示已找到的部分结果。")
+        if self.max_memory_mb is not None:
+            rss = current_rss_mb()
+            if rss > self.max_memory_mb:
+                self._stop(LIMIT_MEMORY, f"进程内存 {rss:.0f} MB 超过上限 "
+                                         f"{self.max_memory_mb:g} MB，只显示已找到的部分结果。")
@@ -0,0 +1,106 @@
+"""
+通用模式的折半(meet-in-the-middle)搜索引擎。
+
+把组分分成前后两半，分别枚举每一半的全部计数组合 (各 n_max^(p/2) 个)，
+再按质量分数约束做有序匹配。对某个给定元素 j，记一半组合的
+元素质量 e = 100 * A_j * E_j、总质量 m，目标 t、公差 tol，则
+
+    t - tol <= 100 * (e_L + e_R) / (m_L + m_R) <= t + tol
+
+等价于两个线性不等式
+
+    g_L + g_R >= 0,  g = e - (t - tol) * m
+    h_L + h_R >= 0,  h = (t + tol) * m - e
+
+又因 g + h = 2 * tol * m，对每个元素，后一半只需在按该元素 g 排序的数组中取
+g_R ∈ [-g_L, h_L + 2 * tol * max(m_R)] 这一段。每个元素都给出这样一段（各自二分查找），
+解必须同时落在所有段中，因此只需扫描其中最短的一段；任一段为空时直接跳过该前半组合。
+候选再用与 solve_by_brute_force 完全相同的算式逐一验证，
+因此结果与逐一枚举完全一致。解在搜索结束后才按枚举顺序逐个交给 on_solution。
+"""
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from core.governor import ResourceLimitReached
+from core.solver_context import SolverContext
+
+_EPS = 1e-7
+
+
+def _enumerate_half(context: SolverContext, indices: range, n_max: int, lows: list[float]):
+    """
+    按 itertools.product 的顺序枚举一半组分的全部计数组合，返回
+    (计数元组列表, 总质量列表, 各元素的g值列表)；lows[j] 为元素j的质量分数下限 t - tol。
+    逐个组分做外积展开，总质量的求和顺序与逐一枚举相同。
+    """
+    counts_list = [()]
+    masses = [0.0]
+    element_counts = [[0] for _ in range(context.n_elements)]
+    values = range(1, n_max + 1)
+    for i in indices:
+        context.checkpoint(len(counts_list) * n_max)
+        mass_i = context.masses[i]
+        counts_list = [counts + (n,) for counts in counts_list for n in values]
+        masses = [m + n * mass_i for m in masses for n in values]
+        for j, count in context.element_atoms[i]:
+            element_counts[j] = [e + n * count for e in element_counts[j] for n in values]
+        for j in range(context.n_elements):
+            if len(element_counts[j]) < len(masses):
+                element_counts[j] = [e for e in element_counts[j] for _ in values]
+    g_columns = []
+    for j, c_lo in enumerate(lows):
+        scale = 100.0 * context.atomic_masses[j]
+        g_columns.append([scale * e - c_lo * m for e, m in zip(element_counts[j], masses)])
+    return counts_list, masses, g_columns
+
+
+def solve_meet_in_the_middle(context: SolverContext, n_max: int, tolerance: float) -> Optional[list[tuple]]:
+    """
+    返回所有满足质量分数的计数元组，顺序与 itertools.product 的枚举顺序相同。
+    每个给定质量分数的元素都参与匹配，取候选最少的元素扫描，其余条件在验证时检查。
+    匹配阶段达到资源上限时返回已找到的部分结果。
+    没有组分或没有给定质量分数的元素时无法折半匹配，返回 None，由调用方回退到逐一枚举。
+    """
+    p = context.n_components
+    if p == 0 or context.n_elements == 0:
+        return None
+    tolerances = context.tolerances or [tolerance] * context.n_elements
+    lows = [t - tol for t, tol in zip(context.targets, tolerances)]
+    widths = [2.0 * tol for tol in tolerances]      # c_hi - c_lo
+
+    half = p // 2
+    left_counts, left_masses, left_g = _enumerate_half(context, range(0, half), n_max, lows)
+    right_counts, right_masses, right_g = _enumerate_half(context, range(half, p), n_max, lows)
+    max_m_right = max(right_masses)
+    # 每个元素一份按 g 排序的下标表
+    orders = []
+    for j, g_column in enumerate(right_g):
+        order = sorted(range(len(g_column)), key=g_column.__getitem__)
+        orders.append((order, [g_column[k] for k in order], widths[j] * max_m_right))
+
+    found = []
+    try:
+        for index, counts_left in enumerate(left_counts):
+            context.checkpoint()
+            m_left = left_masses[index]
+            best = None
+            for j, (order, keys, band_width) in enumerate(orders):
+                g = left_g[j][index]
+                h = widths[j] * m_left - g
+                slack = _EPS * (abs(g) + abs(h) + band_width + 1.0)
+                start = bisect_left(keys, -g - slack)
+                stop = bisect_right(keys, h + band_width + slack)
+                if best is None or stop - start < best[2] - best[1]:
+                    best = (order, start, stop)
+                    if start >= stop:
+                        break
+            order, start, stop = best
+            for k in order[start:stop]:
+                counts = counts_left + right_counts[k]
+                if context.matches(counts, tolerance):
+                    context.check_results(len(found))
+                    found.append(counts)
+    except ResourceLimitReached:
+        pass
+    found.sort()
+    return found
@@ -0,0 +1,82 @@
+"""
+通用模式的增量(里程表)枚举引擎。
+
+逐一枚举对 itertools.product 给出的每个计数组合都从头计算总质量和各元素原子数，
+代价为 O(p × 元素数)。相邻的两个组合通常只有最后一个组分的计数不同，
+因此这里按与 itertools.product 相同的里程表顺序枚举，并为每一层保存前缀：
+
+    prefix_mass[i]      前i个组分的质量和
+    prefix_counts[i]    前i个组分贡献的各给定元素原子数
+
+最后一个组分在最内层循环中直接加到前缀上；第i位进位时只重算第i层之后的前缀，
+平均每步只更新 O(1) 层。前缀和的求和顺序与逐一枚举完全相同
+(((0 + n_0*m_0) + n_1*m_1) + ...)，原子数为整数，因此浮点结果、解和枚举顺序都与逐一枚举一致。
+
+（没有采用格雷码顺序：它改变了枚举顺序，且总质量需要加减交替地更新，
+浮点结果会与逐一枚举有细微差别。）
+"""
+from typing import Iterator
+
+from core.solver_context import SolverContext
+
+
+def iter_odometer(context: SolverContext, n_max: int) -> Iterator[tuple]:
+    """按 itertools.product(range(1, n_max + 1), repeat=p) 的顺序产出满足质量分数的计数元组。"""
+    p = context.n_components
+    if p == 0:
+        return
+    n_elements = context.n_elements
+    masses = context.masses
+    element_atoms = context.element_atoms
+    atomic_masses = context.atomic_masses
+    checks = list(zip(range(n_elements), context.targets, context.tolerances))
+    # 最后一个组分在各元素上的原子数（稠密），最内层循环直接使用
+    last_mass = masses[p - 1]
+    last_atoms = [0] * n_elements
+    for j, count in element_atoms[p - 1]:
+        last_atoms[j] = count
+
+    counts = [1] * p
+    prefix_mass = [0.0] * p
+    prefix_counts = [[0] * n_elements for _ in range(p)]
+
+    def refresh(start: int):
+        """重算第start层之后的前缀（第start个组分的计数刚刚改变）。"""
+        for k in range(start, p - 1):
+            n = counts[k]
+            prefix_mass[k + 1] = prefix_mass[k] + n * masses[k]
+            atoms = element_atoms[k]
+            if atoms:
+                row = prefix_counts[k].copy()
+                for j, count in atoms:
+                    row[j] += n * count
+                prefix_counts[k + 1] = row
+            else:
+                prefix_counts[k + 1] = prefix_counts[k]
+
+    refresh(0)
+    while True:
+        base_mass = prefix_mass[p - 1]
+        base_counts = prefix_counts[p - 1]
+        for n in range(1, n_max + 1):
+            context.checkpoint()
+            total_mass = base_mass + n * last_mass
+            if total_mass < 1e-6:
+                continue
+            for j, target_fraction, tol in checks:
+                elem_mass = (base_counts[j] + n * last_atoms[j]) * atomic_masses[j]
+                if abs((elem_mass / total_mass) * 100.0 - target_fraction) > tol:
+                    break
+            else:
+                counts[p - 1] = n
+                yield tuple(counts)
+
+        # 进位：从倒数第二个组分开始，找到第一个还能加一的位置
+        i = p - 2
+        while i >= 0 and counts[i] == n_max:
+            counts[i] = 1
+            i -= 1
+        if i < 0:
+            return
+        counts[i] += 1
+        refresh(i)
@@ -0,0 +1,101 @@
+"""
+质谱峰列表的批量化学式归属。
+
+把组分组合空间按总质量从小到大的顺序只枚举一次，同时与排好序的峰列表
+做归并连接 (merge join)，一次遍历即可为所有峰找到 ppm 公差内的候选化学式，
+而不必对每个峰分别运行一次计算器。
+
+按质量升序枚举使用最小堆：每个计数向量只由“把最后一次增加的组分下标
+及其之后的某个组分计数加一”这一种方式生成，因此每个组合恰好出现一次；
+组分质量均为正数，出堆顺序即为质量升序。超过最大峰上界的组合不再入堆。
+
+每次出堆都经过 context.checkpoint()，因此 stop_check 和 governor 的CPU时间、内存上限
+与其他引擎一样生效；结果数量上限按所有峰的候选总数计。达到资源上限时返回已归属的部分结果，
+由于按质量升序枚举，每个峰已有的候选都是质量最小的那些。
+"""
+import heapq
+from typing import Optional
+
+from core import data_modules
+from core.governor import ResourceLimitReached
+from core.solver_context import SolverContext
+
+PeakAssignment = tuple[data_modules.Formula, float, float]   # (化学式, 计算质量, ppm误差)
+
+
+def _peak_windows(target_masses: list[float], ppm: float) -> list[tuple[float, float, float, int]]:
+    """返回按质量排序的 (下界, 上界, 目标质量, 原下标) 列表。"""
+    windows = []
+    for k, mass in enumerate(target_masses):
+        delta = mass * ppm * 1e-6
+        windows.append((mass - delta, mass + delta, mass, k))
+    windows.sort()
+    return windows
+
+
+def assign_peaks(context: SolverContext,
+                 target_masses: list[float],
+                 ppm: float,
+                 n_max: int,
+                 max_per_peak: Optional[int] = None) -> list[list[PeakAssignment]]:
+    """
+    为每个目标质量返回在 ppm 公差内的候选化学式列表，顺序与 target_masses 一致，
+    每个峰的候选按计算质量升序排列。组分计数范围为 0..n_max（至少有一个组分）。
+    max_per_peak 给出时，每个峰最多保留这么多个候选（质量最小的优先）。
+    context 只用到组分符号、质量和检查点（不需要质量分数）。
+    """
+    results: list[list[PeakAssignment]] = [[] for _ in target_masses]
+    if not target_masses or not context.n_components:
+        return results
+    if ppm < 0:
+        raise ValueError("ppm公差不能为负数")
+    symbols = context.symbols
+    masses = context.masses
+    for symbol, mass in zip(symbols, masses):
+        if mass <= 0:
+            raise ValueError(f"组分 '{symbol}' 的质量必须为正数")
+
+    windows = _peak_windows(target_masses, ppm)
+    mass_limit = max(upper for _, upper, _, _ in windows)
+    p = context.n_components
+
+    # 堆元素: (总质量, 计数元组, 最后一次增加的组分下标)
+    zero = (0,) * p
+    heap = []
+    for j in range(p):
+        if masses[j] <= mass_limit and n_max >= 1:
+            counts = zero[:j] + (1,) + zero[j + 1:]
+            heapq.heappush(heap, (masses[j], counts, j))
+
+    first_open = 0   # 第一个上界还未被越过的峰
+    n_assigned = 0
+    try:
+        while heap:
+            context.checkpoint()
+            mass, counts, last = heapq.heappop(heap)
+
+            # 归并：跳过上界已小于当前质量的峰，再检查下界不超过当前质量的峰
+            while first_open < len(windows) and windows[first_open][1] < mass:
+                first_open += 1
+            if first_open == len(windows):
+                break
+            k = first_open
+            while k < len(windows) and windows[k][0] <= mass:
+                lower, upper, target, index = windows[k]
+                if mass <= upper and (max_per_peak is None or len(results[index]) < max_per_peak):
+                    context.check_results(n_assigned)
+                    formula = {symbols[i]: n for i, n in enumerate(counts) if n > 0}
+                    results[index].append((formula, mass, (mass - target) / target * 1e6))
+                    n_assigned += 1
+                k += 1
+
+            for j in range(last, p):
+                if counts[j] >= n_max:
+                    continue
+                new_mass = mass + masses[j]
+                if new_mass > mass_limit:
+                    continue
+                heapq.heappush(heap, (new_mass, counts[:j] + (counts[j] + 1,) + counts[j + 1:], j))
+    except ResourceLimitReached:
+        pass    # 返回已归属的部分结果，原因记录在 governor 中
+    return results
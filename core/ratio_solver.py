@@ -0,0 +1,99 @@
+"""
+比例法求解：所有组分都是单个元素、且每个元素都给出了质量分数时，
+不做全量枚举，而是像手算实验式一样由原子数之比求解。
+
+元素 i 的原子数满足 n_i = w_i * M / A_i (w_i 为质量分数，M 为总质量)，因此
+
+    n_i / n_b = (w_i / A_i) / (w_b / A_b)
+
+把每个质量分数的公差 [t - tol, t + tol] 代入，得到各元素相对于基准元素 b 的
+原子数比值区间。对每个基准计数 n_b，只需枚举落在 n_b * 区间 内的整数，
+候选组合再用与 solve_by_brute_force 相同的算式验证，结果与逐一枚举完全一致。
+不满足上述条件时 (element_columns 返回 None)，solve_by_brute_force 回退到逐一枚举。
+解在搜索结束后才按枚举顺序逐个交给 on_solution。
+"""
+import math
+from itertools import product
+from typing import Optional
+
+from core.governor import ResourceLimitReached
+from core.solver_context import SolverContext
+
+_EPS = 1e-9
+
+
+def element_columns(context: SolverContext) -> Optional[list[int]]:
+    """
+    如果每个组分都恰好是一个原子的单质、元素互不相同且都给出了质量分数，
+    返回各组分对应的质量分数列下标；否则返回None，表示不能使用比例法。
+    """
+    if context.n_components == 0 or context.n_elements != context.n_components:
+        return None
+    columns = []
+    for atoms in context.element_atoms:
+        if len(atoms) != 1 or atoms[0][1] != 1:
+            return None
+        columns.append(atoms[0][0])
+    if len(set(columns)) != len(columns):
+        return None
+    # 组分式量必须等于对应元素的原子质量（排除含有未给出分数元素的组分）
+    for i, j in enumerate(columns):
+        if abs(context.masses[i] - context.atomic_masses[j]) > 1e-9:
+            return None
+    return columns
+
+
+def _ratio_intervals(context: SolverContext, columns: list[int], tolerance: float,
+                     base: int) -> list[tuple[float, float]]:
+    """各组分原子数相对于基准组分原子数的比值区间。"""
+    tolerances = context.tolerances or [tolerance] * context.n_elements
+    a_b = context.atomic_masses[columns[base]]
+    w_b_lo = context.targets[columns[base]] - tolerances[columns[base]]
+    w_b_hi = context.targets[columns[base]] + tolerances[columns[base]]
+    intervals = []
+    for i, j in enumerate(columns):
+        if i == base:
+            intervals.append((1.0, 1.0))
+            continue
+        a_i = context.atomic_masses[j]
+        w_lo = max(context.targets[j] - tolerances[j], 0.0)
+        w_hi = context.targets[j] + tolerances[j]
+        intervals.append(((w_lo / a_i) / (w_b_hi / a_b), (w_hi / a_i) / (w_b_lo / a_b)))
+    return intervals
+
+
+def solve_by_ratios(context: SolverContext, columns: list[int], n_max: int,
+                    tolerance: float) -> Optional[list[tuple]]:
+    """
+    返回所有满足质量分数的计数元组（按 itertools.product 的顺序），
+    没有可用的基准元素（所有分数都不大于公差）时返回None。
+    达到资源上限时返回已找到的部分结果。
+    """
+    # 以分数下限最大的元素为基准，它的比值区间最窄
+    tolerances = context.tolerances or [tolerance] * context.n_elements
+    base = max(range(len(columns)), key=lambda i: context.targets[columns[i]] - tolerances[columns[i]])
+    if context.targets[columns[base]] - tolerances[columns[base]] <= 0:
+        return None
+    intervals = _ratio_intervals(context, columns, tolerance, base)
+
+    found = []
+    try:
+        for n_base in range(1, n_max + 1):
+            ranges = []
+            for lo_ratio, hi_ratio in intervals:
+                lo = max(1, math.ceil(n_base * lo_ratio - _EPS))
+                hi = min(n_max, math.floor(n_base * hi_ratio + _EPS))
+                if lo > hi:
+                    break
+                ranges.append(range(lo, hi + 1))
+            else:
+                ranges[base] = range(n_base, n_base + 1)
+                for counts in product(*ranges):
+                    context.checkpoint()
+                    if context.matches(counts, tolerance):
+                        context.check_results(len(found))
+                        found.append(counts)
+    except ResourceLimitReached:
+        pass
+    found.sort()
+    return found
@@ -0,0 +1,300 @@
+"""
+组分集合约简：检测组成重复或线性相关的组分，只在一组基组分上搜索，
+再把结果展开回用户定义的组分符号。
+
+组分的“向量”为其元素组成加上电荷。若某组分的向量等于其他组分向量的
+非负整数组合（如 OH = O + H，或同一原子团以两个符号定义），它就是相关组分：
+
+    v_d = Σ_k a_dk * v_k
+
+用户计数 n 对应的基组分计数为 N_k = n_k + Σ_d a_dk * n_d，化学式的元素组成、
+质量、电荷以及各线性约束都只取决于 N，因此只需在基组分上搜索，
+N_k 的范围为 [lo_k + Σ_d a_dk * lo_d, hi_k + Σ_d a_dk * hi_d]。
+
+搜索得到的 N 还要检查能否由范围内的用户计数得到；能得到时，取相关组分计数
+字典序最小的一种分解作为输出。
+
+基组分之间还可能只有有理系数（可以为负）的线性相关，如 2·CH3 + C = 3·CH2，
+此时不能再缩小搜索空间，但同一组成仍会由不同的 N 得到。对基组分的
+(元素 + 电荷) × 组分 矩阵做有理数消元，主元列以外的基组分为“自由组分”，
+每个自由组分都可以由主元组分表示：v_f = Σ_p c_pf * v_p。改变自由组分的计数并相应
+调整主元组分的计数，组成不变：
+
+    N'_p = N_p + Σ_f c_pf * (N_f - N'_f)
+
+同一组成的全部 N 中，只输出自由组分计数字典序最小、且 N' 为范围内的整数并能展开的那一个。
+质量分数、质量和各约束都只取决于组成，这个代表本身也一定在搜索结果中，
+因此组成相同的多个化学式只输出一次。
+"""
+from fractions import Fraction
+from math import lcm
+from typing import Optional
+
+from core import data_modules
+
+# 把一个组分表示为其他组分的组合时，深度优先搜索最多访问的节点数
+_MAX_EXPRESS_NODES = 10000
+
+
+def _express(target: data_modules.Formula, target_charge: int,
+             candidates: list[tuple[int, data_modules.Formula, int]]) -> Optional[list[tuple[int, int]]]:
+    """
+    把target表示为候选组分的非负整数组合，返回 [(候选下标, 系数)]，找不到时返回None。
+    candidates 中每项为 (下标, 元素组成, 电荷)，且元素都包含在target中。
+    """
+    budget = [_MAX_EXPRESS_NODES]
+    chosen: list[tuple[int, int]] = []
+
+    def search(k: int, remaining: dict[str, int], charge: int) -> bool:
+        budget[0] -= 1
+        if budget[0] < 0:
+            return False
+        if not any(remaining.values()):
+            return charge == 0
+        if k == len(candidates):
+            return False
+        index, composition, comp_charge = candidates[k]
+        max_a = min(remaining[e] // n for e, n in composition.items())
+        for a in range(max_a, -1, -1):
+            rest = remaining
+            if a:
+                rest = dict(remaining)
+                for e, n in composition.items():
+                    rest[e] -= a * n
+                chosen.append((index, a))
+            if search(k + 1, rest, charge - a * comp_charge):
+                return True
+            if a:
+                chosen.pop()
+        return False
+
+    if search(0, dict(target), target_charge):
+        return list(chosen)
+    return None
+
+
+class ComponentBasis:
+    """
+    约简结果：
+
+    - basis             基组分在原组分列表中的下标
+    - dependents        相关组分，形如 (原下标, ((基组分位置, 系数), ...))
+    - basis_ranges      各基组分计数 N_k 的范围
+    - free_moves        基组分间的有理相关：形如 (自由组分位置, ((主元组分位置, L * c_pf), ...))，
+                        系数都乘以公分母 free_scale (L) 化为整数
+    """
+
+    def __init__(self, components: list[data_modules.Component], count_ranges: list[tuple[int, int]],
+                 basis: list[int], dependents: list[tuple[int, tuple[tuple[int, int], ...]]],
+                 free_moves: tuple = (), free_scale: int = 1):
+        self.symbols = [comp['symbol'] for comp in components]
+        self.free_moves = free_moves
+        self.free_scale = free_scale
+        self.count_ranges = count_ranges
+        self.basis = basis
+        self.dependents = dependents
+        self.basis_components = [components[i] for i in basis]
+        self.basis_ranges = []
+        for k, i in enumerate(basis):
+            lo, hi = count_ranges[i]
+            for d, coefs in dependents:
+                for pos, a in coefs:
+                    if pos == k:
+                        lo += a * count_ranges[d][0]
+                        hi += a * count_ranges[d][1]
+            self.basis_ranges.append((lo, hi))
+        # suffix_max[t][k]：第t个及之后的相关组分最多能占用基组分k的计数
+        self._suffix_max = [[0] * len(basis) for _ in range(len(dependents) + 1)]
+        for t in range(len(dependents) - 1, -1, -1):
+            row = list(self._suffix_max[t + 1])
+            d, coefs = dependents[t]
+            for pos, a in coefs:
+                row[pos] += a * count_ranges[d][1]
+            self._suffix_max[t] = row
+
+    def expand(self, basis_counts: list[int]) -> Optional[list[int]]:
+        """
+        把基组分计数展开为原组分计数（相关组分计数取字典序最小的可行分解），
+        范围内的原组分计数无法得到该组合时返回None。
+        """
+        residual = list(basis_counts)
+        dependent_counts = [0] * len(self.dependents)
+
+        def search(t: int) -> bool:
+            if t == len(self.dependents):
+                return all(self.count_ranges[i][0] <= residual[k] <= self.count_ranges[i][1]
+                           for k, i in enumerate(self.basis))
+            d, coefs = self.dependents[t]
+            lo, hi = self.count_ranges[d]
+            for n in range(lo, hi + 1):
+                # 计数越大，基组分剩余越少：一旦低于下限，更大的n也不可行
+                if any(residual[pos] - a * n < self.count_ranges[self.basis[pos]][0] for pos, a in coefs):
+                    return False
+                for pos, a in coefs:
+                    residual[pos] -= a * n
+                # 剩余相关组分全部取最大值后仍超过上限时，n还太小
+                feasible = all(residual[k] - self._suffix_max[t + 1][k] <= self.count_ranges[i][1]
+                               for k, i in enumerate(self.basis))
+                if feasible:
+                    dependent_counts[t] = n
+                    if search(t + 1):
+                        return True
+                for pos, a in coefs:
+                    residual[pos] += a * n
+            return False
+
+        if not search(0):
+            return None
+        counts = [0] * len(self.symbols)
+        for k, i in enumerate(self.basis):
+            counts[i] = residual[k]
+        for t, (d, _) in enumerate(self.dependents):
+            counts[d] = dependent_counts[t]
+        return counts
+
+    def is_canonical(self, basis_counts: list[int]) -> bool:
+        """
+        basis_counts 是否为其组成的代表：不存在自由组分计数字典序更小、
+        且在范围内并能展开的另一组基组分计数。
+        """
+        if not self.free_moves:
+            return True
+        scale = self.free_scale
+        ranges = self.basis_ranges
+        # 调整后主元组分计数的 L 倍，从当前值开始逐个自由组分累加
+        scaled = {p: scale * basis_counts[p] for _, moves in self.free_moves for p, _ in moves}
+        # suffix[t][p]：第t个及之后的自由组分在其范围内变化时，对 L * N'_p 的最小/最大贡献
+        suffix = [dict.fromkeys(scaled, (0, 0)) for _ in range(len(self.free_moves) + 1)]
+        for t in range(len(self.free_moves) - 1, -1, -1):
+            f, moves = self.free_moves[t]
+            lo, hi = ranges[f]
+            row = dict(suffix[t + 1])
+            for p, k in moves:
+                a, b = k * (basis_counts[f] - hi), k * (basis_counts[f] - lo)
+                low, high = row[p]
+                row[p] = (low + min(a, b), high + max(a, b))
+            suffix[t] = row
+
+        def feasible(values: dict, t: int) -> bool:
+            for p, value in values.items():
+                low, high = suffix[t][p]
+                if value + high < scale * ranges[p][0] or value + low > scale * ranges[p][1]:
+                    return False
+            return True
+
+        def search(t: int, values: dict, smaller: bool, candidate: list) -> bool:
+            if t == len(self.free_moves):
+                if not smaller or any(value % scale for value in values.values()):
+                    return False
+                for p, value in values.items():
+                    candidate[p] = value // scale
+                return self.expand(candidate) is not None
+            f, moves = self.free_moves[t]
+            lo, hi = ranges[f]
+            for n in range(lo, hi + 1 if smaller else basis_counts[f] + 1):
+                shifted = dict(values)
+                for p, k in moves:
+                    shifted[p] += k * (basis_counts[f] - n)
+                if not feasible(shifted, t + 1):
+                    continue
+                candidate[f] = n
+                if search(t + 1, shifted, smaller or n < basis_counts[f], candidate):
+                    return True
+            candidate[f] = basis_counts[f]
+            return False
+
+        return not search(0, scaled, False, list(basis_counts))
+
+    def formula(self, basis_counts: list[int],
+                prefix: Optional[data_modules.Formula] = None) -> Optional[data_modules.Formula]:
+        """
+        展开后的Formula字典（计数为0的组分不写入）；无法展开，或同一组成有更靠前的代表时返回None。
+        """
+        counts = self.expand(basis_counts)
+        if counts is None or not self.is_canonical(basis_counts):
+            return None
+        formula: data_modules.Formula = dict(prefix) if prefix else {}
+        for i, n in enumerate(counts):
+            if n > 0:
+                formula[self.symbols[i]] = n
+        return formula
+
+
+def free_components(components: list[data_modules.Component]) -> tuple[tuple, int]:
+    """
+    对 (元素 + 电荷) × 组分 矩阵做有理数消元，返回 (free_moves, free_scale)，格式见 ComponentBasis。
+    主元按组分顺序选取，因此相关时保留靠前的组分作为主元。
+    """
+    elements = sorted({e for comp in components for e in comp['composition']})
+    rows = [[Fraction(comp['composition'].get(e, 0)) for comp in components] for e in elements]
+    rows.append([Fraction(comp.get('charge', 0)) for comp in components])
+    pivots = []     # (行, 列)
+    r = 0
+    for col in range(len(components)):
+        pivot = next((i for i in range(r, len(rows)) if rows[i][col] != 0), None)
+        if pivot is None:
+            continue
+        rows[r], rows[pivot] = rows[pivot], rows[r]
+        head = rows[r][col]
+        rows[r] = [x / head for x in rows[r]]
+        for i in range(len(rows)):
+            if i != r and rows[i][col] != 0:
+                factor = rows[i][col]
+                rows[i] = [x - factor * y for x, y in zip(rows[i], rows[r])]
+        pivots.append((r, col))
+        r += 1
+    pivot_cols = {col for _, col in pivots}
+    free = [col for col in range(len(components)) if col not in pivot_cols]
+    if not free:
+        return (), 1
+    # 简化行阶梯形中，自由列f在主元行上的值即为 c_pf
+    scale = lcm(*(rows[row][f].denominator for f in free for row, _ in pivots))
+    moves = tuple(
+        (f, tuple((col, int(rows[row][f] * scale)) for row, col in pivots if rows[row][f] != 0))
+        for f in free)
+    return moves, scale
+
+
+def reduce_components(components: list[data_modules.Component],
+                      count_ranges: list[tuple[int, int]]) -> Optional[ComponentBasis]:
+    """
+    检测重复和线性相关的组分。没有可以约简的组分时返回None。
+    组成越大的组分越先尝试表示为其他组分的非负整数组合；组成相同时保留靠前的组分。
+    剩下的基组分之间若还有有理系数的相关（见 free_components），只输出每个组成的代表。
+    """
+    order = sorted(range(len(components)),
+                   key=lambda i: (-sum(components[i]['composition'].values()), -i))
+    dependent: dict[int, tuple[tuple[int, int], ...]] = {}
+    for i in order:
+        target = components[i]['composition']
+        if not target:
+            continue
+        candidates = [
+            (j, comp['composition'], comp.get('charge', 0))
+            for j, comp in enumerate(components)
+            if j != i and j not in dependent and comp['composition']
+            and all(target.get(e, 0) >= n for e, n in comp['composition'].items())
+        ]
+        coefs = _express(target, components[i].get('charge', 0), candidates)
+        if coefs is not None:
+            dependent[i] = tuple(coefs)
+    basis = [i for i in range(len(components)) if i not in dependent]
+    free_moves, free_scale = free_components([components[i] for i in basis])
+    if not dependent and not free_moves:
+        return None
+
+    position = {i: k for k, i in enumerate(basis)}
+    # 相关组分的表示中可能用到了之后才被判定为相关的组分，逐层代入直到只含基组分
+    resolved: dict[int, dict[int, int]] = {}
+
+    def resolve(i: int) -> dict[int, int]:
+        if i not in resolved:
+            total: dict[int, int] = {}
+            for j, a in dependent[i]:
+                for k, b in ({position[j]: 1} if j in position else resolve(j)).items():
+                    total[k] = total.get(k, 0) + a * b
+            resolved[i] = total
+        return resolved[i]
+
+    dependents = [(i, tuple(sorted(resolve(i).items()))) for i in sorted(dependent)]
+    return ComponentBasis(components, count_ranges, basis, dependents, free_moves, free_scale)
@@ -0,0 +1,169 @@
+"""
+候选化学式对测量误差的稳健性分析 (Monte Carlo)。
+
+候选只枚举一次：先把每个候选化学式的各元素质量分数计算成一个矩阵，
+然后按各元素的标准差对测量的质量分数做数千次扰动采样，
+统计每个候选在多少次采样中仍然全部落在公差范围内。
+
+统计按列进行：对第一个元素的采样值排序后，每个候选在该元素上通过的采样
+恰好是排序数组中的一段连续区间（二分查找即可得到），只需对这段采样再检查其余元素。
+安装了 numpy 时，按第一个元素排序后的相邻候选分块，整块检查其余元素；否则逐个候选用纯Python检查。
+两种方式使用同一组采样和相同的比较，结果完全一致。
+"""
+import random
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from core import data_modules
+
+RobustnessResult = tuple[object, float]   # (候选解, 稳定率 0~1)
+
+# numpy 路径中一块最多包含的 候选×采样 数
+BLOCK_SIZE = 1 << 20
+
+
+def _import_numpy():
+    """numpy 是可选依赖，没有安装时返回None，使用纯Python的统计。"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def candidate_fraction_matrix(components: list[data_modules.Component],
+                              mass_fractions: dict[str, float],
+                              candidates: list, mode: str) -> list[list[float]]:
+    """
+    计算每个候选在各给定元素上的质量分数(%)，行对应候选，列对应mass_fractions的键。
+    unknown_element 模式下候选为 (Formula, 计算质量, 匹配元素)，按匹配元素的真实原子质量计算。
+    """
+    comp_map = {comp['symbol']: comp for comp in components}
+    matrix = []
+    for candidate in candidates:
+        if mode == 'unknown_element':
+            formula, _, matched_element = candidate
+        else:
+            formula, matched_element = candidate, None
+        total_mass = 0.0
+        element_counts: dict[str, int] = {}
+        for symbol, n in formula.items():
+            if symbol == '?':
+                total_mass += n * data_modules.ATOMIC_MASSES[matched_element]
+                element_counts[matched_element] = element_counts.get(matched_element, 0) + n
+                continue
+            comp = comp_map[symbol]
+            total_mass += n * comp['mass']
+            for element, count in comp['composition'].items():
+                element_counts[element] = element_counts.get(element, 0) + n * count
+        row = []
+        for element in mass_fractions:
+            if element == '?':
+                element = matched_element
+            elem_mass = element_counts.get(element, 0) * data_modules.ATOMIC_MASSES.get(element, 0.0)
+            row.append(elem_mass / total_mass * 100.0 if total_mass > 1e-6 else 0.0)
+        matrix.append(row)
+    return matrix
+
+
+def sample_fractions(mass_fractions: dict[str, float], std_devs: dict[str, float],
+                     n_samples: int, rng: random.Random) -> list[list[float]]:
+    """按列生成扰动后的质量分数：返回每个元素一列、每列n_samples个采样值。"""
+    columns = []
+    for element, target in mass_fractions.items():
+        sigma = std_devs.get(element, 0.0)
+        if sigma < 0:
+            raise ValueError(f"元素 '{element}' 的标准差不能为负数")
+        if sigma == 0:
+            columns.append([target] * n_samples)
+        else:
+            columns.append([rng.gauss(target, sigma) for _ in range(n_samples)])
+    return columns
+
+
+def analyze_robustness(components: list[data_modules.Component],
+                       mass_fractions: dict[str, float],
+                       candidates: list,
+                       mode: str,
+                       std_devs: dict[str, float],
+                       tolerance: float,
+                       n_samples: int = 2000,
+                       seed: Optional[int] = None) -> list[RobustnessResult]:
+    """
+    返回 [(候选, 稳定率)]，顺序与candidates相同。
+    稳定率为扰动采样中该候选的全部元素质量分数仍在 ±tolerance 内的比例。
+    """
+    if n_samples < 1:
+        raise ValueError("采样次数必须为正整数")
+    if not candidates:
+        return []
+    if not mass_fractions:
+        raise ValueError("至少提供一个质量分数。")
+
+    matrix = candidate_fraction_matrix(components, mass_fractions, candidates, mode)
+    columns = sample_fractions(mass_fractions, std_devs, n_samples, random.Random(seed))
+
+    np = _import_numpy()
+    if np is not None:
+        counts = _count_passed_numpy(np, matrix, columns, tolerance)
+    else:
+        counts = _count_passed(matrix, columns, tolerance)
+    return [(candidate, n / n_samples) for candidate, n in zip(candidates, counts)]
+
+
+def _count_passed_numpy(np, matrix: list[list[float]], columns: list[list[float]],
+                        tolerance: float) -> list[int]:
+    """
+    每个候选通过的采样数（numpy）：与纯Python方式相同，在排序后的第一列上用 searchsorted
+    得到各候选的区间。候选也按第一个元素的分数排序后分块，一块候选的区间彼此重叠，
+    只需对这些区间的并集整块比较其余元素。
+    """
+    samples = np.array(columns)                 # 元素 × 采样
+    rows = np.array(matrix)                     # 候选 × 元素
+    order = np.argsort(samples[0], kind='stable')
+    first = samples[0, order]
+    others = samples[1:, order]
+    starts = np.searchsorted(first, rows[:, 0] - tolerance, side='left')
+    stops = np.searchsorted(first, rows[:, 0] + tolerance, side='right')
+    if len(others) == 0:
+        return (stops - starts).tolist()
+    lows = rows - tolerance
+    highs = rows + tolerance
+
+    counts = np.zeros(len(rows), dtype=np.int64)
+    by_first = np.argsort(rows[:, 0], kind='stable')
+    block = max(1, BLOCK_SIZE // samples.shape[1])
+    for offset in range(0, len(rows), block):
+        members = by_first[offset:offset + block]
+        block_starts, block_stops = starts[members, None], stops[members, None]
+        lo, hi = int(block_starts.min()), int(block_stops.max())
+        if lo >= hi:
+            continue
+        positions = np.arange(lo, hi)
+        passed = (positions >= block_starts) & (positions < block_stops)
+        for j, column in enumerate(others, start=1):
+            values = column[lo:hi]
+            passed &= (values >= lows[members, j, None]) & (values <= highs[members, j, None])
+        counts[members] = passed.sum(axis=1)
+    return counts.tolist()
+
+
+def _count_passed(matrix: list[list[float]], columns: list[list[float]], tolerance: float) -> list[int]:
+    """每个候选通过的采样数（纯Python）：第一列排序后二分，其余列逐个检查。"""
+    n_samples = len(columns[0])
+    order = sorted(range(n_samples), key=columns[0].__getitem__)
+    sorted_first = [columns[0][k] for k in order]
+    other_columns = list(enumerate(columns))[1:]
+
+    counts = []
+    for row in matrix:
+        start = bisect_left(sorted_first, row[0] - tolerance)
+        stop = bisect_right(sorted_first, row[0] + tolerance)
+        passed = order[start:stop]
+        for j, column in other_columns:
+            lo, hi = row[j] - tolerance, row[j] + tolerance
+            passed = [k for k in passed if lo <= column[k] <= hi]
+            if not passed:
+                break
+        counts.append(len(passed))
+    return counts
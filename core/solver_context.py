@@ -0,0 +1,254 @@
+import math
+from typing import Callable, Dict, List, Tuple, Optional, Sequence
+from core import data_modules
+from core.governor import LIMIT_REQUESTED, ResourceLimitReached
+
+# 线性约束上下界的浮点容差；各搜索引擎检查约束时都使用它
+BOUND_EPS = 1e-9
+
+# 每隔多少次检查点调用一次 stop_check 和资源检查
+CHECK_INTERVAL = 1024
+
+
+class CalculationCancelled(Exception):
+    """计算在完成前被外部请求停止。"""
+
+
+class LinearConstraint:
+    """
+    线性约束 lo <= Σ coefs[i] * n_i <= hi，n_i为第i个组分的计数。
+    even=True 时还要求最终的和为偶数（用于奇偶性规则，只在叶节点检查）。
+    unknown_coef 为单一未知元素模式下未知原子总质量 n_? * A_? 在约束中的系数，
+    匹配前 A_? 未知，约束按其取值范围放宽（见 constraints.constraints_for_unknown）。
+    """
+
+    def __init__(self, name: str, coefs: Sequence[float],
+                 lo: float = float('-inf'), hi: float = float('inf'), even: bool = False,
+                 unknown_coef: float = 0.0):
+        self.name = name
+        self.coefs = list(coefs)
+        self.lo = lo
+        self.hi = hi
+        self.even = even
+        self.unknown_coef = unknown_coef
+
+    def relaxed(self, extra_min: float, extra_max: float) -> 'LinearConstraint':
+        """
+        约束中还有一项取值范围为[extra_min, extra_max]的额外贡献（如未知元素）时，
+        返回只针对已知组分的放宽约束，且不再检查奇偶性。
+        """
+        return LinearConstraint(self.name, self.coefs, self.lo - extra_max, self.hi - extra_min)
+
+    def shifted(self, offset: float) -> 'LinearConstraint':
+        """约束中还有一项固定贡献offset时，返回只针对已知组分的约束。"""
+        return LinearConstraint(self.name, self.coefs, self.lo - offset, self.hi - offset, self.even)
+
+
+class SolverContext:
+    """
+    求解上下文：每次计算开始时由组分和质量分数编译一次，
+    之后在枚举/递归的热循环中只做下标访问，不再构建字典。
+
+    - symbols[i]            第i个组分的符号
+    - masses[i]             第i个组分的式量
+    - elements[j]           第j个给定质量分数的元素（保持mass_fractions的键顺序）
+    - targets[j]            元素j的目标质量分数(%)
+    - tolerances[j]         元素j的质量分数公差(%)，由求解方法设置，未设置时为None
+    - element_indices[j]    元素j在 data_modules.ELEMENTS 中的下标（'?' 为-1）
+    - atomic_masses[j]      元素j的原子质量
+    - element_atoms[i]      组分i中各给定元素的原子数，仅保留非零项，形如 ((j, 原子数), ...)
+    - base_index            基准元素所在列（即mass_fractions的第一个键）
+    - constraints           线性约束列表，配合 count_ranges 在搜索中做分支定界剪枝
+    - stop_check            可选的无参回调，返回True时在下一个检查点抛出 CalculationCancelled
+    - on_solution           可选的回调，每找到一个解时以该解调用（按枚举顺序，未排序）
+    - reduction             可选的 core.reduction.ComponentBasis；设置时组分为约简后的基组分，
+                            叶节点需用它把计数展开回用户定义的组分
+    - governor              可选的 core.governor.ResourceGovernor；在检查点检查CPU时间和内存，
+                            记录解时检查数量，达到上限时抛出 ResourceLimitReached
+    - limit                 可选的结果数量；按复杂度顺序枚举时，记录第limit个解后停止搜索
+    """
+
+    def __init__(self, components: list[data_modules.Component], mass_fractions: dict[str, float],
+                 count_ranges: Optional[list[tuple[int, int]]] = None,
+                 constraints: Optional[list[LinearConstraint]] = None,
+                 stop_check: Optional[Callable[[], bool]] = None,
+                 on_solution: Optional[Callable[[object], None]] = None):
+        self.symbols: List[str] = [comp['symbol'] for comp in components]
+        self.masses: List[float] = [comp['mass'] for comp in components]
+        self.elements: List[str] = list(mass_fractions.keys())
+        self.targets: List[float] = list(mass_fractions.values())
+        # 各列在元素表中的下标；'?' 不在表中记为-1，它在任何已知组分中的原子数都为0，原子质量取0.0即可
+        table = data_modules.ELEMENTS
+        self.element_indices: List[int] = [table.index.get(e, -1) for e in self.elements]
+        self.atomic_masses: List[float] = [table.masses[k] if k >= 0 else 0.0 for k in self.element_indices]
+        self.element_atoms: List[Tuple[Tuple[int, int], ...]] = [
+            tuple((j, comp['composition'][e]) for j, e in enumerate(self.elements)
+                  if comp['composition'].get(e, 0) > 0)
+            for comp in components
+        ]
+        self.base_index: int = 0
+        self.count_ranges: list[tuple[int, int]] = count_ranges or [(0, 0)] * len(components)
+        self.set_constraints(constraints or [])
+        self.stop_check = stop_check
+        self.on_solution = on_solution
+        self.reduction = None
+        self.tolerances: Optional[List[float]] = None
+        self.governor = None
+        self.limit: Optional[int] = None
+        self._ticks = 0
+
+    @property
+    def n_components(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def n_elements(self) -> int:
+        return len(self.elements)
+
+    def add_counts(self, element_masses: list[float], comp_index: int, n: int) -> list[float]:
+        """返回在element_masses基础上加入n个组分comp_index后的各元素质量（不修改原列表）。"""
+        if n == 0 or not self.element_atoms[comp_index]:
+            return element_masses
+        new_masses = element_masses.copy()
+        for j, atoms in self.element_atoms[comp_index]:
+            new_masses[j] += n * atoms * self.atomic_masses[j]
+        return new_masses
+
+    def checkpoint(self, weight: int = 1):
+        """
+        在搜索循环中调用；每 CHECK_INTERVAL 次检查一次是否需要停止。
+        一次处理一批组合的引擎以批的大小作为weight，按组合数计。
+        """
+        if self.stop_check is None and self.governor is None:
+            return
+        self._ticks += weight
+        if self._ticks >= CHECK_INTERVAL:
+            self._ticks = 0
+            if self.stop_check is not None and self.stop_check():
+                raise CalculationCancelled("计算已被取消。")
+            if self.governor is not None:
+                self.governor.check_resources()
+
+    def check_results(self, n_found: int):
+        """
+        在记录新的解（或候选计数）之前调用，n_found为已保留的数量；
+        已达到结果数量上限时抛出 ResourceLimitReached。
+        """
+        if self.governor is not None:
+            self.governor.check_results(n_found)
+
+    def emit(self, solutions: list, solution):
+        """记录一个解；设置了 on_solution 时同时把它交给调用方（用于流式输出）。"""
+        if self.governor is not None:
+            self.governor.check_results(len(solutions))
+        solutions.append(solution)
+        if self.on_solution is not None:
+            self.on_solution(solution)
+        if self.limit is not None and len(solutions) >= self.limit:
+            raise ResourceLimitReached(LIMIT_REQUESTED, f"已找到前 {self.limit} 个解。")
+
+    def set_constraints(self, constraints: list[LinearConstraint]):
+        """
+        设置线性约束，并预先计算每个深度之后剩余组分贡献的最小/最大值，
+        suffix_min[k][d] 即第k个约束中组分d, d+1, ... 的贡献之和的下界。
+        """
+        self.constraints = constraints
+        self.suffix_min: list[list[float]] = []
+        self.suffix_max: list[list[float]] = []
+        for constraint in constraints:
+            mins = [0.0] * (self.n_components + 1)
+            maxs = [0.0] * (self.n_components + 1)
+            for i in range(self.n_components - 1, -1, -1):
+                lo, hi = self.count_ranges[i]
+                a, b = constraint.coefs[i] * lo, constraint.coefs[i] * hi
+                mins[i] = mins[i + 1] + min(a, b)
+                maxs[i] = maxs[i + 1] + max(a, b)
+            self.suffix_min.append(mins)
+            self.suffix_max.append(maxs)
+
+    def add_constraint_counts(self, sums: list[float], comp_index: int, n: int) -> list[float]:
+        """返回在sums基础上加入n个组分comp_index后的各约束部分和（不修改原列表）。"""
+        if n == 0 or not sums:
+            return sums
+        return [s + n * c.coefs[comp_index] for s, c in zip(sums, self.constraints)]
+
+    def is_feasible(self, depth: int, sums: list[float]) -> bool:
+        """前depth个组分已确定、部分和为sums时，剩余组分是否还有可能满足全部约束。"""
+        for k, constraint in enumerate(self.constraints):
+            if sums[k] + self.suffix_min[k][depth] > constraint.hi + BOUND_EPS:
+                return False
+            if sums[k] + self.suffix_max[k][depth] < constraint.lo - BOUND_EPS:
+                return False
+        return True
+
+    def count_interval(self, depth: int, sums: list[float]) -> tuple[int, int]:
+        """
+        前depth个组分已确定、部分和为sums时，第depth个组分计数的可行区间[lo, hi]。
+        对每个约束 lo_k <= S + c*n + R <= hi_k (R为剩余组分贡献的取值范围)
+        直接解出n的范围并取交集，因此只会枚举可能满足约束的计数；
+        区间为空时返回 lo > hi。
+        """
+        n_lo, n_hi = self.count_ranges[depth]
+        for k, constraint in enumerate(self.constraints):
+            c = constraint.coefs[depth]
+            # c*n 需要落在 [need_lo, need_hi] 内
+            need_lo = constraint.lo - sums[k] - self.suffix_max[k][depth + 1]
+            need_hi = constraint.hi - sums[k] - self.suffix_min[k][depth + 1]
+            if c > 0:
+                if need_lo > float('-inf'):
+                    n_lo = max(n_lo, math.ceil((need_lo - BOUND_EPS) / c))
+                if need_hi < float('inf'):
+                    n_hi = min(n_hi, math.floor((need_hi + BOUND_EPS) / c))
+            elif c < 0:
+                if need_hi < float('inf'):
+                    n_lo = max(n_lo, math.ceil((need_hi + BOUND_EPS) / c))
+                if need_lo > float('-inf'):
+                    n_hi = min(n_hi, math.floor((need_lo - BOUND_EPS) / c))
+            elif need_lo > BOUND_EPS or need_hi < -BOUND_EPS:
+                return 1, 0
+            if n_lo > n_hi:
+                return n_lo, n_hi
+        return n_lo, n_hi
+
+    def satisfies(self, sums: list[float]) -> bool:
+        """全部组分确定后，检查约束（含奇偶性）是否满足。"""
+        for s, constraint in zip(sums, self.constraints):
+            if s > constraint.hi + BOUND_EPS or s < constraint.lo - BOUND_EPS:
+                return False
+            if constraint.even and round(s) % 2 != 0:
+                return False
+        return True
+
+    def matches(self, counts: Sequence[int], tolerance: float) -> bool:
+        """
+        检查一个完整的计数组合是否满足全部质量分数和约束。
+        算式（包括求和顺序）与 solve_by_brute_force 相同，保证各搜索引擎的浮点结果一致。
+        设置了 tolerances 时按各元素的公差检查，否则统一使用tolerance。
+        """
+        total_mass = 0.0
+        element_counts = [0] * self.n_elements
+        for i, n in enumerate(counts):
+            total_mass += n * self.masses[i]
+            for j, count in self.element_atoms[i]:
+                element_counts[j] += n * count
+        if total_mass < 1e-6:
+            return False
+        tolerances = self.tolerances or [tolerance] * self.n_elements
+        for j, target_fraction in enumerate(self.targets):
+            elem_mass = element_counts[j] * self.atomic_masses[j]
+            actual_fraction = (elem_mass / total_mass) * 100.0
+            if abs(actual_fraction - target_fraction) > tolerances[j]:
+                return False
+        if self.constraints:
+            sums = [sum(n * c.coefs[i] for i, n in enumerate(counts)) for c in self.constraints]
+            if not self.satisfies(sums):
+                return False
+        return True
+
+    def build_formula(self, counts: list[int], prefix: Optional[data_modules.Formula] = None) -> data_modules.Formula:
+        """由计数向量生成Formula字典，计数为0的组分不写入。"""
+        formula: data_modules.Formula = dict(prefix) if prefix else {}
+        for i, n in enumerate(counts):
+            if n > 0:
+                formula[self.symbols[i]] = n
+        return formula
@@ -1,7 +1,14 @@
 from typing import Dict, List, Tuple, TypedDict, Optional, Set
 import re,copy
+from bisect import bisect_left, bisect_right
 from core import data_modules
 
+# find_matching_element 的 element_type 对应的元素类别掩码
+_TYPE_MASKS = {
+    'metal': data_modules.CLASS_METAL,
+    'nonmetal': data_modules.CLASS_NONMETAL,
+}
+
 def parse_formula(formula_str: str) -> tuple[float, data_modules.Formula]:
     """
     解析一个化学式字符串 (如 'C2H3O2')。
@@ -18,42 +25,71 @@ def parse_formula(formula_str: str) -> tuple[float, data_modules.Formula]:
     for i in formula_str.strip():
         if not( 'a'<=i<='z' or 'A'<=i<='Z' or '0'<= i <= '9'):
             raise ValueError(f"记号'{i}'非法")
+    table = data_modules.ELEMENTS
     for element, count_str in re.findall(r'([A-Z][a-z]?)(\d*)', formula_str):
-        if element not in data_modules.ATOMIC_MASSES:
+        k = table.index.get(element)
+        if k is None:
             raise ValueError(f"元素 '{element}' 不在原子质量表中。")
         count = int(count_str) if count_str else 1
-        mass += data_modules.ATOMIC_MASSES[element] * count
+        mass += table.masses[k] * count
         composition[element] = composition.get(element, 0) + count
     return (mass, composition)
 
 
+def element_filter(element_type: Optional[str] = None, include_synthetic: bool = False) -> tuple[int, int]:
+    """
+    返回 (类别掩码, 排除掩码)：元素k可以匹配，当且仅当
+    classes[k] & 类别掩码 非零且 classes[k] & 排除掩码 为零。参数含义同 find_matching_element。
+    """
+    mask = _TYPE_MASKS.get(element_type, data_modules.CLASS_ALL)
+    excluded = 0 if include_synthetic else data_modules.CLASS_SYNTHETIC
+    return mask, excluded
+
+
 def find_matching_element(mass: float, tolerance: float,
-                          element_type: Optional[str] = None) -> str | None:
+                          element_type: Optional[str] = None,
+                          include_synthetic: bool = False) -> str | None:
     """
     在原子质量表中查找与给定质量最匹配的元素。
-    输入：tolerance为容差,element_type为
-    - 遍历ATOMIC_MASSES。
-    - 如果找到一个元素的质量在 `mass ± tolerance` 范围内，返回该元素的符号。
+    输入：tolerance为容差,element_type为 'metal'/'nonmetal'，其他值表示不限；
+    include_synthetic为False时不匹配非天然元素 (data_modules.CLASS_SYNTHETIC)
+    - 在按质量排序的数组中二分查找 `mass ± tolerance` 范围内的元素。
+    - 返回其中质量最接近的元素符号，距离相同时取原子序数较小者。
     - 如果没有找到匹配项，返回None。
     返回：一个包含元素符号的字符串
     """
-    best_match = None
+    table = data_modules.ELEMENTS
+    mask, excluded = element_filter(element_type, include_synthetic)
+    # 区间两端略微放宽，最终是否匹配仍以 diff <= tolerance 为准
+    start = bisect_left(table.sorted_masses, mass - tolerance - 1e-9)
+    stop = bisect_right(table.sorted_masses, mass + tolerance + 1e-9)
+
+    best_index = None
     min_diff = float('inf')
-    
-    for symbol, atomic_mass in data_modules.ATOMIC_MASSES.items():
-        diff = abs(mass - atomic_mass)
-        
-        if element_type == "metal" and symbol not in data_modules.METALS:
+    for pos in range(start, stop):
+        k = table.sorted_indices[pos]
+        if not table.classes[k] & mask or table.classes[k] & excluded:
             continue
-        if element_type == "nonmetal" and symbol not in data_modules.NONMETALS:
-            continue
-        
+        diff = abs(mass - table.masses[k])
         # 寻找最接近的匹配
-        if diff <= tolerance and diff < min_diff:
-            best_match = symbol
+        if diff <= tolerance and (diff < min_diff or (diff == min_diff and k < best_index)):
+            best_index = k
             min_diff = diff
-    
-    return best_match
+
+    return table.symbols[best_index] if best_index is not None else None
+
+def format_formula(formula: data_modules.Formula, matched_element: Optional[str] = None) -> str:
+    """
+    将Formula字典格式化为显示用的字符串，如 'C2 H4 O2'。
+    如果给出matched_element，则把'?'的计数合并到该元素上。
+    """
+    if matched_element and '?' in formula:
+        final_formula = dict(formula)
+        n_unknown = final_formula.pop('?')
+        final_formula[matched_element] = final_formula.get(matched_element, 0) + n_unknown
+    else:
+        final_formula = formula
+    return " ".join(f"{s}{c if c > 1 else ''}" for s, c in sorted(final_formula.items()))
 
 def check_component(symbol : str, formula : str, existing_symbols : list[str] ):
     """检验用户输入的化学式是否合法"""
@@ -69,7 +105,7 @@ def check_component(symbol : str, formula : str, existing_symbols : list[str] ):
             raise ValueError('不得覆写?的化学组成')
     if symbol == '':
         raise ValueError('请输入元素符号')
-    if symbol.strip() in data_modules.ATOMIC_MASSES.keys():
+    if symbol.strip() in data_modules.ELEMENTS:
         if formula.strip() == '' or  formula.strip() == symbol.strip():
             return (symbol,symbol)
         else:
@@ -79,6 +115,37 @@ def check_component(symbol : str, formula : str, existing_symbols : list[str] ):
         raise ValueError(f'符号{symbol}不在元素周期表中，需要给出化学组成')
     return (symbol,formula)
 
+def check_charge(charge_str: str) -> int:
+    """检验用户输入的组分电荷，空字符串视为0"""
+    charge_str = str(charge_str).strip()
+    if charge_str == '':
+        return 0
+    try:
+        return int(charge_str)
+    except ValueError:
+        raise ValueError('电荷应为整数, 例如 -2, 0, 1')
+
+def parse_element_tolerances(text: str) -> dict[str, float]:
+    """解析各元素公差的输入，如 'H:0.1, N:0.2'，空字符串返回空字典"""
+    tolerances = {}
+    for part in re.split(r'[,，;；\s]+', text.strip()):
+        if not part:
+            continue
+        symbol, sep, value = part.replace('：', ':').partition(':')
+        if not sep or not symbol:
+            raise ValueError(f"无法解析 '{part}'，各元素公差的格式应为 H:0.1, N:0.2")
+        try:
+            tolerances[symbol] = float(value)
+        except ValueError:
+            raise ValueError(f"元素 '{symbol}' 的公差应为数字")
+        if tolerances[symbol] < 0:
+            raise ValueError(f"元素 '{symbol}' 的公差不能为负数")
+    return tolerances
+
+def format_element_tolerances(tolerances: dict[str, float]) -> str:
+    """parse_element_tolerances 的逆操作"""
+    return ", ".join(f"{symbol}:{value}" for symbol, value in tolerances.items())
+
 def check_fraction(symbol :str, fraction_str: str, defined_symbols: list[str]):
     if symbol == '?' or symbol == '？':
         if '?' in defined_symbols:
@@ -91,7 +158,7 @@ def check_fraction(symbol :str, fraction_str: str, defined_symbols: list[str]):
             return ('?', fraction_)
         else:
             raise ValueError('没有定义未知元素')
-    if symbol not in data_modules.ATOMIC_MASSES.keys():
+    if symbol not in data_modules.ELEMENTS:
         raise ValueError(f'{symbol}不是元素, 请输入正确的元素符号')
     if symbol not in defined_symbols:
         raise ValueError(f'符号{symbol}尚未添加，需要在添加化学组分窗口添加')
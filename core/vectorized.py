@@ -0,0 +1,174 @@
+"""
+单一未知元素模式的向量化引擎（需要可选依赖 numpy）。
+
+递归方法在每个叶节点上逐一求未知原子质量、检查各质量分数并调用 find_matching_element。
+这里把已知组分分为前后两段：后段（末尾若干组分）的全部计数组合作为一批，
+用数组一次算出已知质量、各元素质量和约束部分和；前段按 itertools.product 的顺序逐个枚举。
+对每个 n_unknown，整批地求出隐含的未知原子质量
+
+    A_? = (m_base - w_base * M_known) / (w_base * n_?)
+
+再依次用 1..300 的范围、约束和全部质量分数生成掩码，剩下的候选在按质量排序的元素表上
+用 searchsorted 批量匹配元素。
+
+数组中的每一步运算与递归方法的浮点运算（包括求和顺序）相同，因此解及其计算质量完全一致。
+枚举顺序为“前段组合 → n_? → 后段组合”，与递归方法的“n_? → 全部组合”不同，
+求解方法在最后的稳定排序中加入 n_? 作为次要键，两者得到的列表完全相同。
+"""
+from itertools import product
+from typing import Optional
+
+from core import data_modules, utils
+from core import constraints as chem_rules
+from core.solver_context import SolverContext, BOUND_EPS
+
+# 一批最多包含的后段计数组合数
+BATCH_SIZE = 1 << 16
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("向量化引擎需要安装numpy (pip install numpy)")
+    return numpy
+
+
+def match_elements(np, masses, tolerance: float, element_type: Optional[str],
+                   include_synthetic: bool = False) -> list[Optional[str]]:
+    """
+    utils.find_matching_element 的批量版本：对数组masses中的每个质量返回匹配的元素符号或None。
+    窗口、距离、同距离时取较小原子序数以及排除非天然元素的规则都与逐个匹配相同。
+    """
+    table = data_modules.ELEMENTS
+    mask, excluded = utils.element_filter(element_type, include_synthetic)
+    positions = [pos for pos, k in enumerate(table.sorted_indices)
+                 if table.classes[k] & mask and not table.classes[k] & excluded]
+    if not positions or len(masses) == 0:
+        return [None] * len(masses)
+    table_masses = np.array([table.sorted_masses[pos] for pos in positions])
+    table_indices = np.array([table.sorted_indices[pos] for pos in positions])
+
+    start = np.searchsorted(table_masses, masses - tolerance - 1e-9, side='left')
+    stop = np.searchsorted(table_masses, masses + tolerance + 1e-9, side='right')
+    best_index = np.full(len(masses), -1)
+    best_diff = np.full(len(masses), np.inf)
+    last = len(table_masses) - 1
+    for offset in range(int((stop - start).max(initial=0))):
+        pos = start + offset
+        valid = pos < stop
+        pos = np.minimum(pos, last)
+        diff = np.abs(masses - table_masses[pos])
+        k = table_indices[pos]
+        better = valid & (diff <= tolerance) & ((diff < best_diff) | ((diff == best_diff) & (k < best_index)))
+        best_index = np.where(better, k, best_index)
+        best_diff = np.where(better, diff, best_diff)
+    return [table.symbols[k] if k >= 0 else None for k in best_index.tolist()]
+
+
+def solve_unknown_vectorized(context: SolverContext, rules: list, n_max: int, tolerance: float,
+                             unknown_filter: str, unknown_charge: int,
+                             options: Optional[data_modules.Constraints],
+                             unknown_remainder: Optional[tuple[float, float]],
+                             solutions: list, include_synthetic: bool = False):
+    """
+    向量化地求解单一未知元素模式，把解（化学式, 计算质量, 匹配元素）用 context.emit 加入solutions。
+    rules 为未扣除未知原子贡献的线性约束，各 n_? 的约束由 constraints_for_unknown 得到
+    （系数不变，只有上下界不同）。
+    """
+    np = _import_numpy()
+    p = context.n_components
+    ranges = context.count_ranges
+    n_elements = context.n_elements
+    base = context.base_index
+    w_base = context.targets[base] / 100.0
+    if w_base < 1e-9:
+        return
+
+    # 末尾的组分逐个加入后段，直到一批的组合数超过 BATCH_SIZE
+    split, size = p, 1
+    while split > 0:
+        lo, hi = ranges[split - 1]
+        if size * (hi - lo + 1) > BATCH_SIZE:
+            break
+        size *= hi - lo + 1
+        split -= 1
+    columns = [grid.ravel() for grid in
+               np.meshgrid(*[np.arange(lo, hi + 1) for lo, hi in ranges[split:]], indexing='ij')]
+    column_lists = [column.tolist() for column in columns]
+
+    bounds = {}
+    for n_unknown in range(1, n_max + 1):
+        bounds[n_unknown] = chem_rules.constraints_for_unknown(rules, n_unknown, unknown_charge, unknown_filter)
+    coefs = [constraint.coefs for constraint in rules]
+
+    for prefix in product(*[range(lo, hi + 1) for lo, hi in ranges[:split]]):
+        context.checkpoint(size)
+        # 前段：与递归方法相同的逐个组分累加
+        known_mass = 0.0
+        element_masses = [0.0] * n_elements
+        sums = [0.0] * len(rules)
+        for i, n in enumerate(prefix):
+            known_mass = known_mass + n * context.masses[i]
+            element_masses = context.add_counts(element_masses, i, n)
+            if n:
+                sums = [s + n * c[i] for s, c in zip(sums, coefs)]
+        # 后段：整批继续按组分顺序累加
+        known_arr = np.full(size, known_mass)
+        element_arrs = [np.full(size, m) for m in element_masses]
+        sum_arrs = [np.full(size, s) for s in sums]
+        for t, column in enumerate(columns):
+            i = split + t
+            known_arr = known_arr + column * context.masses[i]
+            for j, atoms in context.element_atoms[i]:
+                element_arrs[j] = element_arrs[j] + (column * atoms) * context.atomic_masses[j]
+            for k, c in enumerate(coefs):
+                sum_arrs[k] = sum_arrs[k] + column * c[i]
+        known_ok = known_arr > 1e-6
+        if not known_ok.any():
+            continue
+
+        for n_unknown in range(1, n_max + 1):
+            ok = known_ok
+            constraints = bounds[n_unknown]
+            for s_arr, constraint in zip(sum_arrs, constraints):
+                ok = ok & (s_arr <= constraint.hi + BOUND_EPS) & (s_arr >= constraint.lo - BOUND_EPS)
+                if constraint.even:
+                    ok = ok & (np.round(s_arr) % 2 == 0)
+            denominator = w_base * n_unknown
+            masses = (element_arrs[base] - w_base * known_arr) / denominator
+            ok = ok & (masses >= 1.0) & (masses <= 300.0)
+            rows = np.flatnonzero(ok)
+            if len(rows) == 0:
+                continue
+            masses = masses[rows]
+            total = known_arr[rows] + n_unknown * masses
+            keep = total >= 1e-6
+            for j, target_fraction in enumerate(context.targets):
+                actual_fraction = (element_arrs[j][rows] / total) * 100.0
+                keep &= np.abs(actual_fraction - target_fraction) <= context.tolerances[j]
+            if unknown_remainder is not None:
+                unknown_fraction = (n_unknown * masses / total) * 100.0
+                keep &= np.abs(unknown_fraction - unknown_remainder[0]) <= unknown_remainder[1]
+            rows, masses = rows[keep], masses[keep]
+            if len(rows) == 0:
+                continue
+
+            matched = match_elements(np, masses, tolerance, unknown_filter, include_synthetic)
+            if options and any(matched):
+                context.set_constraints(constraints)
+            for row, mass, element in zip(rows.tolist(), masses.tolist(), matched):
+                if not element or element in context.elements:
+                    continue
+                counts = list(prefix) + [column[row] for column in column_lists]
+                if options and not chem_rules.accepts_unknown_element(
+                        context, [float(s_arr[row]) for s_arr in sum_arrs], options, n_unknown, element,
+                        float(known_arr[row])):
+                    continue
+                if context.reduction is not None:
+                    formula = context.reduction.formula(counts, prefix={'?': n_unknown})
+                    if formula is None:
+                        continue
+                else:
+                    formula = context.build_formula(counts, prefix={'?': n_unknown})
+                context.emit(solutions, (formula, mass, element))
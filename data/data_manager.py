@@ -1,27 +1,94 @@
-from core.utils import check_component,check_fraction
+from bisect import bisect_left, insort
+from typing import Callable
+
+from core.utils import check_component,check_fraction,check_charge
 from core.data_modules import ATOMIC_MASSES
 
+# 变化通知中的表名
+COMPONENTS = 'components'
+FRACTIONS = 'fractions'
+
+# 变化通知的类型
+ROW_INSERTED = 'inserted'
+ROW_UPDATED = 'updated'
+ROW_REMOVED = 'removed'
+TABLE_RESET = 'reset'     # 整张表被替换（如加载会话），row 为 -1
+
+# 监听器签名: listener(表名, 变化类型, 行号, 数据)
+# 组分表的行号即组分下标，数据为组分字典；
+# 质量分数表的行号为按符号排序后的位置（与界面显示一致），数据为 (符号, 分数)。
+ChangeListener = Callable[[str, str, int, object], None]
+
+
 class DataManager:
     """
     管理所有化学组分和质量分数数据的单一来源。
     包含所有的数据验证和操作逻辑。
+
+    每次修改后以行为单位通知监听器（插入/更新/删除），界面只需更新变化的行。
+    组分字典一经存入就不再原地修改，更新时整体替换，因此读取时只需浅拷贝列表。
     """
 
     def __init__(self):
-        self.components = []   # 例如: [{'symbol': 'OAc', 'formula': 'C2H3O2'}]
+        self.components = []   # 例如: [{'symbol': 'OAc', 'formula': 'C2H3O2', 'charge': -1}]
         self.fractions = {}   # 例如: {'C': 40.123}
+        self._symbol_index: dict[str, int] = {}   # 组分符号 -> 下标
+        self._fraction_rows: list[str] = []       # 按符号排序的质量分数行
+        self._listeners: list[ChangeListener] = []
+        self._muted = False
 
-    def add_component(self, symbol: str, formula: str):
+    def add_listener(self, listener: ChangeListener):
+        """注册数据变化监听器。"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, table: str, kind: str, row: int, data):
+        if self._muted:
+            return
+        for listener in list(self._listeners):
+            listener(table, kind, row, data)
+
+    def _insert_fraction(self, symbol: str, fraction: float):
+        """写入质量分数并发出插入或更新通知。"""
+        if symbol in self.fractions:
+            self.fractions[symbol] = fraction
+            self._notify(FRACTIONS, ROW_UPDATED, bisect_left(self._fraction_rows, symbol), (symbol, fraction))
+        else:
+            self.fractions[symbol] = fraction
+            insort(self._fraction_rows, symbol)
+            self._notify(FRACTIONS, ROW_INSERTED, bisect_left(self._fraction_rows, symbol), (symbol, fraction))
+
+    def _remove_fraction(self, symbol: str):
+        """删除质量分数并发出删除通知。"""
+        fraction = self.fractions.pop(symbol)
+        row = bisect_left(self._fraction_rows, symbol)
+        del self._fraction_rows[row]
+        self._notify(FRACTIONS, ROW_REMOVED, row, (symbol, fraction))
+
+    def _replace_component(self, index: int, **changes):
+        """以新的字典替换指定组分并发出更新通知。"""
+        comp = {**self.components[index], **changes}
+        self.components[index] = comp
+        self._notify(COMPONENTS, ROW_UPDATED, index, comp)
+
+    def add_component(self, symbol: str, formula: str, charge=0):
         """验证并添加一个新的化学组分。"""
         _symbol_list = self.get_component_symbols()
         symbol, formula = check_component(symbol, formula, _symbol_list)
-        self.components.append({'symbol': symbol, 'formula': formula})
+        charge = check_charge(charge)
+        comp = {'symbol': symbol, 'formula': formula, 'charge': charge}
+        self.components.append(comp)
+        self._symbol_index[symbol] = len(self.components) - 1
+        self._notify(COMPONENTS, ROW_INSERTED, len(self.components) - 1, comp)
 
     def add_fraction(self, symbol: str, fraction: float):
         """验证并添加一个新的质量分数。"""
         _symbol_list = self.get_component_symbols()
         symbol , fraction_ = check_fraction(symbol, str(fraction), _symbol_list)
-        self.fractions[symbol] = fraction_
+        self._insert_fraction(symbol, fraction_)
 
     def update_component_formula(self, index: int, new_formula: str):
         """验证并更新指定索引的组分的化学式 (用于表格直接编辑)。"""
@@ -30,15 +97,20 @@ class DataManager:
             _symbol_list = self.get_component_symbols()
             _symbol_list.remove(symbol)
             check_component(symbol, new_formula, _symbol_list)
-            self.components[index]['formula'] = new_formula
+            self._replace_component(index, formula=new_formula)
+
+    def update_component_charge(self, index: int, new_charge):
+        """验证并更新指定索引的组分的电荷 (用于表格直接编辑)。"""
+        if 0 <= index < len(self.components):
+            self._replace_component(index, charge=check_charge(new_charge))
 
     def update_fraction_value(self, symbol: str, new_fraction: float):
         """验证并更新指定符号的质量分数 (用于表格直接编辑)。"""
         if symbol in self.fractions:
             _symbol_list = self.get_component_symbols()
             # _symbol_list.remove(symbol)
-            check_fraction(symbol, str(new_fraction), _symbol_list)
-            self.fractions[symbol] = new_fraction
+            _, fraction_ = check_fraction(symbol, str(new_fraction), _symbol_list)
+            self._insert_fraction(symbol, fraction_)
 
     def update_component_symbol(self, index: int, new_symbol: str):
         """验证并更新指定索引的组分的符号。"""
@@ -54,50 +126,91 @@ class DataManager:
         check_component(new_symbol, formula, self.get_component_symbols())
 
         # 验证新符号的唯一性 (确保不与除自身外的其他符号冲突)
-        other_symbols = [c['symbol'] for i, c in enumerate(self.components) if i != index]
-        if new_symbol in other_symbols:
+        if self._symbol_index.get(new_symbol, index) != index:
             raise ValueError(f"错误: 符号 '{new_symbol}' 已被其他组分使用。")
-        
+
         # 同步更新质量分数列表
         if old_symbol in self.fractions:
             if new_symbol not in ATOMIC_MASSES.keys():
                 raise ValueError(f"旧符号'{old_symbol}'已在质量分数表中, 新符号需要是周期表中元素。")
-            fraction_value = self.fractions.pop(old_symbol)     # 移除旧条目
-            self.fractions[new_symbol] = fraction_value      # 添加新条目
-        
+            fraction_value = self.fractions[old_symbol]
+            self._remove_fraction(old_symbol)     # 移除旧条目
+            self._insert_fraction(new_symbol, fraction_value)      # 添加新条目
+
         # 更新组分列表中的符号
-        self.components[index]['symbol'] = new_symbol
+        del self._symbol_index[old_symbol]
+        self._symbol_index[new_symbol] = index
+        self._replace_component(index, symbol=new_symbol)
 
     def delete_component(self, index: int):
         """根据索引删除一个组分，并同步删除其对应的质量分数。"""
         if not (0 <= index < len(self.components)):
             return
 
-        # 在删除组分前，先获取其符号
-        symbol_to_delete = self.components[index]['symbol']
-        
-        # 从组分列表中删除
-        self.components.pop(index)
-        
+        # 从组分列表中删除，其后组分的下标前移
+        comp = self.components.pop(index)
+        symbol_to_delete = comp['symbol']
+        del self._symbol_index[symbol_to_delete]
+        for i in range(index, len(self.components)):
+            self._symbol_index[self.components[i]['symbol']] = i
+        self._notify(COMPONENTS, ROW_REMOVED, index, comp)
+
         # 如果这个组分在质量分数字典中也存在，则一并删除
         if symbol_to_delete in self.fractions:
-            del self.fractions[symbol_to_delete]
+            self._remove_fraction(symbol_to_delete)
 
     def delete_fraction(self, symbol: str):
         """
         根据符号删除一个质量分数。
         """
         if symbol in self.fractions:
-            del self.fractions[symbol]
+            self._remove_fraction(symbol)
+
+    def load_state(self, components: list[dict], fractions: dict[str, float]):
+        """
+        用一组新的组分和质量分数替换当前数据 (用于加载会话)。
+        数据逐条经过与手动添加相同的验证；验证失败时保留原有数据。
+        成功后对两张表各发出一次 TABLE_RESET 通知，而不是逐行通知。
+        """
+        old_state = (self.components, self.fractions, self._symbol_index, self._fraction_rows)
+        self.components, self.fractions, self._symbol_index, self._fraction_rows = [], {}, {}, []
+        self._muted = True
+        try:
+            for comp in components:
+                self.add_component(comp['symbol'], comp['formula'], comp.get('charge', 0))
+            for symbol, fraction in fractions.items():
+                self.add_fraction(symbol, fraction)
+        except ValueError:
+            self.components, self.fractions, self._symbol_index, self._fraction_rows = old_state
+            raise
+        finally:
+            self._muted = False
+        self._notify(COMPONENTS, TABLE_RESET, -1, None)
+        self._notify(FRACTIONS, TABLE_RESET, -1, None)
 
     def get_all_components(self) -> list[dict]:
-        """返回所有组分数据的深拷贝，防止外部修改。"""
-        return [item.copy() for item in self.components]
+        """
+        返回组分列表的浅拷贝。组分字典在这里只会被整体替换、不会原地修改，
+        因此拿到的快照不会随之后的编辑而变化；调用方不应修改这些字典。
+        """
+        return list(self.components)
+
+    def get_component(self, index: int) -> dict:
+        """返回指定下标的组分字典（只读）。"""
+        return self.components[index]
+
+    def index_of(self, symbol: str) -> int:
+        """返回组分符号对应的下标，不存在时返回-1。"""
+        return self._symbol_index.get(symbol, -1)
 
     def get_all_fractions(self) -> dict[str, float]:
         """返回所有质量分数数据的拷贝。"""
         return self.fractions.copy()
 
+    def get_fraction_rows(self) -> list[tuple[str, float]]:
+        """按界面显示顺序（符号排序）返回 [(符号, 分数)]。"""
+        return [(symbol, self.fractions[symbol]) for symbol in self._fraction_rows]
+
     def get_component_symbols(self) -> list[str]:
         """返回一个包含所有已定义组分符号的列表。"""
-        return [c['symbol'] for c in self.components]
\ No newline at end of file
+        return [c['symbol'] for c in self.components]
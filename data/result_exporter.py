@@ -0,0 +1,157 @@
+"""
+将计算结果流式导出为 CSV / JSON Lines / Parquet 文件。
+逐行生成格式化结果并按块写入，不会一次性在内存中生成全部字符串。
+既可由GUI的“保存结果”调用，也可在脚本中直接使用 export_results。
+"""
+import csv
+import json
+import os
+from typing import Iterable, Iterator, Optional
+
+from core import data_modules, utils
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+_SUFFIX_FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet',
+}
+
+
+def result_columns(mode: str, mass_fractions: dict[str, float]) -> list[str]:
+    """返回导出文件的列名。残差列为“计算质量分数 - 目标质量分数”(%)。"""
+    columns = ['formula']
+    if mode == 'unknown_element':
+        columns += ['unknown_element', 'unknown_mass']
+    columns.append('molar_mass')
+    columns += [f'residual_{element}' for element in mass_fractions]
+    return columns
+
+
+def iter_result_rows(results: Iterable, mode: str,
+                     components_data: list[dict],
+                     mass_fractions: dict[str, float]) -> Iterator[list]:
+    """
+    逐条生成导出行，列顺序与 result_columns 一致。
+    - general 模式下 results 为 Formula 列表；
+    - unknown_element 模式下 results 为 (Formula, 计算质量, 匹配元素) 列表，
+      摩尔质量和残差按匹配元素的真实原子质量计算。
+    """
+    comp_masses: dict[str, float] = {}
+    comp_compositions: dict[str, data_modules.Formula] = {}
+    for item in components_data:
+        if item['symbol'] == '?':
+            continue
+        mass_, composition_ = utils.parse_formula(item['formula'])
+        comp_masses[item['symbol']] = mass_
+        comp_compositions[item['symbol']] = composition_
+
+    for solution in results:
+        if mode == 'unknown_element':
+            formula, unknown_mass, matched_element = solution
+        else:
+            formula, unknown_mass, matched_element = solution, None, None
+
+        molar_mass = 0.0
+        element_counts: dict[str, int] = {}
+        for symbol, n in formula.items():
+            if symbol == '?':
+                molar_mass += n * data_modules.ATOMIC_MASSES[matched_element]
+                element_counts[matched_element] = element_counts.get(matched_element, 0) + n
+                continue
+            molar_mass += n * comp_masses[symbol]
+            for element, count in comp_compositions[symbol].items():
+                element_counts[element] = element_counts.get(element, 0) + n * count
+
+        row = [utils.format_formula(formula, matched_element)]
+        if mode == 'unknown_element':
+            row += [matched_element, unknown_mass]
+        row.append(molar_mass)
+        for element, target_fraction in mass_fractions.items():
+            if element == '?':
+                element = matched_element
+            elem_mass = element_counts.get(element, 0) * data_modules.ATOMIC_MASSES.get(element, 0.0)
+            actual_fraction = (elem_mass / molar_mass) * 100.0 if molar_mass > 1e-6 else 0.0
+            row.append(actual_fraction - target_fraction)
+        yield row
+
+
+def detect_format(path: str) -> str:
+    """根据文件扩展名推断导出格式。"""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in _SUFFIX_FORMATS:
+        raise ValueError(f"无法识别的导出文件类型 '{suffix}'，支持: .csv, .jsonl, .parquet")
+    return _SUFFIX_FORMATS[suffix]
+
+
+def _chunks(rows: Iterator[list], chunk_size: int) -> Iterator[list[list]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_results(path: str, results: Iterable, mode: str,
+                   components_data: list[dict],
+                   mass_fractions: dict[str, float],
+                   fmt: Optional[str] = None,
+                   chunk_size: int = 5000) -> int:
+    """
+    将结果写入path，返回写出的行数。
+    fmt 为 'csv'、'jsonl' 或 'parquet'，省略时按扩展名推断。
+    Parquet 需要可选依赖 pyarrow。
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式 '{fmt}'")
+    if chunk_size < 1:
+        raise ValueError("chunk_size 必须为正整数")
+
+    columns = result_columns(mode, mass_fractions)
+    rows = iter_result_rows(results, mode, components_data, mass_fractions)
+    n_rows = 0
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for chunk in _chunks(rows, chunk_size):
+                writer.writerows(chunk)
+                n_rows += len(chunk)
+
+    elif fmt == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            for chunk in _chunks(rows, chunk_size):
+                f.write(''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                                for row in chunk))
+                n_rows += len(chunk)
+
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("导出Parquet需要安装pyarrow (pip install pyarrow)")
+        writer = None
+        try:
+            for chunk in _chunks(rows, chunk_size):
+                table = pa.table({name: [row[k] for row in chunk] for k, name in enumerate(columns)})
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                n_rows += len(chunk)
+            if writer is None:    # 没有结果时也写出一个只有表头的文件
+                schema = pa.schema([(name, pa.string() if name in ('formula', 'unknown_element') else pa.float64())
+                                    for name in columns])
+                writer = pq.ParquetWriter(path, schema)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return n_rows
@@ -0,0 +1,215 @@
+"""
+会话的保存与加载。
+
+文件格式（小端序）：
+    8 字节魔数 b'EASESS01'
+    4 字节无符号整数：JSON 头部长度
+    JSON 头部（UTF-8）：组分、质量分数、计算参数以及结果数组的描述
+    填充到 8 字节对齐后的二进制块：结果数组
+
+结果数组按列保存，可以通过 mmap 直接映射读取，加载 10 万行结果时
+不需要逐行解析文本：
+    counts    int32   行数 x 列数，每行为一个解中各组分（含'?'）的计数
+    masses    float64 每行的未知元素计算质量（仅 unknown_element 模式）
+    elements  int32   每行匹配元素在 header['elements'] 中的下标（仅 unknown_element 模式）
+"""
+import json
+import mmap
+import os
+import sys
+from array import array
+from typing import Optional
+
+from data.data_manager import DataManager
+
+SESSION_MAGIC = b'EASESS01'
+SESSION_VERSION = 1
+_ALIGN = 8
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def _to_bytes(arr: array) -> bytes:
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _pack_results(results: list, mode: str, symbol_order: list[str]) -> tuple[dict, list[tuple[str, bytes]]]:
+    """
+    将结果列表编码为列数组，返回(描述信息, 二进制块列表)。
+    列按symbol_order排列，使还原出的Formula字典保持与计算器输出相同的键顺序。
+    """
+    columns: list[str] = list(symbol_order)
+    for solution in results:
+        formula = solution[0] if mode == 'unknown_element' else solution
+        for symbol in formula:
+            if symbol not in columns:
+                columns.append(symbol)
+    col_index = {symbol: k for k, symbol in enumerate(columns)}
+
+    counts = array('i', bytes(4 * len(columns) * len(results)))
+    masses = array('d')
+    element_ids = array('i')
+    elements: list[str] = []
+    element_index: dict[str, int] = {}
+    for row, solution in enumerate(results):
+        if mode == 'unknown_element':
+            formula, unknown_mass, matched_element = solution
+            if matched_element not in element_index:
+                element_index[matched_element] = len(elements)
+                elements.append(matched_element)
+            masses.append(unknown_mass)
+            element_ids.append(element_index[matched_element])
+        else:
+            formula = solution
+        base = row * len(columns)
+        for symbol, n in formula.items():
+            counts[base + col_index[symbol]] = n
+
+    info = {'mode': mode, 'rows': len(results), 'columns': columns, 'elements': elements}
+    blocks = [('counts', _to_bytes(counts))]
+    if mode == 'unknown_element':
+        blocks += [('masses', _to_bytes(masses)), ('elements', _to_bytes(element_ids))]
+    return info, blocks
+
+
+def save_session(path: str, data_manager: DataManager, params: dict,
+                 results: Optional[list] = None, mode: Optional[str] = None):
+    """将DataManager中的组分、质量分数、计算参数以及（可选的）结果写入会话文件。"""
+    header = {
+        'version': SESSION_VERSION,
+        'components': data_manager.get_all_components(),
+        'fractions': data_manager.get_all_fractions(),
+        'params': params,
+        'results': None,
+    }
+    blocks = []
+    if results is not None and mode is not None:
+        symbol_order = ['?'] + [c['symbol'] for c in header['components'] if c['symbol'] != '?']
+        info, blocks = _pack_results(results, mode, symbol_order)
+        offset = 0
+        info['blocks'] = {}
+        for name, data in blocks:
+            info['blocks'][name] = offset
+            offset += len(data) + _pad(len(data))
+        header['results'] = info
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    prefix_len = len(SESSION_MAGIC) + 4 + len(header_bytes)
+    with open(path, 'wb') as f:
+        f.write(SESSION_MAGIC)
+        f.write(len(header_bytes).to_bytes(4, 'little'))
+        f.write(header_bytes)
+        f.write(b'\0' * _pad(prefix_len))
+        for _, data in blocks:
+            f.write(data)
+            f.write(b'\0' * _pad(len(data)))
+
+
+def _read_array(buffer, typecode: str, offset: int, length: int) -> list:
+    """从映射的缓冲区中读取一段数组并转换为列表。"""
+    itemsize = array(typecode).itemsize
+    view = memoryview(buffer)[offset: offset + itemsize * length]
+    if sys.byteorder != 'little':
+        arr = array(typecode, view.tobytes())
+        arr.byteswap()
+        return arr.tolist()
+    try:
+        return view.cast(typecode).tolist()
+    finally:
+        view.release()
+
+
+def _check_blocks(info: dict, data_start: int, file_size: int):
+    """检查结果数组的描述是否完整、各二进制块是否都在文件范围内。"""
+    try:
+        n_rows = info['rows']
+        sizes = {'counts': 4 * n_rows * len(info['columns'])}
+        if info['mode'] == 'unknown_element':
+            sizes.update(masses=8 * n_rows, elements=4 * n_rows)
+        if n_rows == 0:
+            return
+        for name, size in sizes.items():
+            if data_start + info['blocks'][name] + size > file_size:
+                raise ValueError("会话文件不完整，结果数据被截断。")
+    except (KeyError, TypeError):
+        raise ValueError("会话文件已损坏：结果描述不完整。")
+
+
+def _unpack_results(buffer, data_start: int, info: dict) -> list:
+    """从二进制块中还原结果列表，格式与计算器的返回值相同。"""
+    mode = info['mode']
+    n_rows = info['rows']
+    columns = info['columns']
+    n_cols = len(columns)
+    offsets = info['blocks']
+    if n_rows == 0:
+        return []
+
+    counts = _read_array(buffer, 'i', data_start + offsets['counts'], n_rows * n_cols)
+    formulas = []
+    for row in range(n_rows):
+        base = row * n_cols
+        formulas.append({symbol: counts[base + k] for k, symbol in enumerate(columns) if counts[base + k] > 0})
+    if mode != 'unknown_element':
+        return formulas
+
+    masses = _read_array(buffer, 'd', data_start + offsets['masses'], n_rows)
+    element_ids = _read_array(buffer, 'i', data_start + offsets['elements'], n_rows)
+    elements = info['elements']
+    return [(formula, mass, elements[k]) for formula, mass, k in zip(formulas, masses, element_ids)]
+
+
+def load_session(path: str) -> dict:
+    """
+    读取会话文件，返回字典：
+    {'components', 'fractions', 'params', 'results', 'mode'}，
+    没有保存结果时 results 和 mode 为 None。文件被截断或损坏时抛出 ValueError。
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+            raise ValueError("不是有效的会话文件。")
+        header_len = int.from_bytes(f.read(4), 'little')
+        try:
+            header = json.loads(f.read(header_len).decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            header = None
+        if not isinstance(header, dict):
+            raise ValueError("会话文件已损坏：无法解析文件头。")
+        if header.get('version') != SESSION_VERSION:
+            raise ValueError(f"不支持的会话文件版本: {header.get('version')}")
+
+        try:
+            session = {
+                'components': header['components'],
+                'fractions': header['fractions'],
+                'params': header['params'],
+                'results': None,
+                'mode': None,
+            }
+            info = header['results']
+        except KeyError as e:
+            raise ValueError(f"会话文件已损坏：缺少 {e}。")
+        if info is not None:
+            prefix_len = len(SESSION_MAGIC) + 4 + header_len
+            data_start = prefix_len + _pad(prefix_len)
+            _check_blocks(info, data_start, os.fstat(f.fileno()).st_size)
+            if info['rows'] == 0:
+                session['results'] = []
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    try:
+                        session['results'] = _unpack_results(buffer, data_start, info)
+                    except IndexError:
+                        raise ValueError("会话文件已损坏：匹配元素的下标超出范围。")
+            session['mode'] = info['mode']
+    return session
+
+
+def restore_data_manager(data_manager: DataManager, session: dict):
+    """用会话中的组分和质量分数替换DataManager的当前数据。"""
+    data_manager.load_state(session['components'], session['fractions'])
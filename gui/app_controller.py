@@ -4,39 +4,67 @@
 """
 
 from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QFileDialog
+import os
 import traceback
-from data.data_manager import DataManager
+from data.data_manager import DataManager, COMPONENTS, ROW_UPDATED, TABLE_RESET
+from data.result_exporter import export_results
+from data.session import save_session, load_session, restore_data_manager
+from data.reference_library import ReferenceLibrary, REFERENCE_LIBRARY_SUFFIX
 from core.calculator import ChemicalCalculator 
+from core.constraints import resolve_fractions
+from core.governor import ResourceGovernor
 from gui.dialogs.add_component_dialog import AddComponentDialog
 from gui.dialogs.add_fraction_dialog import AddFractionDialog
 
 class AppController(QObject):
 
     # 信号
-    components_changed = pyqtSignal()    # 当组分列表变化时发射
-    fractions_changed = pyqtSignal()    # 当质量分数列表变化时发射
+    components_changed = pyqtSignal()    # 当组分列表整体替换时发射（需要重建表格）
+    fractions_changed = pyqtSignal()    # 当质量分数列表整体替换时发射
+    component_row_changed = pyqtSignal(str, int, object)   # 组分表单行变化：(变化类型, 行号, 组分字典)
+    fraction_row_changed = pyqtSignal(str, int, object)    # 质量分数表单行变化：(变化类型, 行号, (符号, 分数))
     calculation_finished = pyqtSignal(list, str)   # 当计算完成时发射，携带结果和模式
     error_occurred = pyqtSignal(str)   # 当发生错误时发射
+    calculation_limited = pyqtSignal(str)   # 计算因达到资源上限提前停止时发射（在 calculation_finished 之后），携带原因
+    session_loaded = pyqtSignal(dict)   # 当会话加载完成时发射，携带计算参数
+    reference_hits_found = pyqtSignal(list)   # 计算前查询参考库得到的吻合化合物（已加载参考库时发射）
+    reference_library_loaded = pyqtSignal(str)   # 参考库加载完成时发射，携带提示信息
+    reference_lookup_failed = pyqtSignal(str)   # 参考库查询出错时发射（计算照常进行），携带原因
 
 
     def __init__(self):
         super().__init__()
         self.data_manager = DataManager()
+        self.data_manager.add_listener(self._on_data_changed)
         self.calculator = ChemicalCalculator()
+        self.last_calculation = None   # 最近一次计算的结果及其输入，用于导出
+        self.reference_library = None   # 已加载的参考化合物库 (ReferenceLibrary)
+
+    def _on_data_changed(self, table: str, kind: str, row: int, data):
+        """把 DataManager 的变化通知转发为Qt信号。"""
+        if table == COMPONENTS:
+            if kind == TABLE_RESET:
+                self.components_changed.emit()
+            else:
+                self.component_row_changed.emit(kind, row, data)
+        else:
+            if kind == TABLE_RESET:
+                self.fractions_changed.emit()
+            else:
+                self.fraction_row_changed.emit(kind, row, data)
 
     def handle_add_component(self, parent_widget):
-        """处理添加组分的请求。"""
+        """处理添加组分的请求。表格通过 DataManager 的变化通知更新。"""
         # print('IN CONTROLLER ADD COMPONENT')
-        if AddComponentDialog.show_dialog(self.data_manager, parent_widget):
-            self.components_changed.emit() # 数据已变，发射信号
+        AddComponentDialog.show_dialog(self.data_manager, parent_widget)
 
     def handle_add_fraction(self, parent_widget):
         """处理添加质量分数的请求。"""
         if not self.data_manager.get_component_symbols():
             self.error_occurred.emit("请先至少定义一个化学组分。")
             return
-        if AddFractionDialog.show_dialog(self.data_manager, parent_widget):
-            self.fractions_changed.emit() # 数据已变，发射信号
+        AddFractionDialog.show_dialog(self.data_manager, parent_widget)
     
     def handle_component_edited(self, row, new_formula):
         """处理组分表格编辑。"""
@@ -44,7 +72,8 @@ class AppController(QObject):
             self.data_manager.update_component_formula(row, new_formula)
         except ValueError as e:
             self.error_occurred.emit(str(e))
-            self.components_changed.emit() # 发射信号以恢复UI为原始数据
+            # 发射信号以把该行恢复为原始数据
+            self.component_row_changed.emit(ROW_UPDATED, row, self.data_manager.get_component(row))
 
     def handle_fraction_edited(self, symbol, new_fraction_str):
         """处理质量分数表格编辑。"""
@@ -56,8 +85,16 @@ class AppController(QObject):
             self.fractions_changed.emit() # 发射信号以恢复UI
 
     def run_calculation(self, params: dict):
-        """处理计算请求。"""
+        """
+        处理计算请求。
+        params 中的 max_results / max_memory_mb / max_cpu_seconds 为资源上限，
+        达到上限时显示部分结果，并通过 calculation_limited 给出原因。
+        限制了结果数量时按复杂度顺序枚举，保留的是最简单的那些化学式。
+        已加载参考库时，先用实测质量分数查询参考库，通过 reference_hits_found 给出吻合的化合物。
+        """
         try:
+            governor = ResourceGovernor.from_params(params)
+            ordered = params.get('ordered', params.get('max_results') is not None)
             components = self.data_manager.get_all_components()
             fractions = self.data_manager.get_all_fractions()
 
@@ -66,6 +103,7 @@ class AppController(QObject):
             # print(f'IN CONTROLLER, {components}')
             has_unknown = '?' in [c['symbol'] for c in components]
             # unknown_frac_given = '?' in fractions
+            self._lookup_references(fractions, params, has_unknown)
 
             if has_unknown :
                 results = self.calculator.solve_for_single_unknown(
@@ -73,8 +111,17 @@ class AppController(QObject):
                     mass_fractions=fractions,
                     n_max=params['n_max'],
                     tolerance=params['mass_tolerance'],
-                    unknown_filter=params['unknown_filter']
+                    unknown_filter=params['unknown_filter'],
+                    constraints=params.get('constraints'),
+                    reduce_components=params.get('reduce_components', False),
+                    element_tolerances=params.get('element_tolerances'),
+                    remainder_element=params.get('remainder_element'),
+                    governor=governor,
+                    ordered=ordered,
+                    engine=params.get('unknown_engine', 'recursive'),
+                    include_synthetic=params.get('include_synthetic', False)
                 )
+                self._remember_calculation(results, 'unknown_element', components, fractions)
                 self.calculation_finished.emit(results, 'unknown_element')
             else:
                 if not fractions:
@@ -83,9 +130,138 @@ class AppController(QObject):
                     components_data=components,
                     mass_fractions=fractions,
                     n_max=params['n_max'],
-                    tolerance=params['fraction_tolerance']
+                    tolerance=params['fraction_tolerance'],
+                    constraints=params.get('constraints'),
+                    engine=params.get('engine', 'product'),
+                    reduce_components=params.get('reduce_components', False),
+                    element_tolerances=params.get('element_tolerances'),
+                    remainder_element=params.get('remainder_element'),
+                    governor=governor,
+                    ordered=ordered
                 )
+                self._remember_calculation(results, 'general', components, fractions)
                 self.calculation_finished.emit(results, 'general')
+            if governor is not None and governor.stop_reason:
+                self.calculation_limited.emit(governor.stop_message)
+        except Exception as e:
+            traceback.print_exc()
+            self.error_occurred.emit(f"计算错误: {e}")
+
+    def _lookup_references(self, fractions: dict, params: dict, has_unknown: bool):
+        """
+        用与求解相同的公差（含逐元素公差和差减元素）查询参考库。
+        查询失败只通过 reference_lookup_failed 给出警告，不影响随后的计算。
+        """
+        if self.reference_library is None:
+            return
+        tolerance = params['mass_tolerance'] if has_unknown else params['fraction_tolerance']
+        remainder_element = params.get('remainder_element')
+        try:
+            targets, tolerances, _ = resolve_fractions(
+                fractions, tolerance, params.get('element_tolerances'),
+                remainder_element if remainder_element != '?' else None)
+            hits = self.reference_library.lookup(targets, tolerances)
+        except Exception as e:
+            traceback.print_exc()
+            self.reference_lookup_failed.emit(f"参考库查询失败，已跳过: {e}")
+            return
+        self.reference_hits_found.emit(hits)
+
+    def handle_load_reference_library(self, parent_widget):
+        """处理“加载参考化合物库”请求：打开 .refdb 文件，或由化学式列表建立并打开。"""
+        path, _ = QFileDialog.getOpenFileName(
+            parent_widget, "加载参考化合物库", "",
+            f"参考化合物库 (*{REFERENCE_LIBRARY_SUFFIX});;化学式列表 (*.txt *.csv)"
+        )
+        if not path:
+            return
+        try:
+            if path.lower().endswith(REFERENCE_LIBRARY_SUFFIX):
+                library = ReferenceLibrary(path)
+            else:
+                library = ReferenceLibrary.build_from_file(path)
+        except Exception as e:
+            traceback.print_exc()
+            self.error_occurred.emit(f"加载参考库失败: {e}")
+            return
+
+        if self.reference_library is not None:
+            self.reference_library.close()
+        self.reference_library = library
+        message = f"已加载参考库 {os.path.basename(library.path)}：{len(library)} 个化合物"
+        if library.skipped:
+            message += f"（跳过 {library.skipped} 个无法解析的化学式）"
+        self.reference_library_loaded.emit(message)
+
+    def _remember_calculation(self, results, mode, components, fractions):
+        """保存最近一次计算的结果和输入，导出时需要用组分数据计算质量和残差。"""
+        self.last_calculation = {
+            'results': results,
+            'mode': mode,
+            'components': components,
+            'fractions': fractions,
+        }
+
+    def handle_save_results(self, parent_widget):
+        """处理“保存结果”请求：选择文件并流式导出最近一次的计算结果。"""
+        if not self.last_calculation or not self.last_calculation['results']:
+            self.error_occurred.emit("没有可以保存的计算结果。")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            parent_widget, "保存结果", "results.csv",
+            "CSV 文件 (*.csv);;JSON Lines 文件 (*.jsonl);;Parquet 文件 (*.parquet)"
+        )
+        if not path:
+            return
+        try:
+            export_results(
+                path,
+                self.last_calculation['results'],
+                self.last_calculation['mode'],
+                self.last_calculation['components'],
+                self.last_calculation['fractions'],
+            )
+        except Exception as e:
+            traceback.print_exc()
+            self.error_occurred.emit(f"保存结果失败: {e}")
+
+    def handle_save_session(self, parent_widget, params: dict):
+        """处理“保存会话”请求：保存组分、质量分数、计算参数和最近一次的结果。"""
+        path, _ = QFileDialog.getSaveFileName(
+            parent_widget, "保存会话", "session.eas", "会话文件 (*.eas)"
+        )
+        if not path:
+            return
+        results, mode = None, None
+        if self.last_calculation:
+            results, mode = self.last_calculation['results'], self.last_calculation['mode']
+        try:
+            save_session(path, self.data_manager, params, results, mode)
         except Exception as e:
             traceback.print_exc()
-            self.error_occurred.emit(f"计算错误: {e}")
\ No newline at end of file
+            self.error_occurred.emit(f"保存会话失败: {e}")
+
+    def handle_open_session(self, parent_widget):
+        """处理“打开会话”请求：恢复数据和结果表格，不重新计算。"""
+        path, _ = QFileDialog.getOpenFileName(
+            parent_widget, "打开会话", "", "会话文件 (*.eas)"
+        )
+        if not path:
+            return
+        try:
+            session = load_session(path)
+            restore_data_manager(self.data_manager, session)
+        except Exception as e:
+            traceback.print_exc()
+            self.error_occurred.emit(f"打开会话失败: {e}")
+            return
+
+        # 表格已由 load_state 的 TABLE_RESET 通知重建
+        self.session_loaded.emit(session['params'])
+        if session['results'] is not None:
+            self._remember_calculation(session['results'], session['mode'],
+                                       self.data_manager.get_all_components(),
+                                       self.data_manager.get_all_fractions())
+            self.calculation_finished.emit(session['results'], session['mode'])
+        else:
+            self.last_calculation = None
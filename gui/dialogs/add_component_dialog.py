@@ -23,6 +23,8 @@ class AddComponentDialog(QDialog):
         
         self.symbol_input = QLineEdit()
         self.formula_input = QLineEdit()
+        self.charge_input = QLineEdit()
+        self.charge_input.setPlaceholderText("0")
         
         self.error_label = QLabel("")
         self.error_label.setStyleSheet("color: red;")
@@ -32,6 +34,7 @@ class AddComponentDialog(QDialog):
         form_layout = QFormLayout()
         form_layout.addRow("组分符号 (例如: OAc, C, ?):", self.symbol_input)
         form_layout.addRow("化学式 (仅原子团, 例如: C2H3O2):", self.formula_input)
+        form_layout.addRow("电荷 (可选, 例如: SO4 为 -2):", self.charge_input)
         layout.addLayout(form_layout)
         layout.addWidget(self.error_label) # 将错误标签添加到布局中
         
@@ -45,6 +48,7 @@ class AddComponentDialog(QDialog):
         # 当用户开始编辑时，清除错误信息
         self.symbol_input.textChanged.connect(self.error_label.clear)
         self.formula_input.textChanged.connect(self.error_label.clear)
+        self.charge_input.textChanged.connect(self.error_label.clear)
         
         # 获取实际的OK按钮
         self.real_ok_button = button_box.button(QDialogButtonBox.Ok)
@@ -62,9 +66,10 @@ class AddComponentDialog(QDialog):
             # print('IN VALIDATE')
             symbol = self.symbol_input.text().strip()
             formula = self.formula_input.text().strip()
+            charge = self.charge_input.text().strip()
             
             # 直接调用DataManager的方法，所有验证逻辑都在那里
-            self.data_manager.add_component(symbol, formula)
+            self.data_manager.add_component(symbol, formula, charge)
             
             # 验证通过，接受对话框
             self.accept()
@@ -80,9 +85,13 @@ class AddComponentDialog(QDialog):
         self.formula_input.returnPressed.connect(
             self._trigger_accept
         )
-        # 设置两个输入框都接受Enter键
+        self.charge_input.returnPressed.connect(
+            self._trigger_accept
+        )
+        # 设置输入框都接受Enter键
         self.symbol_input.setFocusPolicy(Qt.StrongFocus)
         self.formula_input.setFocusPolicy(Qt.StrongFocus)
+        self.charge_input.setFocusPolicy(Qt.StrongFocus)
 
     def _trigger_accept(self):
         """触发确认操作（模拟点击OK按钮）"""
@@ -5,7 +5,7 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QMessageBox, QTableWidget, QGroupBox,
                              QTableWidgetItem, QAbstractItemView, QHeaderView,
                              QFormLayout, QLineEdit, QRadioButton, QButtonGroup,
-                             QFrame, QShortcut)
+                             QFrame, QShortcut, QAction, QCheckBox, QComboBox)
 from PyQt5.QtGui import QIntValidator, QDoubleValidator, QKeySequence
 from PyQt5.QtCore import Qt 
 from PyQt5.QtGui import QIcon 
@@ -17,6 +17,8 @@ from gui.widgets.results_viewer import ResultsViewerWidget
 
 from core.calculator import ChemicalCalculator
 from gui.app_controller import AppController
+from core.utils import parse_element_tolerances, format_element_tolerances
+from data.data_manager import ROW_INSERTED, ROW_UPDATED, ROW_REMOVED
 
 class MainWindow(QMainWindow):
 
@@ -24,10 +26,12 @@ class MainWindow(QMainWindow):
         super().__init__(parent)
         self.calculator = ChemicalCalculator()
         self._is_refreshing_tables = False
+        self._trash_icon = self.style().standardIcon(QStyle.SP_TrashIcon)
         self.controller = controller
         self.setWindowTitle("元素分析计算器 Beta Version")
         self.setGeometry(100, 100, 1500, 600)
         self._setup_ui()
+        self._create_menus()
 
         self._create_shortcuts()    # 创建快捷键
         self._connect_signals()     # 将所有信号连接集中处理
@@ -49,6 +53,26 @@ class MainWindow(QMainWindow):
         main_layout.addLayout(center_layout, 1)    
         main_layout.addWidget(self.results_viewer, 4)
 
+    def _create_menus(self):
+        """创建菜单栏：会话的保存/加载、结果导出和参考化合物库。"""
+        file_menu = self.menuBar().addMenu("文件")
+
+        self.open_session_action = QAction("打开会话...", self)
+        self.open_session_action.setShortcut(QKeySequence.Open)
+        file_menu.addAction(self.open_session_action)
+
+        self.save_session_action = QAction("保存会话...", self)
+        self.save_session_action.setShortcut(QKeySequence.Save)
+        file_menu.addAction(self.save_session_action)
+
+        file_menu.addSeparator()
+        self.save_results_action = QAction("保存结果...", self)
+        file_menu.addAction(self.save_results_action)
+
+        file_menu.addSeparator()
+        self.load_reference_action = QAction("加载参考化合物库...", self)
+        file_menu.addAction(self.load_reference_action)
+
     def _create_shortcuts(self):
         """初始化应用程序级别的快捷键。"""
         # 创建快捷键 'A'，用于添加组分
@@ -78,6 +102,21 @@ class MainWindow(QMainWindow):
             lambda: self.controller.handle_add_fraction(self)
         )
         self.calculate_button.clicked.connect(self._on_calculate_clicked)
+        self.results_viewer.save_requested.connect(
+            lambda: self.controller.handle_save_results(self)
+        )
+        self.save_results_action.triggered.connect(
+            lambda: self.controller.handle_save_results(self)
+        )
+        self.save_session_action.triggered.connect(
+            self._on_save_session_triggered
+        )
+        self.load_reference_action.triggered.connect(
+            lambda: self.controller.handle_load_reference_library(self)
+        )
+        self.open_session_action.triggered.connect(
+            lambda: self.controller.handle_open_session(self)
+        )
 
         self.components_table.itemChanged.connect(self._on_component_edited)
         self.fractions_table.itemChanged.connect(self._on_fraction_edited)
@@ -85,25 +124,122 @@ class MainWindow(QMainWindow):
         # 2. Controller -> UI
         self.controller.components_changed.connect(self._refresh_components_table)
         self.controller.fractions_changed.connect(self._refresh_fractions_table)
+        self.controller.component_row_changed.connect(self._on_component_row_changed)
+        self.controller.fraction_row_changed.connect(self._on_fraction_row_changed)
         self.controller.components_changed.connect(self._update_ui_visibility)
+        self.controller.component_row_changed.connect(lambda *_: self._update_ui_visibility())
         self.controller.calculation_finished.connect(self.results_viewer.display_results)
         self.controller.error_occurred.connect(self._show_error_message)
+        self.controller.calculation_limited.connect(self._show_error_message)
+        self.controller.session_loaded.connect(self._apply_params)
+        self.controller.reference_hits_found.connect(self.results_viewer.display_reference_hits)
+        self.controller.reference_library_loaded.connect(self.statusBar().showMessage)
+        self.controller.reference_lookup_failed.connect(self._show_error_message)
 
     def _on_calculate_clicked(self):
         """当计算按钮被点击时，从UI收集配置参数并传递给控制器。"""
+        try:
+            params = self._collect_params()
+        except ValueError as e:
+            self._show_error_message(str(e))
+            return
+        self.controller.run_calculation(params)
+
+    def _on_save_session_triggered(self):
+        try:
+            params = self._collect_params()
+        except ValueError as e:
+            self._show_error_message(str(e))
+            return
+        self.controller.handle_save_session(self, params)
+
+    def _collect_params(self) -> dict:
+        """从UI收集计算参数。"""
         params = {
             "n_max": int(self.n_max_input.text()),
             "mass_tolerance": float(self.mass_tol_input.text()),
-            "fraction_tolerance": float(self.frac_tol_input.text())
+            "fraction_tolerance": float(self.frac_tol_input.text()),
+            "engine": self.engine_combo.currentData(),
+            "unknown_engine": self.unknown_engine_combo.currentData(),
+            "reduce_components": self.reduce_components_check.isChecked(),
+            "element_tolerances": parse_element_tolerances(self.element_tol_input.text())
         }
+        remainder_element = self.remainder_element_input.text().strip()
+        if remainder_element:
+            params["remainder_element"] = remainder_element
         if self.metal_radio.isChecked():
             params["unknown_filter"] = 'metal'
         elif self.nonmetal_radio.isChecked():
             params["unknown_filter"] = 'nonmetal'
         else:
             params["unknown_filter"] = 'unlimited'
-        
-        self.controller.run_calculation(params)
+        params["include_synthetic"] = self.include_synthetic_check.isChecked()
+
+        constraints = {}
+        if self.rdbe_min_input.text().strip():
+            constraints["rdbe_min"] = float(self.rdbe_min_input.text())
+        if self.rdbe_max_input.text().strip():
+            constraints["rdbe_max"] = float(self.rdbe_max_input.text())
+        if self.nitrogen_rule_check.isChecked():
+            constraints["nitrogen_rule"] = True
+        if self.charge_neutral_check.isChecked():
+            constraints["charge_neutral"] = True
+        if self.molar_mass_input.text().strip():
+            constraints["molar_mass"] = float(self.molar_mass_input.text())
+            constraints["molar_mass_tolerance"] = float(self.molar_mass_tol_input.text())
+        params["constraints"] = constraints
+
+        # 资源上限：留空表示不限制
+        if self.max_results_input.text().strip():
+            params["max_results"] = int(self.max_results_input.text())
+        if self.max_memory_input.text().strip():
+            params["max_memory_mb"] = float(self.max_memory_input.text())
+        if self.max_cpu_input.text().strip():
+            params["max_cpu_seconds"] = float(self.max_cpu_input.text())
+        return params
+
+    def _apply_params(self, params: dict):
+        """将加载的计算参数写回UI (用于打开会话)。"""
+        if 'n_max' in params:
+            self.n_max_input.setText(str(params['n_max']))
+        if 'mass_tolerance' in params:
+            self.mass_tol_input.setText(str(params['mass_tolerance']))
+        if 'fraction_tolerance' in params:
+            self.frac_tol_input.setText(str(params['fraction_tolerance']))
+        engine_index = self.engine_combo.findData(params.get('engine', 'product'))
+        if engine_index >= 0:
+            self.engine_combo.setCurrentIndex(engine_index)
+        engine_index = self.unknown_engine_combo.findData(params.get('unknown_engine', 'recursive'))
+        if engine_index >= 0:
+            self.unknown_engine_combo.setCurrentIndex(engine_index)
+        self.reduce_components_check.setChecked(bool(params.get('reduce_components')))
+        self.element_tol_input.setText(format_element_tolerances(params.get('element_tolerances') or {}))
+        self.remainder_element_input.setText(params.get('remainder_element') or "")
+        unknown_filter = params.get('unknown_filter', 'unlimited')
+        if unknown_filter == 'metal':
+            self.metal_radio.setChecked(True)
+        elif unknown_filter == 'nonmetal':
+            self.nonmetal_radio.setChecked(True)
+        else:
+            self.unlimited_radio.setChecked(True)
+        self.include_synthetic_check.setChecked(bool(params.get('include_synthetic')))
+
+        constraints = params.get('constraints') or {}
+        rdbe_min, rdbe_max = constraints.get('rdbe_min'), constraints.get('rdbe_max')
+        self.rdbe_min_input.setText("" if rdbe_min is None else str(rdbe_min))
+        self.rdbe_max_input.setText("" if rdbe_max is None else str(rdbe_max))
+        self.nitrogen_rule_check.setChecked(bool(constraints.get('nitrogen_rule')))
+        self.charge_neutral_check.setChecked(bool(constraints.get('charge_neutral')))
+        molar_mass = constraints.get('molar_mass')
+        self.molar_mass_input.setText("" if molar_mass is None else str(molar_mass))
+        if 'molar_mass_tolerance' in constraints:
+            self.molar_mass_tol_input.setText(str(constraints['molar_mass_tolerance']))
+
+        for line_edit, key in ((self.max_results_input, 'max_results'),
+                               (self.max_memory_input, 'max_memory_mb'),
+                               (self.max_cpu_input, 'max_cpu_seconds')):
+            value = params.get(key)
+            line_edit.setText("" if value is None else str(value))
 
     def _on_component_edited(self, item: QTableWidgetItem):
         """更新以适应新的列索引"""
@@ -116,19 +252,22 @@ class MainWindow(QMainWindow):
             # 符号列现在是第1列
             if col == 1:
                 # 注意：这里需要获取旧符号，它仍然在DataManager中
-                old_symbol = self.controller.data_manager.get_all_components()[row]['symbol']
+                old_symbol = self.controller.data_manager.get_component(row)['symbol']
                 new_symbol = item.text().strip()
-                if old_symbol != new_symbol: # 仅在真正改变时才更新
+                if old_symbol != new_symbol: # 仅在真正改变时才更新，分数表通过变化通知同步
                     self.controller.data_manager.update_component_symbol(row, new_symbol)
-                    self._refresh_fractions_table() # 符号改变可能影响分数表
             # 化学式列现在是第2列
             elif col == 2:
                 new_formula = item.text().strip()
                 self.controller.data_manager.update_component_formula(row, new_formula)
+            # 电荷列是第3列
+            elif col == 3:
+                self.controller.data_manager.update_component_charge(row, item.text().strip())
 
         except ValueError as e:
             QMessageBox.critical(self, "编辑错误", str(e))
-            self._refresh_components_table()
+            # 只把这一行恢复为DataManager中的数据
+            self._on_component_row_changed(ROW_UPDATED, row, self.controller.data_manager.get_component(row))
 
     def _on_fraction_edited(self, item: QTableWidgetItem):
         """更新以适应新的列索引"""
@@ -140,34 +279,65 @@ class MainWindow(QMainWindow):
             self.controller.data_manager.update_fraction_value(symbol, item.text().strip())
         except (ValueError, TypeError) as e:
             QMessageBox.critical(self, "编辑错误", str(e))
-            self._refresh_fractions_table()
+            fraction = self.controller.data_manager.get_all_fractions()[symbol]
+            self._on_fraction_row_changed(ROW_UPDATED, row, (symbol, fraction))
+
+    def _create_delete_button(self, table: QTableWidget, on_delete) -> QPushButton:
+        """
+        创建第0列的删除按钮。按钮在点击时才根据自身位置确定所在行，
+        因此其他行插入或删除后不需要重新创建。
+        """
+        delete_button = QPushButton()
+        # 使用Qt的标准垃圾箱图标
+        delete_button.setIcon(self._trash_icon)
+        delete_button.clicked.connect(
+            lambda _: on_delete(table.indexAt(delete_button.pos()).row())
+        )
+        return delete_button
+
+    def _set_table_text(self, table: QTableWidget, row: int, col: int, text: str, editable: bool = True):
+        """设置单元格文本；单元格已存在时只在文本变化时更新。"""
+        item = table.item(row, col)
+        if item is None:
+            item = QTableWidgetItem(text)
+            if not editable:
+                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            table.setItem(row, col, item)
+        elif item.text() != text:
+            item.setText(text)
+
+    def _set_fraction_row(self, row: int, symbol: str, fraction: float):
+        table = self.fractions_table
+        delete_button = table.cellWidget(row, 0)
+        if delete_button is None:
+            delete_button = self._create_delete_button(table, self._on_delete_fraction_row)
+            table.setCellWidget(row, 0, delete_button)
+        delete_button.setToolTip(f"删除质量分数 '{symbol}'")
+        # 填充数据（列号+1）
+        self._set_table_text(table, row, 1, symbol, editable=False)
+        self._set_table_text(table, row, 2, str(fraction))
+
+    def _on_fraction_row_changed(self, kind: str, row: int, data: tuple):
+        """按 DataManager 的变化通知只更新质量分数表格中变化的一行。"""
+        self._is_refreshing_tables = True
+        if kind == ROW_INSERTED:
+            self.fractions_table.insertRow(row)
+            self._set_fraction_row(row, *data)
+        elif kind == ROW_UPDATED:
+            self._set_fraction_row(row, *data)
+        elif kind == ROW_REMOVED:
+            self.fractions_table.removeRow(row)
+        self._is_refreshing_tables = False
 
     def _refresh_fractions_table(self):
-        """刷新UI，现在在第0列添加删除按钮。"""
+        """重建整张质量分数表格（仅在数据被整体替换时使用），第0列为删除按钮。"""
         self._is_refreshing_tables = True
         self.fractions_table.setRowCount(0)
 
-        fractions = self.controller.data_manager.get_all_fractions()
-        self.fractions_table.setRowCount(len(fractions))
-
-        for row, (symbol, fraction) in enumerate(sorted(fractions.items())):
-            delete_button = QPushButton()
-            icon = self.style().standardIcon(QStyle.SP_TrashIcon)
-            delete_button.setIcon(icon)
-            delete_button.setToolTip(f"删除质量分数 '{symbol}'")
-            delete_button.clicked.connect(lambda _, r=row: self._on_delete_fraction_row(r))
-            self.fractions_table.setCellWidget(row, 0, delete_button)
-            
-            # 填充数据（列号+1）
-            symbol_item = QTableWidgetItem(symbol)
-            symbol_item.setFlags(symbol_item.flags() & ~Qt.ItemIsEditable)
-            self.fractions_table.setItem(row, 1, symbol_item)
-            self.fractions_table.setItem(row, 2, QTableWidgetItem(str(fraction)))
-            
-        self.fractions_table.setColumnWidth(0, 32)
-        self.fractions_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
-        self.fractions_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.fractions_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        rows = self.controller.data_manager.get_fraction_rows()
+        self.fractions_table.setRowCount(len(rows))
+        for row, (symbol, fraction) in enumerate(rows):
+            self._set_fraction_row(row, symbol, fraction)
         self._is_refreshing_tables = False
 
     def _update_ui_visibility(self):
@@ -184,9 +354,15 @@ class MainWindow(QMainWindow):
         # 组分表格
         comp_group = QGroupBox("1. 组分定义")
         comp_layout = QVBoxLayout(comp_group)
-        self.components_table = QTableWidget(0, 3) 
-        self.components_table.setHorizontalHeaderLabels(["", "符号", "化学式"])
+        self.components_table = QTableWidget(0, 4) 
+        self.components_table.setHorizontalHeaderLabels(["", "符号", "化学式", "电荷"])
         self.components_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # 调整列宽
+        self.components_table.setColumnWidth(0, 32) # 设置删除按钮列为固定窄宽度
+        self.components_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
+        self.components_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.components_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.components_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
         comp_layout.addWidget(self.components_table)
         self.add_comp_button = QPushButton("添加组分...(A)")
         comp_layout.addWidget(self.add_comp_button)
@@ -198,6 +374,10 @@ class MainWindow(QMainWindow):
         self.fractions_table = QTableWidget(0, 3)
         self.fractions_table.setHorizontalHeaderLabels(["", "符号", "分数 (%)"])
         self.fractions_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.fractions_table.setColumnWidth(0, 32)
+        self.fractions_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
+        self.fractions_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.fractions_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
         frac_layout.addWidget(self.fractions_table)
         self.add_frac_button = QPushButton("添加质量分数...(F)")
         frac_layout.addWidget(self.add_frac_button)
@@ -222,8 +402,70 @@ class MainWindow(QMainWindow):
         param_form_layout.addRow("最大原子计数 (n_max):", self.n_max_input)
         param_form_layout.addRow("原子质量公差 (g/mol):", self.mass_tol_input)
         param_form_layout.addRow("质量分数公差 (%):", self.frac_tol_input)
+        # 各元素单独的公差，未列出的元素使用上面的统一公差
+        self.element_tol_input = QLineEdit()
+        self.element_tol_input.setPlaceholderText("如 H:0.1, N:0.2 (留空使用统一公差)")
+        param_form_layout.addRow("各元素公差:", self.element_tol_input)
+        self.remainder_element_input = QLineEdit()
+        self.remainder_element_input.setPlaceholderText("如 O，其分数 = 100 - 其余元素之和")
+        self.remainder_element_input.setToolTip("该元素未实际测定，质量分数由差减法得到，公差为其余元素公差之和")
+        param_form_layout.addRow("差减法元素:", self.remainder_element_input)
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItem("逐一枚举", 'product')
+        self.engine_combo.addItem("增量枚举 (结果与逐一枚举相同，更快)", 'odometer')
+        self.engine_combo.addItem("折半搜索 (组分较多时)", 'mitm')
+        self.engine_combo.addItem("原子数比值法 (仅单质组分)", 'ratio')
+        param_form_layout.addRow("通用模式搜索引擎:", self.engine_combo)
+        self.unknown_engine_combo = QComboBox()
+        self.unknown_engine_combo.addItem("逐个递归", 'recursive')
+        self.unknown_engine_combo.addItem("向量化 (需要numpy)", 'vectorized')
+        param_form_layout.addRow("未知元素模式引擎:", self.unknown_engine_combo)
+        self.reduce_components_check = QCheckBox("合并重复/线性相关的组分 (如 OH = O + H)")
+        self.reduce_components_check.setToolTip("只在基组分上搜索，元素组成相同的化学式只保留一个")
+        param_form_layout.addRow(self.reduce_components_check)
         config_group_layout.addLayout(param_form_layout) # 将表单布局添加到组的主布局中
 
+        # 化学规则约束：留空表示不限制
+        rule_form_layout = QFormLayout()
+        self.rdbe_min_input = QLineEdit("")
+        self.rdbe_min_input.setValidator(QDoubleValidator(-100.0, 1000.0, 1))
+        self.rdbe_min_input.setPlaceholderText("不限")
+        self.rdbe_max_input = QLineEdit("")
+        self.rdbe_max_input.setValidator(QDoubleValidator(-100.0, 1000.0, 1))
+        self.rdbe_max_input.setPlaceholderText("不限")
+        rdbe_layout = QHBoxLayout()
+        rdbe_layout.addWidget(self.rdbe_min_input)
+        rdbe_layout.addWidget(self.rdbe_max_input)
+        self.nitrogen_rule_check = QCheckBox("氮规则 (偶电子)")
+        self.charge_neutral_check = QCheckBox("电荷平衡")
+        rule_form_layout.addRow("不饱和度范围 (最小/最大):", rdbe_layout)
+        rule_form_layout.addRow(self.nitrogen_rule_check)
+        rule_form_layout.addRow(self.charge_neutral_check)
+        self.molar_mass_input = QLineEdit("")
+        self.molar_mass_input.setValidator(QDoubleValidator(1.0, 100000.0, 4))
+        self.molar_mass_input.setPlaceholderText("不限")
+        self.molar_mass_tol_input = QLineEdit("0.5")
+        self.molar_mass_tol_input.setValidator(QDoubleValidator(0.0001, 100.0, 4))
+        rule_form_layout.addRow("分子量 (g/mol, 如质谱):", self.molar_mass_input)
+        rule_form_layout.addRow("分子量公差 (g/mol):", self.molar_mass_tol_input)
+        config_group_layout.addLayout(rule_form_layout)
+
+        # 资源上限：达到任一上限时停止计算并显示已找到的部分结果，留空表示不限制
+        limit_form_layout = QFormLayout()
+        self.max_results_input = QLineEdit("")
+        self.max_results_input.setValidator(QIntValidator(1, 100000000))
+        self.max_results_input.setPlaceholderText("不限")
+        self.max_memory_input = QLineEdit("")
+        self.max_memory_input.setValidator(QDoubleValidator(1.0, 1000000.0, 0))
+        self.max_memory_input.setPlaceholderText("不限")
+        self.max_cpu_input = QLineEdit("")
+        self.max_cpu_input.setValidator(QDoubleValidator(0.1, 1000000.0, 1))
+        self.max_cpu_input.setPlaceholderText("不限")
+        limit_form_layout.addRow("结果数量上限:", self.max_results_input)
+        limit_form_layout.addRow("内存上限 (MB):", self.max_memory_input)
+        limit_form_layout.addRow("CPU时间上限 (秒):", self.max_cpu_input)
+        config_group_layout.addLayout(limit_form_layout)
+
         # 过滤器 
         # 创建一个容器QWidget
         self.filter_container = QWidget()
@@ -252,6 +494,8 @@ class MainWindow(QMainWindow):
         filter_hbox_layout.addWidget(self.nonmetal_radio)
         filter_hbox_layout.addWidget(self.unlimited_radio)
         filter_vbox_layout.addLayout(filter_hbox_layout)
+        self.include_synthetic_check = QCheckBox("包含非天然元素 (Tc、Pm、Po 及更重的放射性元素)")
+        filter_vbox_layout.addWidget(self.include_synthetic_check)
 
         # 将过滤器容器添加到组的主布局中
         config_group_layout.addWidget(self.filter_container)
@@ -267,51 +511,53 @@ class MainWindow(QMainWindow):
         
         return center_vbox_layout
 
+    def _set_component_row(self, row: int, comp: dict):
+        table = self.components_table
+        delete_button = table.cellWidget(row, 0)
+        if delete_button is None:
+            delete_button = self._create_delete_button(table, self._on_delete_component_row)
+            table.setCellWidget(row, 0, delete_button)
+        delete_button.setToolTip(f"删除组分 '{comp['symbol']}'")
+        # 填充数据（列号+1）
+        self._set_table_text(table, row, 1, comp['symbol'])
+        self._set_table_text(table, row, 2, comp['formula'])
+        self._set_table_text(table, row, 3, str(comp.get('charge', 0)))
+
+    def _on_component_row_changed(self, kind: str, row: int, comp: dict):
+        """按 DataManager 的变化通知只更新组分表格中变化的一行。"""
+        self._is_refreshing_tables = True
+        if kind == ROW_INSERTED:
+            self.components_table.insertRow(row)
+            self._set_component_row(row, comp)
+        elif kind == ROW_UPDATED:
+            self._set_component_row(row, comp)
+        elif kind == ROW_REMOVED:
+            self.components_table.removeRow(row)
+        self._is_refreshing_tables = False
+
     def _refresh_components_table(self):
-        """刷新UI，现在在第0列添加删除按钮。"""
+        """重建整张组分表格（仅在数据被整体替换时使用），第0列为删除按钮。"""
         self._is_refreshing_tables = True
         self.components_table.setRowCount(0)
         
         components = self.controller.data_manager.get_all_components()
         self.components_table.setRowCount(len(components))
-
         for row, comp in enumerate(components):
-            delete_button = QPushButton()
-            # 使用Qt的标准垃圾箱图标
-            icon = self.style().standardIcon(QStyle.SP_TrashIcon)
-            delete_button.setIcon(icon)
-            delete_button.setToolTip(f"删除组分 '{comp['symbol']}'")
-            # 使用lambda捕获正确的行号
-            delete_button.clicked.connect(lambda _, r=row: self._on_delete_component_row(r))
-            self.components_table.setCellWidget(row, 0, delete_button)
-
-            # 填充数据（列号+1）
-            self.components_table.setItem(row, 1, QTableWidgetItem(comp['symbol']))
-            self.components_table.setItem(row, 2, QTableWidgetItem(comp['formula']))
-
-        # 调整列宽
-        self.components_table.setColumnWidth(0, 32) # 设置删除按钮列为固定窄宽度
-        self.components_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
-        self.components_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.components_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+            self._set_component_row(row, comp)
         self._is_refreshing_tables = False
 
     def _on_delete_component_row(self, row: int):
-        """当组分表格中的删除按钮被点击时触发。"""
-        self.controller.data_manager.delete_component(row)
-        # 删除后，需要刷新两个表格，因为质量分数列表可能也已改变
-        self._refresh_components_table()
-        self._refresh_fractions_table()
-        self._update_ui_visibility()
+        """当组分表格中的删除按钮被点击时触发。两个表格通过变化通知更新。"""
+        if row >= 0:
+            self.controller.data_manager.delete_component(row)
 
     def _on_delete_fraction_row(self, row: int):
         """当质量分数表格中的删除按钮被点击时触发。"""
         # 我们需要从表格中获取符号，因为DataManager按符号删除质量分数
         # 注意：符号现在在第1列
-        symbol_item = self.fractions_table.item(row, 1)
+        symbol_item = self.fractions_table.item(row, 1) if row >= 0 else None
         if symbol_item:
             self.controller.data_manager.delete_fraction(symbol_item.text())
-            self._refresh_fractions_table()
 
     def _update_ui_visibility(self):
         has_unknown = '?' in self.controller.data_manager.get_component_symbols()
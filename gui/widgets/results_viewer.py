@@ -1,8 +1,15 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QGroupBox, QTableWidget, 
-                             QTableWidgetItem, QHeaderView, QAbstractItemView)
+                             QTableWidgetItem, QHeaderView, QAbstractItemView,
+                             QPushButton)
+from PyQt5.QtCore import pyqtSignal
+
+from core.utils import format_formula
 
 class ResultsViewerWidget(QWidget):
     """展示不同模式下的计算结果。"""
+
+    save_requested = pyqtSignal()   # 点击“保存结果”按钮时发射
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._setup_ui()
@@ -17,12 +24,28 @@ class ResultsViewerWidget(QWidget):
         self.table = QTableWidget()
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         group_layout.addWidget(self.table)
+
+        self.save_button = QPushButton("保存结果...")
+        self.save_button.setEnabled(False)
+        self.save_button.clicked.connect(lambda: self.save_requested.emit())
+        group_layout.addWidget(self.save_button)
+
+        # 参考库匹配：加载参考化合物库后才显示
+        self.reference_group = QGroupBox("参考库匹配")
+        reference_layout = QVBoxLayout(self.reference_group)
+        self.reference_table = QTableWidget()
+        self.reference_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.reference_table.setMaximumHeight(160)
+        reference_layout.addWidget(self.reference_table)
+        self.reference_group.setVisible(False)
+        layout.addWidget(self.reference_group)
     
     def clear_results(self):
         """清空表格内容和头部"""
         self.table.clear()
         self.table.setRowCount(0)
         self.table.setColumnCount(0)
+        self.save_button.setEnabled(False)
 
     def display_results(self, results, mode):
         """
@@ -53,20 +76,41 @@ class ResultsViewerWidget(QWidget):
             self.table.setColumnCount(1)
             self.table.setHorizontalHeaderLabels(["可能的化学式"])
             for i, formula in enumerate(results):
-                 formula_str = " ".join(f"{s}{c if c > 1 else ''}" for s, c in sorted(formula.items()))
+                 formula_str = format_formula(formula)
                  self.table.insertRow(i)
                  self.table.setItem(i, 0, QTableWidgetItem(formula_str))
         
         self.table.resizeColumnsToContents()
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.save_button.setEnabled(True)
+
+    def display_reference_hits(self, hits):
+        """显示参考化合物库中与实测质量分数吻合的化合物（按最大偏差排列）。"""
+        self.reference_group.setVisible(True)
+        self.reference_table.clear()
+        self.reference_table.setRowCount(0)
+        if not hits:
+            self.reference_table.setColumnCount(1)
+            self.reference_table.setHorizontalHeaderLabels(["状态"])
+            self.reference_table.insertRow(0)
+            self.reference_table.setItem(0, 0, QTableWidgetItem("参考库中没有吻合的化合物。"))
+            self.reference_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            return
+
+        self.reference_table.setColumnCount(4)
+        self.reference_table.setHorizontalHeaderLabels(["名称", "化学式", "摩尔质量 (g/mol)", "最大偏差 (%)"])
+        for i, hit in enumerate(hits):
+            self.reference_table.insertRow(i)
+            self.reference_table.setItem(i, 0, QTableWidgetItem(hit['name']))
+            self.reference_table.setItem(i, 1, QTableWidgetItem(hit['formula']))
+            self.reference_table.setItem(i, 2, QTableWidgetItem(f"{hit['mass']:.3f}"))
+            self.reference_table.setItem(i, 3, QTableWidgetItem(f"{hit['deviation']:.3f}"))
+        self.reference_table.resizeColumnsToContents()
+        self.reference_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
     def _format_final_formula(self, formula, matched_elem):
         """辅助函数，用于构建最终的化学式字符串"""
-        final_formula = formula.copy()
-        if '?' in final_formula:
-            n_unknown = final_formula.pop('?')
-            final_formula[matched_elem] = final_formula.get(matched_elem, 0) + n_unknown
-        return " ".join(f"{s}{c if c > 1 else ''}" for s, c in sorted(final_formula.items()))
+        return format_formula(formula, matched_elem)
 
     def show_error(self, message):
         """在表格中显示错误信息"""
@@ -0,0 +1,55 @@
+"""
+本地计算服务的简单客户端，只依赖标准库。
+
+    client = CalculationClient('http://127.0.0.1:8765')
+    job_id = client.submit(components, fractions, params)
+    result = client.wait(job_id)
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Optional
+
+
+class CalculationClient:
+
+    def __init__(self, base_url: str = 'http://127.0.0.1:8765', timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        data = None if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            message = json.loads(e.read().decode('utf-8')).get('error', str(e))
+            raise RuntimeError(f"计算服务返回错误 {e.code}: {message}") from None
+
+    def submit(self, components: list[dict], fractions: dict[str, float], params: dict) -> str:
+        """提交计算请求，返回作业ID。"""
+        body = {'components': components, 'fractions': fractions, 'params': params}
+        return self._request('POST', '/jobs', body)['job_id']
+
+    def status(self, job_id: str) -> dict:
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def cancel(self, job_id: str) -> dict:
+        return self._request('DELETE', f'/jobs/{job_id}')
+
+    def health(self) -> dict:
+        return self._request('GET', '/health')
+
+    def wait(self, job_id: str, poll_interval: float = 0.2, timeout: Optional[float] = None) -> dict:
+        """轮询直到作业结束，返回最终状态字典。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if status['status'] not in ('queued', 'running', 'cancelling'):
+                return status
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"等待作业 {job_id} 超时")
+            time.sleep(poll_interval)
@@ -0,0 +1,339 @@
+"""
+本地计算服务：在 PyQt5 进程之外提供 HTTP/JSON 接口，供其他机器上的脚本或 LIMS 调用。
+
+- 计算在有界的进程池中执行，等待中的作业数量有上限，超出时返回 503；
+- 内容相同、仍在排队或运行中的请求会被合并为同一个作业，只计算一次；
+- 作业可以查询状态，也可以取消：排队中的作业直接取消，
+  运行中的作业通过共享的 Event 通知计算在下一个检查点停止。
+  合并后的作业只有在所有提交者都取消后才会真正停止。
+
+接口（默认只监听 127.0.0.1）：
+    POST   /jobs          提交计算，请求体见 run_request，返回 {"job_id", "status"}；
+                          请求体缺少字段时返回 400，错误信息中给出字段名
+    GET    /jobs/<id>     查询状态，完成后附带 "result"，失败时附带 "error"；
+                          取消后到计算真正停下之前状态为 "cancelling"
+    DELETE /jobs/<id>     取消作业
+    GET    /health        服务状态
+
+启动：python -m service.server --port 8765 --workers 2
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from core.calculator import ChemicalCalculator, CalculationCancelled
+from core.governor import ResourceGovernor
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_CANCELLING = 'cancelling'    # 已请求取消，运行中的计算尚未在检查点停下
+
+
+# 作业表中最多保留的已结束作业数，超出后丢弃最早的
+MAX_FINISHED_JOBS = 1000
+
+
+class ServiceBusy(Exception):
+    """等待中的作业已达上限。"""
+
+
+def validate_request(request) -> None:
+    """检查请求体的结构和当前模式所需的参数，缺少或类型不对时抛出 ValueError，说明是哪个字段。"""
+    if not isinstance(request, dict):
+        raise ValueError("请求体必须是JSON对象")
+    for field, kind, name in (('components', list, '列表'), ('fractions', dict, '对象')):
+        if field not in request:
+            raise ValueError(f"请求缺少字段 '{field}'")
+        if not isinstance(request[field], kind):
+            raise ValueError(f"字段 '{field}' 必须是{name}")
+    params = request.get('params', {})
+    if not isinstance(params, dict):
+        raise ValueError("字段 'params' 必须是对象")
+    if not request['components']:
+        raise ValueError("请至少定义一个化学组分。")
+    for comp in request['components']:
+        if not isinstance(comp, dict) or 'symbol' not in comp or 'formula' not in comp:
+            raise ValueError("components 中的每一项都需要包含 'symbol' 和 'formula'")
+    has_unknown = '?' in [comp['symbol'] for comp in request['components']]
+    required = ('n_max', 'mass_tolerance') if has_unknown else ('n_max', 'fraction_tolerance')
+    for key in required:
+        if key not in params:
+            raise ValueError(f"请求缺少字段 'params.{key}'")
+
+
+def run_request(request: dict, stop_check=None) -> dict:
+    """
+    执行一个计算请求，与 AppController.run_calculation 的参数含义相同：
+    {"components": [...], "fractions": {...}, "params": {"n_max", "mass_tolerance",
+     "fraction_tolerance", "unknown_filter", "constraints", "engine", "reduce_components",
+     "element_tolerances", "remainder_element", "max_results", "max_memory_mb", "max_cpu_seconds",
+     "ordered", "limit", "unknown_engine", "include_synthetic"}}
+    含有'?'组分时为单一未知元素模式，否则为通用模式。
+    返回 {"mode": ..., "solutions": [...], "stop_reason": ...}，可直接序列化为JSON；
+    达到资源上限时 solutions 为部分结果，stop_reason 为原因说明，否则为null。
+    """
+    validate_request(request)
+    components = request['components']
+    fractions = request['fractions']
+    params = request.get('params', {})
+    calculator = ChemicalCalculator()
+    governor = ResourceGovernor.from_params(params)
+    if '?' in [c['symbol'] for c in components]:
+        results = calculator.solve_for_single_unknown(
+            known_components_data=components,
+            mass_fractions=fractions,
+            n_max=params['n_max'],
+            tolerance=params['mass_tolerance'],
+            unknown_filter=params.get('unknown_filter', 'unlimited'),
+            constraints=params.get('constraints'),
+            stop_check=stop_check,
+            reduce_components=params.get('reduce_components', False),
+            element_tolerances=params.get('element_tolerances'),
+            remainder_element=params.get('remainder_element'),
+            governor=governor,
+            ordered=params.get('ordered', False),
+            limit=params.get('limit'),
+            engine=params.get('unknown_engine', 'recursive'),
+            include_synthetic=params.get('include_synthetic', False)
+        )
+        solutions = [{'formula': formula, 'unknown_mass': mass, 'unknown_element': element}
+                     for formula, mass, element in results]
+        return {'mode': 'unknown_element', 'solutions': solutions, 'stop_reason': _stop_message(governor)}
+    if not fractions:
+        raise ValueError("通用模式下，请至少提供一个质量分数。")
+    results = calculator.solve_by_brute_force(
+        components_data=components,
+        mass_fractions=fractions,
+        n_max=params['n_max'],
+        tolerance=params['fraction_tolerance'],
+        constraints=params.get('constraints'),
+        engine=params.get('engine', 'product'),
+        stop_check=stop_check,
+        reduce_components=params.get('reduce_components', False),
+        element_tolerances=params.get('element_tolerances'),
+        remainder_element=params.get('remainder_element'),
+        governor=governor,
+        ordered=params.get('ordered', False),
+        limit=params.get('limit')
+    )
+    return {'mode': 'general', 'solutions': [{'formula': formula} for formula in results],
+            'stop_reason': _stop_message(governor)}
+
+
+def _stop_message(governor: Optional[ResourceGovernor]) -> Optional[str]:
+    return governor.stop_message if governor is not None else None
+
+
+def _worker(request: dict, cancel_event) -> dict:
+    """进程池中执行的函数，cancel_event 为 Manager 共享的 Event。"""
+    return run_request(request, stop_check=cancel_event.is_set)
+
+
+def request_key(request: dict) -> str:
+    """请求内容的规范化摘要，用于合并相同的请求。"""
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class _Job:
+    def __init__(self, job_id: str, key: str, future, cancel_event):
+        self.job_id = job_id
+        self.key = key
+        self.future = future
+        self.cancel_event = cancel_event
+        self.subscribers = 1
+        self.cancelled = False
+
+
+class CalculationService:
+    """管理进程池和作业表，HTTP 处理器只是它的一层薄包装。"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        self._manager = multiprocessing.Manager()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._jobs: dict[str, _Job] = {}
+        self._in_flight: dict[str, str] = {}   # 请求摘要 -> 作业ID
+
+    def submit(self, request: dict) -> str:
+        """提交请求并返回作业ID；与进行中的相同请求合并。"""
+        key = request_key(request)
+        with self._lock:
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                job = self._jobs[job_id]
+                job.subscribers += 1
+                return job_id
+            pending = sum(1 for job in self._jobs.values() if not job.future.done())
+            if pending >= self._max_pending:
+                raise ServiceBusy("计算服务繁忙，请稍后再试。")
+            cancel_event = self._manager.Event()
+            future = self._executor.submit(_worker, request, cancel_event)
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = _Job(job_id, key, future, cancel_event)
+            self._in_flight[key] = job_id
+            self._prune_finished()
+        future.add_done_callback(lambda _: self._finish(key, job_id))
+        return job_id
+
+    def _prune_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.future.done()]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _finish(self, key: str, job_id: str):
+        with self._lock:
+            if self._in_flight.get(key) == job_id:
+                del self._in_flight[key]
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """返回作业状态字典；作业不存在时返回None。"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        ret = {'job_id': job_id}
+        future = job.future
+        if not future.done():
+            ret['status'] = JOB_RUNNING if future.running() else JOB_QUEUED
+            if job.cancelled:
+                # 工作进程还没有停下，结束后才报告 cancelled
+                ret['status'] = JOB_CANCELLING
+            return ret
+        try:
+            ret['result'] = future.result()
+            ret['status'] = JOB_DONE
+        except (CancelledError, CalculationCancelled):
+            ret['status'] = JOB_CANCELLED
+        except Exception as e:
+            ret['status'] = JOB_FAILED
+            ret['error'] = str(e)
+        return ret
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """取消一个作业的订阅；所有订阅者都取消后才真正停止计算。"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if not job.future.done() and job.subscribers > 0:
+                job.subscribers -= 1
+                if job.subscribers == 0:
+                    job.cancelled = True
+                    if not job.future.cancel():
+                        job.cancel_event.set()
+                    if self._in_flight.get(job.key) == job_id:
+                        del self._in_flight[job.key]
+        return self.status(job_id)
+
+    def health(self) -> dict:
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.future.done())
+        return {'status': 'ok', 'pending_jobs': pending, 'max_pending': self._max_pending}
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.future.done():
+                    job.future.cancel()
+                    job.cancel_event.set()
+        self._executor.shutdown(wait=True)
+        self._manager.shutdown()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    service: CalculationService = None
+
+    def _send_json(self, code: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_id(self) -> Optional[str]:
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'jobs':
+            return parts[1]
+        return None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.service.health())
+            return
+        job_id = self._job_id()
+        status = self.service.status(job_id) if job_id else None
+        if status is None:
+            self._send_json(404, {'error': '作业不存在'})
+        else:
+            self._send_json(200, status)
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._send_json(404, {'error': '接口不存在'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            validate_request(request)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            job_id = self.service.submit(request)
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        self._send_json(202, self.service.status(job_id))
+
+    def do_DELETE(self):
+        job_id = self._job_id()
+        status = self.service.cancel(job_id) if job_id else None
+        if status is None:
+            self._send_json(404, {'error': '作业不存在'})
+        else:
+            self._send_json(200, status)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(service: CalculationService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """创建绑定到service的HTTP服务器（尚未开始serve_forever）。port为0时自动选择端口。"""
+    handler = type('CalculationRequestHandler', (_RequestHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="元素分析计算器本地计算服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-pending', type=int, default=32)
+    args = parser.parse_args()
+
+    service = CalculationService(max_workers=args.workers, max_pending=args.max_pending)
+    server = create_server(service, args.host, args.port)
+    print(f"计算服务已启动: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+随机测试用例：先随机取一组组分和计数得到一个真实的化学式，再由它算出质量分数，
+保证每个用例至少有一个解，各搜索引擎的结果比较才有意义。
+"""
+import random
+from typing import Optional
+
+from core import data_modules
+from core.utils import parse_formula
+
+# (符号, 化学式, 电荷)
+COMPONENT_POOL = [
+    ('C', 'C', 0), ('H', 'H', 0), ('N', 'N', 0), ('O', 'O', 0), ('S', 'S', 0),
+    ('Cl', 'Cl', 0), ('P', 'P', 0), ('Na', 'Na', 1),
+    ('Me', 'CH3', 0), ('OH', 'OH', -1), ('Am', 'NH2', 0), ('Ac', 'C2H3O2', -1),
+]
+
+
+def fractions_of(components: list[dict], counts: list[int], elements: list[str]) -> dict[str, float]:
+    """计数为counts的组合中各元素的质量分数(%)。"""
+    total_mass = 0.0
+    element_masses = dict.fromkeys(elements, 0.0)
+    for comp, n in zip(components, counts):
+        mass, composition = parse_formula(comp['formula'])
+        total_mass += n * mass
+        for element in elements:
+            element_masses[element] += n * composition.get(element, 0) * data_modules.ATOMIC_MASSES[element]
+    return {element: element_masses[element] / total_mass * 100.0 for element in elements}
+
+
+def random_general_case(rng: random.Random, max_components: int = 4, n_max: Optional[int] = None,
+                        with_counts: bool = False):
+    """
+    返回通用模式的一个随机用例 (components_data, mass_fractions, n_max, tolerance, element_tolerances)。
+    element_tolerances 有一半的概率为None；with_counts=True 时在最后附加真实化学式的计数。
+    """
+    k = rng.randint(1, max_components)
+    components = [{'symbol': s, 'formula': f, 'charge': q} for s, f, q in rng.sample(COMPONENT_POOL, k)]
+    n_max = n_max or rng.randint(2, 6)
+    counts = [rng.randint(1, n_max) for _ in components]
+    elements = sorted({e for comp in components for e in parse_formula(comp['formula'])[1]})
+    chosen = rng.sample(elements, rng.randint(1, len(elements)))
+    fractions = {e: round(v, 2) for e, v in fractions_of(components, counts, chosen).items()}
+    tolerance = rng.choice([0.3, 1.0, 3.0])
+    element_tolerances = None
+    if rng.random() < 0.5:
+        element_tolerances = {chosen[0]: rng.choice([0.1, 0.5, 2.0])}
+    if with_counts:
+        return components, fractions, n_max, tolerance, element_tolerances, counts
+    return components, fractions, n_max, tolerance, element_tolerances
+
+
+def random_unknown_case(rng: random.Random, max_components: int = 3):
+    """
+    返回单一未知元素模式的一个随机用例
+    (known_components_data, mass_fractions, n_max, tolerance, element_tolerances)；
+    未知元素取自 Na/K/Cl/Br/Cu 之一。
+    """
+    unknown = rng.choice(['Na', 'K', 'Cl', 'Br', 'Cu'])
+    pool = [item for item in COMPONENT_POOL if unknown not in item[1]]
+    k = rng.randint(1, max_components)
+    known = [{'symbol': s, 'formula': f, 'charge': q} for s, f, q in rng.sample(pool, k)]
+    n_max = rng.randint(2, 5)
+    counts = [rng.randint(0, n_max) for _ in known]
+    counts[0] = max(counts[0], 1)
+    full = known + [{'symbol': unknown, 'formula': unknown, 'charge': 0}]
+    counts.append(rng.randint(1, n_max))
+    elements = sorted({e for comp in known for e in parse_formula(comp['formula'])[1]})
+    chosen = rng.sample(elements, rng.randint(1, len(elements)))
+    fractions = {e: round(v, 2) for e, v in fractions_of(full, counts, chosen).items()}
+    components = known + [{'symbol': '?', 'formula': '?', 'charge': 0}]
+    tolerance = rng.choice([0.3, 1.0])
+    element_tolerances = None
+    if rng.random() < 0.5:
+        element_tolerances = {chosen[0]: rng.choice([0.2, 0.5, 2.0])}
+    return components, fractions, n_max, tolerance, element_tolerances
+
+
+def random_constraints(rng: random.Random, components: list[dict], counts: list[int]) -> dict:
+    """随机选取一到两项化学规则约束；分子量约束以真实化学式的质量为中心。"""
+    options = {}
+    for kind in rng.sample(['rdbe', 'nitrogen_rule', 'charge_neutral', 'molar_mass'], rng.randint(1, 2)):
+        if kind == 'rdbe':
+            options['rdbe_min'] = rng.choice([-2.0, 0.0])
+            options['rdbe_max'] = rng.choice([2.0, 6.0])
+        elif kind == 'molar_mass':
+            mass = sum(n * parse_formula(comp['formula'])[0] for comp, n in zip(components, counts))
+            options['molar_mass'] = round(mass, 1)
+            options['molar_mass_tolerance'] = rng.choice([0.5, 20.0])
+        else:
+            options[kind] = True
+    return options
+
+
+def passes_constraints(formula: dict, components: list[dict], options: dict) -> bool:
+    """
+    不经搜索、直接由化学式检查约束，作为剪枝结果的参照。
+    单一未知元素模式下，把components中'?'的化学式换成匹配到的元素即可使用。
+    """
+    by_symbol = {comp['symbol']: comp for comp in components}
+    needs_valence = (options.get('rdbe_min') is not None or options.get('rdbe_max') is not None
+                     or options.get('nitrogen_rule'))
+    rdbe, odd, charge, mass = 1.0, 0, 0, 0.0
+    for symbol, n in formula.items():
+        comp = by_symbol[symbol]
+        comp_mass, composition = parse_formula(comp['formula'])
+        for element, count in composition.items():
+            if element not in data_modules.VALENCES:
+                if needs_valence:
+                    return False    # 只可能是匹配到的未知元素：没有价态数据的元素不满足这两项规则
+                continue
+            valence = data_modules.VALENCES[element]
+            rdbe += n * count * (valence - 2) / 2
+            odd += n * count * (valence % 2)
+        charge += n * comp.get('charge', 0)
+        mass += n * comp_mass
+    eps = 1e-9
+    if options.get('rdbe_min') is not None and rdbe < options['rdbe_min'] - eps:
+        return False
+    if options.get('rdbe_max') is not None and rdbe > options['rdbe_max'] + eps:
+        return False
+    if options.get('nitrogen_rule') and odd % 2:
+        return False
+    if options.get('charge_neutral') and charge != 0:
+        return False
+    if options.get('molar_mass') is not None:
+        if abs(mass - options['molar_mass']) > options['molar_mass_tolerance'] + eps:
+            return False
+    return True
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.async_calculator import AsyncChemicalCalculator
+from core.calculator import ChemicalCalculator
+
+COMPONENTS = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+FRACTIONS = {'C': 40.0, 'H': 6.71}
+UNKNOWN = [{'symbol': 'C', 'formula': 'C'}, {'symbol': 'H', 'formula': 'H'}, {'symbol': '?', 'formula': '?'}]
+# 组合数很多的搜索，用于取消测试
+SLOW_COMPONENTS = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'N', 'O', 'S']]
+SLOW_FRACTIONS = {'C': 40.0, 'H': 6.71, 'N': 10.0}
+
+
+def sort_key(formula):
+    return len(formula), sum(formula.values())
+
+
+class Spy:
+    """包装计算器方法：记录 stop_check、是否已返回、同时运行的数量以及 on_solution 的调用次数。"""
+
+    def __init__(self, method, delay=0.0):
+        self.method = method
+        self.delay = delay
+        self.stop_check = None
+        self.returned = threading.Event()
+        self.produced = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        self.stop_check = kwargs['stop_check']
+        on_solution = kwargs.get('on_solution')
+        if on_solution is not None:
+            def counting(solution):
+                self.produced += 1
+                on_solution(solution)
+            kwargs['on_solution'] = counting
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            return self.method(**kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+            self.returned.set()
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_stream_matches_sync_results():
+    sync = ChemicalCalculator()
+    expected = sync.solve_by_brute_force(COMPONENTS, FRACTIONS, 12, 2.0)
+    expected_unknown = sync.solve_for_single_unknown(UNKNOWN, FRACTIONS, 4, 0.5, 'unlimited')
+    assert len(expected) > 5 and expected_unknown
+
+    async def main():
+        calculator = AsyncChemicalCalculator(stream_buffer=2)
+        try:
+            streamed = await collect(calculator.iter_brute_force(COMPONENTS, FRACTIONS, 12, 2.0))
+            ordered = await collect(calculator.iter_brute_force(COMPONENTS, FRACTIONS, 12, 2.0, ordered=True))
+            streamed_unknown = await collect(
+                calculator.iter_single_unknown(UNKNOWN, FRACTIONS, 4, 0.5, 'unlimited'))
+            solved = await calculator.solve_by_brute_force(COMPONENTS, FRACTIONS, 12, 2.0)
+        finally:
+            calculator.close()
+        return streamed, ordered, streamed_unknown, solved
+
+    streamed, ordered, streamed_unknown, solved = asyncio.run(main())
+    assert sorted(streamed, key=sort_key) == expected
+    assert ordered == expected
+    assert sorted(map(repr, streamed_unknown)) == sorted(map(repr, expected_unknown))
+    assert solved == expected
+
+
+def test_slow_consumer_gets_backpressure():
+    buffer = 3
+
+    async def main():
+        calculator = AsyncChemicalCalculator(stream_buffer=buffer)
+        spy = Spy(calculator._calculator.solve_by_brute_force)
+        calculator._calculator.solve_by_brute_force = spy
+        lags = []
+        consumed = 0
+        try:
+            async for _ in calculator.iter_brute_force(COMPONENTS, FRACTIONS, 16, 2.0):
+                consumed += 1
+                await asyncio.sleep(0.01)
+                lags.append(spy.produced - consumed)
+        finally:
+            calculator.close()
+        return lags, consumed
+
+    lags, consumed = asyncio.run(main())
+    assert consumed > 3 * buffer
+    # 队列中最多 buffer 个，计算线程手中最多还有一个正在等待放入
+    assert max(lags) <= buffer + 1
+
+
+def test_closing_stream_stops_worker():
+    async def main():
+        calculator = AsyncChemicalCalculator(stream_buffer=1)
+        spy = Spy(calculator._calculator.solve_by_brute_force)
+        calculator._calculator.solve_by_brute_force = spy
+        try:
+            stream = calculator.iter_brute_force(SLOW_COMPONENTS, SLOW_FRACTIONS, 30, 40.0)
+            await stream.__anext__()
+            await stream.aclose()
+            # 计算线程阻塞在等待缓存空位上时也能停下
+            assert spy.stop_check()
+            assert spy.returned.is_set()
+        finally:
+            calculator.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_cancelling_task_stops_worker(streaming):
+    async def main():
+        calculator = AsyncChemicalCalculator(max_concurrency=1)
+        spy = Spy(calculator._calculator.solve_by_brute_force)
+        calculator._calculator.solve_by_brute_force = spy
+        try:
+            if streaming:
+                coroutine = collect(calculator.iter_brute_force(SLOW_COMPONENTS, SLOW_FRACTIONS, 30, 0.01))
+            else:
+                coroutine = calculator.solve_by_brute_force(SLOW_COMPONENTS, SLOW_FRACTIONS, 30, 0.01)
+            task = asyncio.create_task(coroutine)
+            while spy.stop_check is None:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert spy.stop_check()
+            assert spy.returned.is_set()
+            # 并发名额已释放：下一次计算可以立即开始
+            calculator._calculator.solve_by_brute_force = ChemicalCalculator().solve_by_brute_force
+            assert await asyncio.wait_for(
+                calculator.solve_by_brute_force(COMPONENTS, FRACTIONS, 4, 2.0), timeout=5)
+        finally:
+            calculator.close()
+
+    asyncio.run(main())
+
+
+def test_semaphore_caps_concurrent_runs():
+    async def main():
+        executor = ThreadPoolExecutor(max_workers=6)
+        calculator = AsyncChemicalCalculator(max_concurrency=2, executor=executor)
+        spy = Spy(calculator._calculator.solve_by_brute_force, delay=0.05)
+        calculator._calculator.solve_by_brute_force = spy
+        try:
+            runs = [calculator.solve_by_brute_force(COMPONENTS, FRACTIONS, 4, 2.0) for _ in range(4)]
+            streams = [collect(calculator.iter_brute_force(COMPONENTS, FRACTIONS, 4, 2.0)) for _ in range(2)]
+            results = await asyncio.gather(*runs, *streams)
+        finally:
+            calculator.close()
+            executor.shutdown()
+        return spy.max_active, results
+
+    max_active, results = asyncio.run(main())
+    assert max_active == 2
+    assert all(results)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        AsyncChemicalCalculator(max_concurrency=0)
+    with pytest.raises(ValueError):
+        AsyncChemicalCalculator(stream_buffer=0)
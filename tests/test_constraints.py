@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from core import data_modules
+from core.calculator import ChemicalCalculator
+from core.utils import parse_formula
+from tests.cases import passes_constraints, random_general_case, random_unknown_case
+
+CONSTRAINT_KINDS = ['rdbe', 'nitrogen_rule', 'charge_neutral', 'molar_mass']
+
+
+def options_for(kind: str, rng: random.Random, reference_mass: float) -> dict:
+    """只含一项约束的选项；分子量约束以某个未约束解的质量为中心。"""
+    if kind == 'rdbe':
+        return {'rdbe_min': rng.choice([-2.0, 0.0, 1.0]), 'rdbe_max': rng.choice([1.0, 3.0, 6.0])}
+    if kind == 'molar_mass':
+        return {'molar_mass': round(reference_mass, 1), 'molar_mass_tolerance': rng.choice([0.5, 15.0])}
+    return {kind: True}
+
+
+def formula_mass(formula: dict, components: list[dict]) -> float:
+    by_symbol = {c['symbol']: c for c in components}
+    return sum(n * parse_formula(by_symbol[s]['formula'])[0] for s, n in formula.items())
+
+
+def unknown_passes(solution, components: list[dict], options: dict) -> bool:
+    """把'?'换成匹配到的元素后，按通用模式的规则检查。"""
+    formula, _, element = solution
+    resolved = [c if c['symbol'] != '?' else {'symbol': '?', 'formula': element, 'charge': 0}
+                for c in components]
+    return passes_constraints(formula, resolved, options)
+
+
+@pytest.mark.parametrize('kind', CONSTRAINT_KINDS)
+@pytest.mark.parametrize('seed', range(10))
+def test_general_constrained_search_equals_filtered_brute_force(kind, seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_general_case(rng, max_components=4)
+    calculator = ChemicalCalculator()
+    unconstrained = calculator.solve_by_brute_force(components, fractions, n_max, tolerance,
+                                                    element_tolerances=element_tolerances)
+    assert unconstrained
+    options = options_for(kind, rng, formula_mass(rng.choice(unconstrained), components))
+    expected = [f for f in unconstrained if passes_constraints(f, components, options)]
+    actual = calculator.solve_by_brute_force(components, fractions, n_max, tolerance, constraints=options,
+                                             element_tolerances=element_tolerances)
+    assert actual == expected
+
+
+@pytest.mark.parametrize('kind', CONSTRAINT_KINDS)
+@pytest.mark.parametrize('seed', range(10))
+def test_unknown_constrained_search_equals_filtered_brute_force(kind, seed):
+    rng = random.Random(100 + seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_unknown_case(rng)
+    unknown_filter = rng.choice(['unlimited', 'metal', 'nonmetal'])
+    calculator = ChemicalCalculator()
+    unconstrained = calculator.solve_for_single_unknown(components, fractions, n_max, tolerance, unknown_filter,
+                                                        element_tolerances=element_tolerances)
+    if unconstrained:
+        formula, _, element = rng.choice(unconstrained)
+        resolved = [c if c['symbol'] != '?' else {'symbol': '?', 'formula': element} for c in components]
+        reference_mass = formula_mass(formula, resolved)
+    else:
+        reference_mass = 100.0
+    options = options_for(kind, rng, reference_mass)
+    expected = [s for s in unconstrained if unknown_passes(s, components, options)]
+    actual = calculator.solve_for_single_unknown(components, fractions, n_max, tolerance, unknown_filter,
+                                                 constraints=options, element_tolerances=element_tolerances)
+    assert actual == expected
+
+
+def test_constraints_prune_known_example():
+    # C2H6O（乙醇）与 C2H5O（自由基）：氮规则只保留偶电子的那个
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+    calculator = ChemicalCalculator()
+    fractions = {'C': 52.14, 'H': 12.0}
+    unconstrained = calculator.solve_by_brute_force(components, fractions, 8, 2.0)
+    assert {'C': 2, 'H': 5, 'O': 1} in unconstrained
+    constrained = calculator.solve_by_brute_force(components, fractions, 8, 2.0,
+                                                  constraints={'nitrogen_rule': True, 'rdbe_min': 0.0})
+    assert {'C': 2, 'H': 6, 'O': 1} in constrained
+    assert {'C': 2, 'H': 5, 'O': 1} not in constrained
+
+
+@pytest.mark.parametrize('options', [{'rdbe_min': 0.0}, {'rdbe_max': 4.0}, {'nitrogen_rule': True}])
+def test_component_without_valence_raises_value_error(options):
+    components = [{'symbol': 'C', 'formula': 'C'}, {'symbol': 'Ru', 'formula': 'Ru'}]
+    calculator = ChemicalCalculator()
+    with pytest.raises(ValueError, match="'Ru' 没有价态数据"):
+        calculator.solve_by_brute_force(components, {'C': 10.0}, 3, 1.0, constraints=options)
+    with pytest.raises(ValueError, match="'Ru' 没有价态数据"):
+        calculator.solve_for_single_unknown(components + [{'symbol': '?', 'formula': '?'}],
+                                            {'C': 10.0}, 3, 1.0, 'unlimited', constraints=options)
+
+
+def test_component_without_valence_allowed_for_charge_and_mass():
+    components = [{'symbol': 'C', 'formula': 'C'}, {'symbol': 'Ru', 'formula': 'Ru'}]
+    calculator = ChemicalCalculator()
+    unconstrained = calculator.solve_by_brute_force(components, {'C': 10.6}, 3, 1.0)
+    assert {'C': 1, 'Ru': 1} in unconstrained
+    constrained = calculator.solve_by_brute_force(components, {'C': 10.6}, 3, 1.0,
+                                                  constraints={'charge_neutral': True, 'molar_mass': 113.08})
+    assert constrained == [{'C': 1, 'Ru': 1}]
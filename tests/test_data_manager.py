@@ -0,0 +1,176 @@
+import random
+
+import pytest
+
+from data.data_manager import (COMPONENTS, FRACTIONS, ROW_INSERTED, ROW_REMOVED, ROW_UPDATED, TABLE_RESET,
+                               DataManager)
+
+
+class Recorder:
+    """记录通知，并像界面表格一样按行号回放，得到两张表的镜像。"""
+
+    def __init__(self, manager: DataManager):
+        self.events = []
+        self.components = list(manager.get_all_components())
+        self.fraction_rows = list(manager.get_fraction_rows())
+        self.manager = manager
+        manager.add_listener(self)
+
+    def __call__(self, table, kind, row, data):
+        self.events.append((table, kind, row, data))
+        rows = self.components if table == COMPONENTS else self.fraction_rows
+        if kind == ROW_INSERTED:
+            rows.insert(row, data)
+        elif kind == ROW_UPDATED:
+            rows[row] = data
+        elif kind == ROW_REMOVED:
+            assert rows[row] == data
+            del rows[row]
+        else:
+            assert kind == TABLE_RESET and row == -1
+            rows[:] = (self.manager.get_all_components() if table == COMPONENTS
+                       else self.manager.get_fraction_rows())
+
+    def take(self):
+        events, self.events = self.events, []
+        return events
+
+    def assert_in_sync(self):
+        assert self.components == self.manager.get_all_components()
+        assert self.fraction_rows == self.manager.get_fraction_rows()
+
+
+def comp(symbol, formula=None, charge=0):
+    return {'symbol': symbol, 'formula': formula or symbol, 'charge': charge}
+
+
+@pytest.fixture
+def manager():
+    manager = DataManager()
+    for symbol in ['O', 'C', 'N']:
+        manager.add_component(symbol, symbol)
+    manager.add_component('Me', 'CH3')
+    return manager
+
+
+def test_add_component_and_fractions_in_sorted_rows(manager):
+    recorder = Recorder(manager)
+    manager.add_component('H', 'H')
+    assert recorder.take() == [(COMPONENTS, ROW_INSERTED, 4, comp('H'))]
+
+    # 质量分数表按符号排序：O 在第0行，C 插到它前面，N 插在两者之间
+    manager.add_fraction('O', 30.0)
+    manager.add_fraction('C', 40.0)
+    manager.add_fraction('N', 10.0)
+    assert recorder.take() == [
+        (FRACTIONS, ROW_INSERTED, 0, ('O', 30.0)),
+        (FRACTIONS, ROW_INSERTED, 0, ('C', 40.0)),
+        (FRACTIONS, ROW_INSERTED, 1, ('N', 10.0)),
+    ]
+    # 再次添加同一符号为更新
+    manager.add_fraction('N', 12.5)
+    assert recorder.take() == [(FRACTIONS, ROW_UPDATED, 1, ('N', 12.5))]
+    recorder.assert_in_sync()
+
+
+def test_update_component_fields(manager):
+    recorder = Recorder(manager)
+    manager.update_component_formula(3, 'C2H5')
+    manager.update_component_charge(3, '-1')
+    assert recorder.take() == [
+        (COMPONENTS, ROW_UPDATED, 3, comp('Me', 'C2H5')),
+        (COMPONENTS, ROW_UPDATED, 3, comp('Me', 'C2H5', -1)),
+    ]
+    with pytest.raises(ValueError):
+        manager.update_component_charge(3, 'x')
+    assert recorder.take() == []
+    recorder.assert_in_sync()
+
+
+def test_rename_component(manager):
+    manager.add_fraction('C', 40.0)
+    recorder = Recorder(manager)
+    manager.update_component_symbol(3, 'Et')
+    assert recorder.take() == [(COMPONENTS, ROW_UPDATED, 3, comp('Et', 'CH3'))]
+    assert manager.index_of('Et') == 3 and manager.index_of('Me') == -1
+
+    # 没有变化或无效下标时不发出通知；冲突的符号被拒绝且不改变数据
+    manager.update_component_symbol(3, 'Et')
+    manager.update_component_symbol(10, 'X')
+    with pytest.raises(ValueError):
+        manager.update_component_symbol(3, 'O')    # 已被其他组分使用
+    with pytest.raises(ValueError):
+        manager.update_component_symbol(1, 'S')    # 元素符号不能改写 C 的组成
+    assert recorder.take() == []
+    recorder.assert_in_sync()
+
+
+def test_delete_component_cascades_to_fraction(manager):
+    for symbol, value in [('O', 30.0), ('C', 40.0), ('N', 10.0)]:
+        manager.add_fraction(symbol, value)
+    recorder = Recorder(manager)
+
+    # 删除组分 C（下标1）：先删组分行，再删它在排序后质量分数表中的第0行
+    manager.delete_component(1)
+    assert recorder.take() == [
+        (COMPONENTS, ROW_REMOVED, 1, comp('C')),
+        (FRACTIONS, ROW_REMOVED, 0, ('C', 40.0)),
+    ]
+    # 其后组分的下标前移
+    assert [manager.index_of(s) for s in ['O', 'N', 'Me']] == [0, 1, 2]
+
+    # 没有质量分数的组分只删组分行
+    manager.delete_component(2)
+    assert recorder.take() == [(COMPONENTS, ROW_REMOVED, 2, comp('Me', 'CH3'))]
+    manager.delete_fraction('O')
+    assert recorder.take() == [(FRACTIONS, ROW_REMOVED, 1, ('O', 30.0))]
+    manager.delete_component(5)
+    manager.delete_fraction('Cl')
+    assert recorder.take() == []
+    recorder.assert_in_sync()
+
+
+def test_load_state_resets_both_tables(manager):
+    manager.add_fraction('C', 40.0)
+    recorder = Recorder(manager)
+    components = [comp('H'), comp('OAc', 'C2H3O2', -1), comp('Na', charge=1)]
+    manager.load_state(components, {'Na': 28.0, 'H': 3.7})
+    assert recorder.take() == [(COMPONENTS, TABLE_RESET, -1, None), (FRACTIONS, TABLE_RESET, -1, None)]
+    assert manager.get_all_components() == components
+    assert manager.get_fraction_rows() == [('H', 3.7), ('Na', 28.0)]
+    assert manager.index_of('OAc') == 1
+    recorder.assert_in_sync()
+
+    # 验证失败时保留原有数据，也不发出通知
+    with pytest.raises(ValueError):
+        manager.load_state([comp('K')], {'Cl': 10.0})
+    assert recorder.take() == []
+    assert manager.get_all_components() == components
+    recorder.assert_in_sync()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_edits_keep_replayed_tables_in_sync(seed):
+    rng = random.Random(seed)
+    manager = DataManager()
+    recorder = Recorder(manager)
+    elements = ['C', 'H', 'N', 'O', 'S', 'P', 'Cl', 'Br', 'Na', 'K']
+    for _ in range(60):
+        action = rng.random()
+        symbols = manager.get_component_symbols()
+        try:
+            if action < 0.35:
+                manager.add_component(rng.choice(elements), '')
+            elif action < 0.65 and symbols:
+                manager.add_fraction(rng.choice(symbols), round(rng.uniform(1, 60), 2))
+            elif action < 0.8 and symbols:
+                manager.delete_component(rng.randrange(len(symbols)))
+            elif action < 0.9 and manager.get_fraction_rows():
+                manager.delete_fraction(rng.choice(manager.get_fraction_rows())[0])
+            elif symbols:
+                manager.update_component_charge(rng.randrange(len(symbols)), rng.randint(-2, 2))
+        except ValueError:
+            pass
+        recorder.assert_in_sync()
+        current = manager.get_component_symbols()
+        assert [manager.index_of(s) for s in current] == list(range(len(current)))
@@ -0,0 +1,32 @@
+from core import data_modules
+from core.calculator import ChemicalCalculator
+from core.utils import find_matching_element
+
+
+def test_synthetic_elements_are_flagged():
+    table = data_modules.ELEMENTS
+    synthetic = {s for s, c in zip(table.symbols, table.classes) if c & data_modules.CLASS_SYNTHETIC}
+    assert {'Tc', 'Pm', 'Po', 'Pu', 'Ts', 'Og'} <= synthetic
+    assert not {'H', 'C', 'Bi', 'Th', 'U'} & synthetic
+
+
+def test_synthetic_elements_need_explicit_flag():
+    assert find_matching_element(294.0, 1.0) is None
+    assert find_matching_element(294.0, 1.0, include_synthetic=True) == 'Ts'
+    assert find_matching_element(98.0, 0.5, 'metal') is None
+    assert find_matching_element(98.0, 0.5, 'metal', include_synthetic=True) == 'Tc'
+    assert find_matching_element(238.0, 0.5) == 'U'
+
+
+def test_unknown_mode_skips_synthetic_elements_by_default():
+    # TcCl: Tc 的质量分数约73.4%
+    components = [{'symbol': 'Cl', 'formula': 'Cl'}, {'symbol': '?', 'formula': '?'}]
+    calculator = ChemicalCalculator()
+    default = calculator.solve_for_single_unknown(components, {'Cl': 26.57}, 1, 0.5, 'unlimited')
+    assert all(element != 'Tc' for _, _, element in default)
+    flagged = calculator.solve_for_single_unknown(components, {'Cl': 26.57}, 1, 0.5, 'unlimited',
+                                                  include_synthetic=True)
+    assert 'Tc' in [element for _, _, element in flagged]
+    vectorized = calculator.solve_for_single_unknown(components, {'Cl': 26.57}, 1, 0.5, 'unlimited',
+                                                     engine='vectorized', include_synthetic=True)
+    assert vectorized == flagged
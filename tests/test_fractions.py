@@ -0,0 +1,29 @@
+import pytest
+
+from core.calculator import ChemicalCalculator
+
+COMPONENTS = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+
+
+def test_remainder_element_fills_missing_fraction():
+    calculator = ChemicalCalculator()
+    results = calculator.solve_by_brute_force(COMPONENTS, {'C': 40.0, 'H': 6.71}, 4, 0.1,
+                                              remainder_element='O')
+    assert {'C': 1, 'H': 2, 'O': 1} in results
+
+
+def test_remainder_element_must_appear_in_components():
+    calculator = ChemicalCalculator()
+    with pytest.raises(ValueError, match='不在任何组分中'):
+        calculator.solve_by_brute_force(COMPONENTS, {'C': 40.0, 'H': 6.71}, 4, 0.1,
+                                        remainder_element='N')
+    unknown = COMPONENTS + [{'symbol': '?', 'formula': '?'}]
+    with pytest.raises(ValueError, match='不在任何组分中'):
+        calculator.solve_for_single_unknown(unknown, {'C': 40.0}, 3, 0.5, 'unlimited',
+                                            remainder_element='N')
+
+
+def test_element_tolerance_requires_given_fraction():
+    calculator = ChemicalCalculator()
+    with pytest.raises(ValueError):
+        calculator.solve_by_brute_force(COMPONENTS, {'C': 40.0}, 4, 0.1, element_tolerances={'H': 0.2})
@@ -0,0 +1,119 @@
+import itertools
+import types
+
+import pytest
+
+from core import governor as governor_module
+from core import solver_context, vectorized
+from core.calculator import ChemicalCalculator
+from core.governor import LIMIT_CPU, LIMIT_MEMORY, LIMIT_RESULTS, ResourceGovernor
+
+GENERAL = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'N', 'O', 'S']]
+GENERAL_FRACTIONS = {'C': 41.61, 'H': 4.07, 'N': 8.09, 'O': 27.71, 'S': 18.51}   # C6H7NO3S
+UNKNOWN = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']] + [{'symbol': '?', 'formula': '?'}]
+UNKNOWN_FRACTIONS = {'C': 29.28, 'H': 3.69, 'O': 39.01}                          # C2H3O2Na
+
+ENGINES = ['product', 'odometer', 'mitm', 'ratio', 'recursive', 'vectorized']
+# 这些引擎在搜索过程中按枚举顺序逐个记录解，部分结果就是完整搜索时最先找到的那些
+STREAMING_ENGINES = {'product', 'odometer', 'recursive', 'vectorized'}
+
+
+@pytest.fixture(autouse=True)
+def frequent_checks(monkeypatch):
+    # 每个检查点都检查资源，向量化引擎每批只有几个组合，使各引擎都有足够多的检查点
+    monkeypatch.setattr(solver_context, 'CHECK_INTERVAL', 1)
+    monkeypatch.setattr(vectorized, 'BATCH_SIZE', 7)
+
+
+def solve(engine, governor=None, stop_check=None, on_solution=None):
+    if engine == 'vectorized':
+        pytest.importorskip('numpy')
+    calculator = ChemicalCalculator()
+    kwargs = dict(governor=governor, stop_check=stop_check, on_solution=on_solution)
+    if engine in ('recursive', 'vectorized'):
+        return calculator.solve_for_single_unknown(UNKNOWN, UNKNOWN_FRACTIONS, 6, 1.0, 'unlimited',
+                                                   engine=engine, **kwargs)
+    return calculator.solve_by_brute_force(GENERAL, GENERAL_FRACTIONS, 8, 3.0, engine=engine, **kwargs)
+
+
+def full_run(engine):
+    """完整搜索：返回 (结果, 按找到顺序的解, 检查点数量)。"""
+    found, checks = [], itertools.count()
+    results = solve(engine, stop_check=lambda: next(checks) < 0, on_solution=found.append)
+    return results, found, next(checks)
+
+
+def assert_partial(partial, full, found_order, engine):
+    assert all(solution in full for solution in partial)
+    assert partial == [solution for solution in full if solution in partial]   # 仍按最终顺序排序
+    if engine in STREAMING_ENGINES:
+        assert sorted(map(repr, partial)) == sorted(map(repr, found_order[:len(partial)]))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_exactly_max_results_is_not_truncated(engine):
+    full, _, _ = full_run(engine)
+    assert len(full) > 3
+    governor = ResourceGovernor(max_results=len(full))
+    assert solve(engine, governor) == full
+    assert governor.stop_reason is None
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_result_cap_returns_partial_results(engine):
+    full, found_order, _ = full_run(engine)
+    governor = ResourceGovernor(max_results=3)
+    partial = solve(engine, governor)
+    assert len(partial) == 3
+    assert governor.stop_reason == LIMIT_RESULTS
+    assert '3' in governor.stop_message
+    assert_partial(partial, full, found_order, engine)
+
+
+class Counter:
+    """每读一次加1的假时钟/假内存读数，使上限在第若干个检查点时触发。"""
+
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self):
+        self.value += 1
+        return float(self.value)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('reason', [LIMIT_CPU, LIMIT_MEMORY])
+def test_cpu_and_memory_caps_stop_midway(monkeypatch, engine, reason):
+    full, found_order, n_checks = full_run(engine)
+    assert n_checks >= 4
+    threshold = n_checks // 2
+    counter = Counter()
+    if reason == LIMIT_CPU:
+        monkeypatch.setattr(governor_module, 'time', types.SimpleNamespace(thread_time=counter))
+        governor = ResourceGovernor(max_cpu_seconds=threshold)
+    else:
+        monkeypatch.setattr(governor_module, 'current_rss_mb', counter)
+        governor = ResourceGovernor(max_memory_mb=threshold)
+
+    checks = itertools.count()
+    partial = solve(engine, governor, stop_check=lambda: next(checks) < 0)
+    assert governor.stop_reason == reason
+    assert next(checks) < n_checks    # 提前停止
+    assert_partial(partial, full, found_order, engine)
+
+
+def test_governor_is_reset_between_runs():
+    governor = ResourceGovernor(max_results=2)
+    solve('product', governor)
+    assert governor.stop_reason == LIMIT_RESULTS
+    governor.max_results = 100
+    solve('product', governor)
+    assert governor.stop_reason is None and governor.stop_message is None
+
+
+def test_invalid_limits():
+    for kwargs in ({'max_results': 0}, {'max_memory_mb': 0}, {'max_cpu_seconds': -1}):
+        with pytest.raises(ValueError):
+            ResourceGovernor(**kwargs)
+    assert ResourceGovernor.from_params({}) is None
+    assert ResourceGovernor.from_params({'max_results': 5}).max_results == 5
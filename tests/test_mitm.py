@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from tests.cases import fractions_of, random_general_case
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_mitm_matches_product(seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_general_case(rng, max_components=5)
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(components, fractions, n_max, tolerance,
+                                               element_tolerances=element_tolerances)
+    actual = calculator.solve_by_brute_force(components, fractions, n_max, tolerance, engine='mitm',
+                                             element_tolerances=element_tolerances)
+    assert expected
+    assert actual == expected
+
+
+def test_mitm_with_all_elements_constrained():
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'N', 'O', 'S']]
+    fractions = fractions_of(components, [6, 7, 1, 3, 1], ['C', 'H', 'N', 'O', 'S'])
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(components, fractions, 8, 2.0)
+    assert {'C': 6, 'H': 7, 'N': 1, 'O': 3, 'S': 1} in expected
+    assert calculator.solve_by_brute_force(components, fractions, 8, 2.0, engine='mitm') == expected
+
+
+def test_mitm_without_element_fractions_falls_back_to_product():
+    # 没有可用于折半匹配的元素时，所有组合都满足条件，与逐一枚举一样全部返回
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(components, {}, 3, 1.0)
+    assert len(expected) == 27
+    assert calculator.solve_by_brute_force(components, {}, 3, 1.0, engine='mitm') == expected
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from tests.cases import passes_constraints, random_constraints, random_general_case
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_odometer_matches_product(seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_general_case(rng, max_components=5)
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(components, fractions, n_max, tolerance,
+                                               element_tolerances=element_tolerances)
+    actual = calculator.solve_by_brute_force(components, fractions, n_max, tolerance, engine='odometer',
+                                             element_tolerances=element_tolerances)
+    assert expected
+    assert actual == expected
+    # 字典的键顺序也相同
+    assert [list(f) for f in actual] == [list(f) for f in expected]
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_odometer_with_constraints_matches_filtered_product(seed):
+    rng = random.Random(1000 + seed)
+    components, fractions, n_max, tolerance, element_tolerances, counts = random_general_case(
+        rng, with_counts=True)
+    options = random_constraints(rng, components, counts)
+    calculator = ChemicalCalculator()
+    unconstrained = calculator.solve_by_brute_force(components, fractions, n_max, tolerance,
+                                                    element_tolerances=element_tolerances)
+    expected = [f for f in unconstrained if passes_constraints(f, components, options)]
+    for engine in ('product', 'odometer'):
+        assert calculator.solve_by_brute_force(components, fractions, n_max, tolerance, constraints=options,
+                                               engine=engine, element_tolerances=element_tolerances) == expected
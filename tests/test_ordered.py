@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from core.governor import ResourceGovernor
+from tests.cases import random_constraints, random_general_case, random_unknown_case
+
+
+def _general_case(seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances, counts = random_general_case(
+        rng, max_components=4, n_max=7, with_counts=True)
+    constraints = random_constraints(rng, components, counts) if rng.random() < 0.5 else None
+    return dict(components_data=components, mass_fractions=fractions, n_max=n_max, tolerance=3 * tolerance,
+                element_tolerances=element_tolerances, constraints=constraints)
+
+
+def _unknown_case(seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_unknown_case(rng)
+    constraints = {'charge_neutral': True} if rng.random() < 0.3 else None
+    return dict(known_components_data=components, mass_fractions=fractions, n_max=n_max,
+                tolerance=tolerance, unknown_filter='unlimited',
+                element_tolerances=element_tolerances, constraints=constraints)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_ordered_general_matches_sorted(seed):
+    kwargs = _general_case(seed)
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(**kwargs)
+    assert calculator.solve_by_brute_force(**kwargs, ordered=True) == expected
+    for limit in (1, 3):
+        assert calculator.solve_by_brute_force(**kwargs, limit=limit) == expected[:limit]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_ordered_unknown_matches_sorted(seed):
+    kwargs = _unknown_case(seed)
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_for_single_unknown(**kwargs)
+    assert calculator.solve_for_single_unknown(**kwargs, ordered=True) == expected
+    for limit in (1, 3):
+        assert calculator.solve_for_single_unknown(**kwargs, limit=limit) == expected[:limit]
+
+
+def test_ordered_streams_in_final_order():
+    kwargs = _general_case(7)
+    calculator = ChemicalCalculator()
+    streamed = []
+    results = calculator.solve_by_brute_force(**kwargs, ordered=True, on_solution=streamed.append)
+    assert streamed == results
+
+
+def test_limit_is_not_reported_as_resource_stop():
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(components, {'C': 40.0}, 12, 3.0)
+    assert len(expected) > 5
+    governor = ResourceGovernor()
+    assert calculator.solve_by_brute_force(components, {'C': 40.0}, 12, 3.0, limit=5,
+                                           governor=governor) == expected[:5]
+    # limit 是调用方要求的数量，不是资源上限
+    assert governor.stop_reason is None
+
+
+def test_limit_must_be_positive():
+    with pytest.raises(ValueError):
+        ChemicalCalculator().solve_by_brute_force([{'symbol': 'C', 'formula': 'C'}], {'C': 100.0}, 2, 1.0,
+                                                  limit=0)
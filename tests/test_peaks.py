@@ -0,0 +1,119 @@
+import random
+from itertools import product
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from core.governor import LIMIT_RESULTS, ResourceGovernor
+from core.solver_context import CalculationCancelled
+from core.utils import parse_formula
+
+POOL = ['C', 'H', 'N', 'O', 'S', 'P', 'Cl', 'Na', 'CH3', 'NH2', 'C2H3O2', 'OH']
+
+
+def naive_assign(components, target_masses, ppm, n_max, max_per_peak=None):
+    """对每个峰分别枚举全部计数组合，作为归并连接的参照。"""
+    masses = [parse_formula(c['formula'])[0] for c in components]
+    symbols = [c['symbol'] for c in components]
+    combos = []
+    for counts in product(range(n_max + 1), repeat=len(components)):
+        if any(counts):
+            mass = sum(n * m for n, m in zip(counts, masses))
+            combos.append((mass, {s: n for s, n in zip(symbols, counts) if n > 0}))
+    combos.sort(key=lambda item: item[0])
+    results = []
+    for target in target_masses:
+        delta = target * ppm * 1e-6
+        hits = [(formula, mass, (mass - target) / target * 1e6)
+                for mass, formula in combos if target - delta <= mass <= target + delta]
+        results.append(hits if max_per_peak is None else hits[:max_per_peak])
+    return results
+
+
+def assert_same_assignments(actual, expected):
+    assert len(actual) == len(expected)
+    for peak_actual, peak_expected in zip(actual, expected):
+        assert [f for f, _, _ in peak_actual] == [f for f, _, _ in peak_expected]
+        assert [m for _, m, _ in peak_actual] == pytest.approx([m for _, m, _ in peak_expected])
+        assert [e for _, _, e in peak_actual] == pytest.approx([e for _, _, e in peak_expected], abs=1e-6)
+
+
+def random_peak_case(rng: random.Random):
+    formulas = rng.sample(POOL, rng.randint(1, 4))
+    components = [{'symbol': f, 'formula': f} for f in formulas]
+    n_max = rng.randint(1, 5)
+    masses = [parse_formula(f)[0] for f in formulas]
+    targets = []
+    for _ in range(rng.randint(1, 8)):
+        counts = [rng.randint(0, n_max) for _ in formulas]
+        real = sum(n * m for n, m in zip(counts, masses))
+        kind = rng.random()
+        if kind < 0.5 and real > 0:
+            targets.append(real * (1 + rng.uniform(-50, 50) * 1e-6))   # 附近有真实组合
+        elif kind < 0.75 and targets:
+            targets.append(targets[-1] * (1 + rng.uniform(-200, 200) * 1e-6))   # 与前一个峰的窗口重叠
+        else:
+            targets.append(rng.uniform(0.5, 400.0))   # 多半是空峰
+    return components, targets, rng.choice([100.0, 500.0, 3000.0]), n_max
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_merge_join_matches_naive_per_peak(seed):
+    rng = random.Random(seed)
+    components, targets, ppm, n_max = random_peak_case(rng)
+    max_per_peak = rng.choice([None, None, 1, 3])
+    actual = ChemicalCalculator().assign_peaks(components, targets, ppm, n_max, max_per_peak)
+    assert_same_assignments(actual, naive_assign(components, targets, ppm, n_max, max_per_peak))
+
+
+def test_overlapping_and_empty_peaks():
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+    ethanol = parse_formula('C2H6O')[0]
+    # 两个窗口都覆盖乙醇的质量；第三个峰低于最轻的组分，第四个峰附近没有组合
+    targets = [ethanol * (1 + 40e-6), ethanol * (1 - 40e-6), 0.5, 1000.0]
+    actual = ChemicalCalculator().assign_peaks(components, targets, 100.0, 6)
+    assert {'C': 2, 'H': 6, 'O': 1} in [f for f, _, _ in actual[0]]
+    assert [f for f, _, _ in actual[0]] == [f for f, _, _ in actual[1]]
+    assert actual[2] == [] and actual[3] == []
+    assert_same_assignments(actual, naive_assign(components, targets, 100.0, 6))
+
+
+def test_invalid_arguments():
+    calculator = ChemicalCalculator()
+    components = [{'symbol': 'C', 'formula': 'C'}]
+    assert calculator.assign_peaks(components, [], 5.0, 3) == []
+    with pytest.raises(ValueError):
+        calculator.assign_peaks(components, [12.0], -1.0, 3)
+
+
+def test_stop_check_cancels_assignment():
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'N', 'O']]
+    calls = []
+
+    def stop_check():
+        calls.append(1)
+        return True
+
+    with pytest.raises(CalculationCancelled):
+        ChemicalCalculator().assign_peaks(components, [500.0], 1e5, 30, stop_check=stop_check)
+    assert len(calls) == 1
+
+
+def test_governor_limits_assignments():
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+    targets = [parse_formula('C2H6O')[0], parse_formula('C6H12O6')[0]]
+    full = ChemicalCalculator().assign_peaks(components, targets, 5000.0, 12)
+    total = sum(len(peak) for peak in full)
+    assert total > 5
+
+    governor = ResourceGovernor(max_results=5)
+    partial = ChemicalCalculator().assign_peaks(components, targets, 5000.0, 12, governor=governor)
+    assert governor.stop_reason == LIMIT_RESULTS
+    assert sum(len(peak) for peak in partial) == 5
+    # 按质量升序枚举：每个峰保留的是完整结果中最轻的那些
+    for peak_partial, peak_full in zip(partial, full):
+        assert peak_partial == peak_full[:len(peak_partial)]
+
+    governor = ResourceGovernor(max_results=total)
+    assert ChemicalCalculator().assign_peaks(components, targets, 5000.0, 12, governor=governor) == full
+    assert governor.stop_reason is None
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from core import ratio_solver
+from core.calculator import ChemicalCalculator
+from core.solver_context import SolverContext
+from tests.cases import fractions_of
+
+ELEMENTS = ['C', 'H', 'N', 'O', 'S', 'Cl', 'P', 'Na']
+
+
+def random_element_case(rng: random.Random):
+    """全部组分都是单质、每个元素都给出质量分数的用例（比例法适用的情况）。"""
+    symbols = rng.sample(ELEMENTS, rng.randint(1, 4))
+    components = [{'symbol': s, 'formula': s} for s in symbols]
+    n_max = rng.randint(2, 8)
+    counts = [rng.randint(1, n_max) for _ in symbols]
+    fractions = {e: round(v, 2) for e, v in fractions_of(components, counts, symbols).items()}
+    tolerance = rng.choice([0.1, 0.5, 2.0])
+    element_tolerances = None
+    if rng.random() < 0.4:
+        element_tolerances = {rng.choice(symbols): rng.choice([0.05, 0.5, 3.0])}
+    return components, fractions, n_max, tolerance, element_tolerances
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_ratio_matches_product(seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_element_case(rng)
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_by_brute_force(components, fractions, n_max, tolerance,
+                                               element_tolerances=element_tolerances)
+    actual = calculator.solve_by_brute_force(components, fractions, n_max, tolerance, engine='ratio',
+                                             element_tolerances=element_tolerances)
+    assert expected
+    assert actual == expected
+    assert [list(f) for f in actual] == [list(f) for f in expected]
+
+
+def test_ratio_solver_is_used_for_elements():
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+    context = SolverContext(ChemicalCalculator()._prepare_components(components),
+                            {'C': 40.0, 'H': 6.71, 'O': 53.29})
+    columns = ratio_solver.element_columns(context)
+    assert columns == [0, 1, 2]
+    assert (2, 4, 2) in ratio_solver.solve_by_ratios(context, columns, 6, 0.3)
+
+
+@pytest.mark.parametrize('components, fractions', [
+    # 原子团组分
+    ([{'symbol': 'Na', 'formula': 'Na'}, {'symbol': 'OAc', 'formula': 'C2H3O2'}], {'Na': 28.0, 'C': 29.3}),
+    # 有元素没有给出质量分数
+    ([{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']], {'C': 40.0, 'H': 6.71}),
+    # 多原子单质
+    ([{'symbol': 'C', 'formula': 'C'}, {'symbol': 'O2', 'formula': 'O2'}], {'C': 27.29, 'O': 72.71}),
+])
+def test_non_element_components_fall_back_to_product(components, fractions):
+    calculator = ChemicalCalculator()
+    context = SolverContext(calculator._prepare_components(components), fractions)
+    assert ratio_solver.element_columns(context) is None
+    expected = calculator.solve_by_brute_force(components, fractions, 5, 1.0)
+    assert expected
+    assert calculator.solve_by_brute_force(components, fractions, 5, 1.0, engine='ratio') == expected
+
+
+def test_ratio_without_usable_base_falls_back_to_product():
+    # 所有分数都不大于公差时没有可用的基准元素
+    components = [{'symbol': s, 'formula': s} for s in ['C', 'H']]
+    fractions = {'C': 0.5, 'H': 0.5}
+    context = SolverContext(ChemicalCalculator()._prepare_components(components), fractions)
+    assert ratio_solver.solve_by_ratios(context, ratio_solver.element_columns(context), 4, 1.0) is None
+    calculator = ChemicalCalculator()
+    assert (calculator.solve_by_brute_force(components, fractions, 4, 1.0, engine='ratio')
+            == calculator.solve_by_brute_force(components, fractions, 4, 1.0))
@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from core.utils import parse_formula
+from tests.cases import fractions_of
+
+POOL = [('C', 'C'), ('H', 'H'), ('O', 'O'), ('CH2', 'CH2'), ('CH3', 'CH3'), ('OH', 'OH'),
+        ('Me', 'CH3'), ('CO', 'CO'), ('H2O', 'H2O'), ('CHO', 'CHO')]
+
+
+def composition(formula: dict, symbols: dict, extra=()) -> tuple:
+    total = Counter()
+    for symbol, n in formula.items():
+        if symbol in symbols:
+            for element, count in parse_formula(symbols[symbol])[1].items():
+                total[element] += n * count
+    return tuple(sorted(total.items())) + tuple(extra)
+
+
+def test_rational_dependency_is_reported_once():
+    components = [{'symbol': 'C', 'formula': 'C'}, {'symbol': 'CH2', 'formula': 'CH2'},
+                  {'symbol': 'CH3', 'formula': 'CH3'}, {'symbol': '?', 'formula': '?'}]
+    actual = components[:3] + [{'symbol': 'Na', 'formula': 'Na'}]
+    fractions = fractions_of(actual, [1, 3, 0, 3], ['C', 'H'])
+    calculator = ChemicalCalculator()
+    full = calculator.solve_for_single_unknown(components, fractions, 4, 0.5, 'unlimited')
+    assert {'?': 3, 'C': 2, 'CH3': 2} in [f for f, _, e in full if e == 'Na']
+    reduced = calculator.solve_for_single_unknown(components, fractions, 4, 0.5, 'unlimited',
+                                                  reduce_components=True)
+    assert [f for f, _, e in reduced if e == 'Na'] == [{'?': 3, 'C': 1, 'CH2': 3}]
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_reduction_keeps_one_formula_per_composition(seed):
+    rng = random.Random(seed)
+    chosen = rng.sample(POOL, rng.randint(2, 5))
+    components = [{'symbol': s, 'formula': f} for s, f in chosen]
+    symbols = dict(chosen)
+    n_max = rng.randint(2, 4)
+    counts = [rng.randint(1, n_max) for _ in components]
+    elements = sorted({e for _, f in chosen for e in parse_formula(f)[1]})
+    fractions = fractions_of(components, counts, elements[:2])
+    calculator = ChemicalCalculator()
+
+    full = calculator.solve_by_brute_force(components, fractions, n_max, 1.0)
+    reduced = calculator.solve_by_brute_force(components, fractions, n_max, 1.0, reduce_components=True)
+    keys = [composition(f, symbols) for f in reduced]
+    assert len(keys) == len(set(keys))
+    assert set(keys) == {composition(f, symbols) for f in full}
+    assert all(f in full for f in reduced)
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_reduction_in_unknown_mode(seed):
+    rng = random.Random(100 + seed)
+    chosen = rng.sample(POOL, rng.randint(2, 4))
+    known = [{'symbol': s, 'formula': f} for s, f in chosen]
+    symbols = dict(chosen)
+    n_max = rng.randint(2, 3)
+    counts = [rng.randint(0, n_max) for _ in known] + [rng.randint(1, n_max)]
+    counts[0] = max(counts[0], 1)
+    elements = sorted({e for _, f in chosen for e in parse_formula(f)[1]})
+    fractions = fractions_of(known + [{'symbol': 'Na', 'formula': 'Na'}], counts, elements[:1])
+    components = known + [{'symbol': '?', 'formula': '?'}]
+    calculator = ChemicalCalculator()
+
+    full = calculator.solve_for_single_unknown(components, fractions, n_max, 0.3, 'unlimited')
+    reduced = calculator.solve_for_single_unknown(components, fractions, n_max, 0.3, 'unlimited',
+                                                  reduce_components=True)
+    keys = [composition(f, symbols, (f['?'], e)) for f, _, e in reduced]
+    assert len(keys) == len(set(keys))
+    assert set(keys) == {composition(f, symbols, (f['?'], e)) for f, _, e in full}
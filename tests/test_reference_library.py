@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from core import data_modules
+from core.constraints import resolve_fractions
+from core.utils import parse_formula
+from data.reference_library import ReferenceLibrary, parse_formula_list
+
+ELEMENTS = ['C', 'H', 'N', 'O', 'S', 'Cl']
+
+
+def exact_fractions(formula):
+    mass, composition = parse_formula(formula)
+    return {e: 100.0 * n * data_modules.ATOMIC_MASSES[e] / mass for e, n in composition.items()}
+
+
+def brute_force(entries, mass_fractions, tolerances):
+    """逐个化合物检查，作为 lookup 的参照实现。"""
+    windows = [(e, t, t - tol, t + tol) for (e, t), tol in zip(mass_fractions.items(), tolerances)
+               if e in data_modules.ELEMENTS]
+    hits = []
+    for name, formula in entries:
+        fractions = exact_fractions(formula)
+        values = [fractions.get(e, 0.0) for e, _, _, _ in windows]
+        if all(lo <= v <= hi for v, (_, _, lo, hi) in zip(values, windows)):
+            hits.append((max([abs(v - t) for v, (_, t, _, _) in zip(values, windows)] + [0.0]), name))
+    return sorted(hits)
+
+
+@pytest.fixture
+def library(tmp_path):
+    entries = [('乙醇', 'C2H6O'), ('甲醇', 'CH4O'), ('水', 'H2O'), ('bad', 'Zz2')]
+    library = ReferenceLibrary.build(str(tmp_path / 'small.refdb'), entries)
+    yield library
+    library.close()
+
+
+def test_build_skips_unparsable_formulas(library):
+    assert len(library) == 3
+    assert library.skipped == 1
+
+
+def test_lookup_returns_compound_details(library):
+    hits = library.lookup({'C': 52.14, 'H': 13.13, 'O': 34.73}, [0.3, 0.3, 0.3])
+    assert [h['formula'] for h in hits] == ['C2H6O']
+    hit = hits[0]
+    assert hit['name'] == '乙醇'
+    assert hit['mass'] == pytest.approx(46.069, abs=1e-3)
+    assert hit['fractions'] == pytest.approx(exact_fractions('C2H6O'))
+    assert hit['deviation'] < 0.01
+
+
+def test_zero_window_matches_compounds_without_element(library):
+    # 目标0附近的窗口包含0：不含碳的水也应被找到
+    hits = library.lookup({'C': 0.0, 'H': 11.19}, [0.2, 0.2])
+    assert [h['formula'] for h in hits] == ['H2O']
+    assert hits[0]['fractions']['C'] == 0.0
+
+
+def test_remainder_element_and_unknown_keys(library):
+    targets, tolerances, _ = resolve_fractions({'C': 37.48, 'H': 12.58}, 0.3, remainder_element='O')
+    assert [h['formula'] for h in library.lookup(targets, tolerances)] == ['CH4O']
+    assert library.lookup({'?': 10.0}, [0.3]) == []
+
+
+def test_lookup_matches_brute_force(tmp_path):
+    rng = random.Random(7)
+    entries = []
+    for i in range(400):
+        elements = rng.sample(ELEMENTS, rng.randint(1, 4))
+        entries.append((f'c{i}', ''.join(f'{e}{rng.randint(1, 6)}' for e in elements)))
+    library = ReferenceLibrary.build(str(tmp_path / 'random.refdb'), entries)
+    try:
+        for _ in range(60):
+            fractions = exact_fractions(rng.choice(entries)[1])
+            measured = {e: fractions[e] + rng.uniform(-0.3, 0.3)
+                        for e in rng.sample(list(fractions), rng.randint(1, len(fractions)))}
+            if rng.random() < 0.3:
+                measured[rng.choice(ELEMENTS)] = rng.uniform(0.0, 0.5)
+            tolerances = [rng.choice([0.5, 2.0])] * len(measured)
+            expected = brute_force(entries, measured, tolerances)
+            hits = library.lookup(measured, tolerances, limit=len(entries))
+            assert [h['name'] for h in hits] == [name for _, name in expected]
+            assert [h['deviation'] for h in hits] == pytest.approx([d for d, _ in expected])
+            limited = library.lookup(measured, tolerances, limit=3)
+            assert [h['name'] for h in limited] == [name for _, name in expected[:3]]
+    finally:
+        library.close()
+
+
+def test_narrowest_window_drives_the_query():
+    windows = [('C', 40.0, 35.0, 45.0), ('H', 6.7, 6.6, 6.8), ('O', 53.3, 50.3, 56.3), ('N', 0.1, -0.4, 0.6)]
+    sql, _ = ReferenceLibrary._lookup_query(windows, 10)
+    assert 'FROM fractions f1 JOIN compounds c' in sql
+    # 所有窗口都包含0时扫描整个化合物表
+    sql, _ = ReferenceLibrary._lookup_query([windows[3]], 10)
+    assert 'FROM compounds c' in sql
+
+
+def test_all_windows_including_zero_scan_every_compound(tmp_path):
+    entries = [('乙醇', 'C2H6O'), ('水', 'H2O'), ('氨', 'NH3'), ('硫化氢', 'H2S'), ('甲烷', 'CH4')]
+    library = ReferenceLibrary.build(str(tmp_path / 'zero.refdb'), entries)
+    try:
+        measured, tolerances = {'N': 0.3, 'S': 0.2}, [0.5, 0.5]
+        hits = library.lookup(measured, tolerances)
+        expected = brute_force(entries, measured, tolerances)
+        assert [(h['deviation'], h['name']) for h in hits] == pytest.approx(expected)
+        assert {h['formula'] for h in hits} == {'C2H6O', 'H2O', 'CH4'}
+    finally:
+        library.close()
+
+
+def test_parse_formula_list():
+    lines = ['# 注释', '', 'a,b,C2H6O', '\tH2O', 'NaCl', '名称,']
+    assert parse_formula_list(lines) == ([('a,b', 'C2H6O'), ('H2O', 'H2O'), ('NaCl', 'NaCl')], 1)
+
+
+def test_missing_or_invalid_file(tmp_path):
+    with pytest.raises(ValueError):
+        ReferenceLibrary(str(tmp_path / 'missing.refdb'))
+    invalid = tmp_path / 'invalid.refdb'
+    invalid.write_text('not a database')
+    with pytest.raises(ValueError):
+        ReferenceLibrary(str(invalid))
@@ -0,0 +1,106 @@
+import csv
+import json
+import sys
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from data.result_exporter import detect_format, export_results, iter_result_rows, result_columns
+
+COMPONENTS = [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']]
+FRACTIONS = {'C': 40.0, 'H': 6.71}
+UNKNOWN_COMPONENTS = [{'symbol': 'C', 'formula': 'C'}, {'symbol': 'H', 'formula': 'H'},
+                      {'symbol': '?', 'formula': '?'}]
+UNKNOWN_FRACTIONS = {'C': 40.0, 'H': 6.71}
+
+
+@pytest.fixture(scope='module')
+def general_results():
+    results = ChemicalCalculator().solve_by_brute_force(COMPONENTS, FRACTIONS, 12, 2.0)
+    assert len(results) > 7
+    return results
+
+
+@pytest.fixture(scope='module')
+def unknown_results():
+    results = ChemicalCalculator().solve_for_single_unknown(
+        UNKNOWN_COMPONENTS, UNKNOWN_FRACTIONS, 4, 0.5, 'unlimited')
+    assert len(results) > 3
+    return results
+
+
+def expected_rows(results, mode, components, fractions):
+    return list(iter_result_rows(results, mode, components, fractions))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 5000])
+def test_csv_matches_rows_across_chunks(tmp_path, general_results, chunk_size):
+    path = tmp_path / 'results.csv'
+    n = export_results(str(path), general_results, 'general', COMPONENTS, FRACTIONS, chunk_size=chunk_size)
+    assert n == len(general_results)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == result_columns('general', FRACTIONS)
+    expected = expected_rows(general_results, 'general', COMPONENTS, FRACTIONS)
+    assert [row[0] for row in rows[1:]] == [row[0] for row in expected]
+    for row, exp in zip(rows[1:], expected):
+        assert [float(x) for x in row[1:]] == pytest.approx(exp[1:])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5000])
+def test_jsonl_unknown_mode_across_chunks(tmp_path, unknown_results, chunk_size):
+    path = tmp_path / 'results.jsonl'
+    n = export_results(str(path), unknown_results, 'unknown_element',
+                       UNKNOWN_COMPONENTS, UNKNOWN_FRACTIONS, chunk_size=chunk_size)
+    assert n == len(unknown_results)
+    columns = result_columns('unknown_element', UNKNOWN_FRACTIONS)
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    expected = expected_rows(unknown_results, 'unknown_element', UNKNOWN_COMPONENTS, UNKNOWN_FRACTIONS)
+    assert records == [dict(zip(columns, row)) for row in expected]
+    assert [r['unknown_element'] for r in records] == [s[2] for s in unknown_results]
+
+
+def test_residuals_are_computed_from_real_masses(general_results):
+    columns = result_columns('general', FRACTIONS)
+    for row in expected_rows(general_results, 'general', COMPONENTS, FRACTIONS):
+        record = dict(zip(columns, row))
+        assert abs(record['residual_C']) <= 2.0 + 1e-9
+        assert abs(record['residual_H']) <= 2.0 + 1e-9
+
+
+def test_empty_results_write_header_only(tmp_path):
+    path = tmp_path / 'empty.csv'
+    assert export_results(str(path), [], 'general', COMPONENTS, FRACTIONS) == 0
+    assert path.read_text(encoding='utf-8').splitlines() == [','.join(result_columns('general', FRACTIONS))]
+
+
+def test_format_detection_and_validation(tmp_path):
+    assert detect_format('a.CSV') == 'csv'
+    assert detect_format('a.ndjson') == 'jsonl'
+    assert detect_format('a.parquet') == 'parquet'
+    with pytest.raises(ValueError):
+        detect_format('a.xlsx')
+    with pytest.raises(ValueError):
+        export_results(str(tmp_path / 'a.csv'), [], 'general', COMPONENTS, FRACTIONS, fmt='xml')
+    with pytest.raises(ValueError):
+        export_results(str(tmp_path / 'a.csv'), [], 'general', COMPONENTS, FRACTIONS, chunk_size=0)
+
+
+@pytest.mark.parametrize('chunk_size', [3, 5000])
+def test_parquet_matches_rows(tmp_path, general_results, chunk_size):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'results.parquet'
+    n = export_results(str(path), general_results, 'general', COMPONENTS, FRACTIONS, chunk_size=chunk_size)
+    assert n == len(general_results)
+    table = pq.read_table(str(path))
+    assert table.column_names == result_columns('general', FRACTIONS)
+    expected = expected_rows(general_results, 'general', COMPONENTS, FRACTIONS)
+    assert [list(row.values()) for row in table.to_pylist()] == expected
+
+
+def test_parquet_without_pyarrow(tmp_path, monkeypatch, general_results):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    monkeypatch.setitem(sys.modules, 'pyarrow.parquet', None)
+    with pytest.raises(ImportError, match='pyarrow'):
+        export_results(str(tmp_path / 'results.parquet'), general_results, 'general', COMPONENTS, FRACTIONS)
@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from core import robustness
+from core.calculator import ChemicalCalculator
+from tests.cases import random_general_case
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_numpy_counts_match_pure_python(seed):
+    np = pytest.importorskip('numpy')
+    rng = random.Random(seed)
+    n_elements = rng.randint(1, 4)
+    matrix = [[rng.uniform(0, 60) for _ in range(n_elements)] for _ in range(rng.randint(1, 300))]
+    columns = [[rng.gauss(30, 20) for _ in range(500)] for _ in range(n_elements)]
+    tolerance = rng.choice([0.5, 5.0, 20.0])
+    assert (robustness._count_passed_numpy(np, matrix, columns, tolerance)
+            == robustness._count_passed(matrix, columns, tolerance))
+
+
+def test_analyze_robustness_without_numpy(monkeypatch):
+    rng = random.Random(3)
+    components, fractions, n_max, tolerance, _ = random_general_case(rng)
+    calculator = ChemicalCalculator()
+    candidates = calculator.solve_by_brute_force(components, fractions, n_max, tolerance)
+    std_devs = dict.fromkeys(fractions, 0.3)
+    expected = calculator.analyze_robustness(components, fractions, candidates, 'general',
+                                             std_devs, tolerance, seed=1)
+    monkeypatch.setattr(robustness, '_import_numpy', lambda: None)
+    assert calculator.analyze_robustness(components, fractions, candidates, 'general',
+                                         std_devs, tolerance, seed=1) == expected
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from service.client import CalculationClient
+from service.server import CalculationService, create_server
+
+# 组合数极大，只会在被取消时结束
+SLOW_REQUEST = {
+    'components': [{'symbol': s, 'formula': s} for s in ['C', 'H', 'N', 'O', 'S', 'P', 'Cl']],
+    'fractions': {'C': 40.0},
+    'params': {'n_max': 60, 'fraction_tolerance': 0.01},
+}
+QUICK_REQUEST = {
+    'components': [{'symbol': s, 'formula': s} for s in ['C', 'H', 'O']],
+    'fractions': {'C': 40.0, 'H': 6.71},
+    'params': {'n_max': 6, 'fraction_tolerance': 0.1},
+}
+
+
+@pytest.fixture(scope='module')
+def client():
+    service = CalculationService(max_workers=2, max_pending=8)
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield CalculationClient(f'http://127.0.0.1:{server.server_address[1]}')
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def test_quick_job_returns_result(client):
+    status = client.wait(client.submit(**QUICK_REQUEST), timeout=30)
+    assert status['status'] == 'done'
+    assert {'formula': {'C': 1, 'H': 2, 'O': 1}} in status['result']['solutions']
+
+
+def test_identical_requests_are_coalesced_and_cancelled_by_all(client):
+    job_id = client.submit(**SLOW_REQUEST)
+    assert client.submit(**SLOW_REQUEST) == job_id
+
+    # 还有一个提交者，计算继续
+    assert client.cancel(job_id)['status'] in ('queued', 'running')
+    status = client.cancel(job_id)
+    assert status['status'] in ('cancelling', 'cancelled')
+    assert client.wait(job_id, timeout=30)['status'] == 'cancelled'
+
+    # 取消后的相同请求是新作业
+    new_id = client.submit(**SLOW_REQUEST)
+    assert new_id != job_id
+    client.cancel(new_id)
+    assert client.wait(new_id, timeout=30)['status'] == 'cancelled'
+
+
+def test_missing_param_is_rejected_with_field_name(client):
+    params = dict(QUICK_REQUEST['params'])
+    del params['fraction_tolerance']
+    with pytest.raises(RuntimeError) as info:
+        client.submit(QUICK_REQUEST['components'], QUICK_REQUEST['fractions'], params)
+    assert '400' in str(info.value)
+    assert 'params.fraction_tolerance' in str(info.value)
+
+
+def test_unknown_job_is_not_found(client):
+    with pytest.raises(RuntimeError, match='404'):
+        client.status('missing')
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from data.data_manager import DataManager
+from data.session import SESSION_MAGIC, load_session, restore_data_manager, save_session
+
+PARAMS = {'n_max': 8, 'fraction_tolerance': 2.0, 'mass_tolerance': 0.5}
+
+
+def make_manager(symbols, fractions):
+    manager = DataManager()
+    for symbol in symbols:
+        manager.add_component(symbol, symbol)
+    for symbol, fraction in fractions.items():
+        manager.add_fraction(symbol, fraction)
+    return manager
+
+
+@pytest.fixture
+def general_session(tmp_path):
+    manager = make_manager(['C', 'H', 'O'], {'C': 40.0, 'H': 6.71})
+    results = ChemicalCalculator().solve_by_brute_force(
+        manager.get_all_components(), manager.get_all_fractions(), 8, 2.0)
+    path = str(tmp_path / 'general.eas')
+    save_session(path, manager, PARAMS, results, 'general')
+    return path, manager, results
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        assert f.read(len(SESSION_MAGIC)) == SESSION_MAGIC
+        header_len = int.from_bytes(f.read(4), 'little')
+        return json.loads(f.read(header_len).decode('utf-8'))
+
+
+def test_general_round_trip(general_session):
+    path, manager, results = general_session
+    assert len(results) > 3
+    session = load_session(path)
+    assert session['mode'] == 'general'
+    assert session['results'] == results
+    # 还原的字典保持与计算器输出相同的键顺序
+    assert [list(f) for f in session['results']] == [list(f) for f in results]
+    assert session['components'] == manager.get_all_components()
+    assert session['fractions'] == manager.get_all_fractions()
+    assert session['params'] == PARAMS
+
+    header = read_header(path)
+    assert header['results']['rows'] == len(results)
+    assert header['results']['columns'][:4] == ['?', 'C', 'H', 'O']
+    assert set(header['results']['blocks']) == {'counts'}
+
+
+def test_unknown_round_trip(tmp_path):
+    manager = make_manager(['C', 'H', '?'], {'C': 40.0, 'H': 6.71})
+    results = ChemicalCalculator().solve_for_single_unknown(
+        manager.get_all_components(), manager.get_all_fractions(), 4, 0.5, 'unlimited')
+    assert len(results) > 3
+    path = str(tmp_path / 'unknown.eas')
+    save_session(path, manager, PARAMS, results, 'unknown_element')
+
+    session = load_session(path)
+    assert session['mode'] == 'unknown_element'
+    assert session['results'] == results
+    header = read_header(path)
+    assert set(header['results']['blocks']) == {'counts', 'masses', 'elements'}
+    assert set(header['results']['elements']) == {element for _, _, element in results}
+
+    restored = DataManager()
+    restore_data_manager(restored, session)
+    assert restored.get_all_components() == manager.get_all_components()
+    assert restored.get_all_fractions() == manager.get_all_fractions()
+
+
+def test_session_without_results_and_empty_results(tmp_path):
+    manager = make_manager(['C', 'H'], {'C': 80.0})
+    path = str(tmp_path / 'plain.eas')
+    save_session(path, manager, PARAMS)
+    session = load_session(path)
+    assert session['results'] is None and session['mode'] is None
+
+    save_session(path, manager, PARAMS, [], 'general')
+    session = load_session(path)
+    assert session['results'] == [] and session['mode'] == 'general'
+
+
+@pytest.mark.parametrize('keep', [0, 5, 12, 20, 0.5, -8, -1])
+def test_truncated_file_raises_value_error(general_session, tmp_path, keep):
+    path = general_session[0]
+    with open(path, 'rb') as f:
+        data = f.read()
+    if isinstance(keep, float):
+        keep = int(len(data) * keep)
+    truncated = tmp_path / 'truncated.eas'
+    truncated.write_bytes(data[:keep])
+    with pytest.raises(ValueError):
+        load_session(str(truncated))
+
+
+def test_corrupt_header_raises_value_error(general_session, tmp_path):
+    path = general_session[0]
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+
+    bad_json = bytearray(data)
+    bad_json[len(SESSION_MAGIC) + 4] = 0xff
+    corrupt = tmp_path / 'corrupt.eas'
+    corrupt.write_bytes(bytes(bad_json))
+    with pytest.raises(ValueError):
+        load_session(str(corrupt))
+
+    header = read_header(path)
+    header['version'] = 99
+    header_bytes = json.dumps(header).encode('utf-8')
+    corrupt.write_bytes(SESSION_MAGIC + len(header_bytes).to_bytes(4, 'little') + header_bytes)
+    with pytest.raises(ValueError, match='版本'):
+        load_session(str(corrupt))
+
+    corrupt.write_bytes(b'NOTASESSION')
+    with pytest.raises(ValueError):
+        load_session(str(corrupt))
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from core.calculator import ChemicalCalculator
+from core.utils import parse_formula
+from tests.cases import random_unknown_case
+
+pytest.importorskip('numpy')
+
+
+def _solve_both(**kwargs):
+    calculator = ChemicalCalculator()
+    expected = calculator.solve_for_single_unknown(**kwargs)
+    actual = calculator.solve_for_single_unknown(**kwargs, engine='vectorized')
+    return expected, actual
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_vectorized_matches_recursive(seed):
+    rng = random.Random(seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_unknown_case(rng)
+    unknown_filter = rng.choice(['unlimited', 'metal', 'nonmetal'])
+    expected, actual = _solve_both(known_components_data=components, mass_fractions=fractions, n_max=n_max,
+                                   tolerance=tolerance, unknown_filter=unknown_filter,
+                                   element_tolerances=element_tolerances)
+    assert actual == expected
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_vectorized_with_constraints_and_remainder(seed):
+    rng = random.Random(500 + seed)
+    components, fractions, n_max, tolerance, element_tolerances = random_unknown_case(rng)
+    constraints = rng.choice([{'charge_neutral': True}, {'rdbe_min': 0.0, 'rdbe_max': 4.0},
+                              {'nitrogen_rule': True}, {'molar_mass': 120.0, 'molar_mass_tolerance': 60.0}])
+    # 给出了全部已知元素的分数时，未知元素的分数就是其余部分
+    known_elements = {e for comp in components[:-1] for e in parse_formula(comp['formula'])[1]}
+    remainder = '?' if known_elements == set(fractions) else None
+    expected, actual = _solve_both(known_components_data=components, mass_fractions=fractions, n_max=n_max,
+                                   tolerance=tolerance, unknown_filter='unlimited', constraints=constraints,
+                                   element_tolerances=element_tolerances, remainder_element=remainder)
+    assert actual == expected
+
+
+def test_vectorized_with_reduced_components():
+    components = [{'symbol': s, 'formula': f} for s, f in [('C', 'C'), ('H', 'H'), ('Me', 'CH3')]]
+    components.append({'symbol': '?', 'formula': '?'})
+    expected, actual = _solve_both(known_components_data=components, mass_fractions={'C': 30.0, 'H': 5.0},
+                                   n_max=4, tolerance=0.5, unknown_filter='unlimited', reduce_components=True)
+    assert expected
+    assert actual == expected